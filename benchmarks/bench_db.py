@@ -0,0 +1,67 @@
+"""
+Per-call vs pooled engine latency for term2site against a SQLite stand-in
+
+    python benchmarks/bench_db.py [n_lookups]
+"""
+
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from sqlalchemy import create_engine, insert
+
+from autovid.common import term2site
+from autovid.schema import dvr_cameras, metadata, sites
+
+
+def build_db(db_path: Path, n_cameras: int = 5000) -> str:
+    url = f"sqlite:///{db_path}"
+    engine = create_engine(url)
+    metadata.create_all(engine)
+
+    with engine.begin() as conn:
+        conn.execute(
+            insert(sites), [{"ID": x, "SiteName": f"SITE{x:04}"} for x in range(100)]
+        )
+        conn.execute(
+            insert(dvr_cameras),
+            [
+                {"DvrCamera_ID": x, "Dvr_ID": x % 100, "Name": f"ATM{x:06}"}
+                for x in range(n_cameras)
+            ],
+        )
+
+    engine.dispose()
+    return url
+
+
+def bench(label: str, con, terms: list[str]) -> None:
+    timings = []
+    for term in terms:
+        start = time.perf_counter()
+        term2site(term, con=con)
+        timings.append((time.perf_counter() - start) * 1000)
+
+    print(
+        f"{label:<10} mean={statistics.mean(timings):.2f}ms "
+        f"p50={statistics.median(timings):.2f}ms max={max(timings):.2f}ms"
+    )
+
+
+def main(n_lookups: int = 200) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        url = build_db(Path(tmp) / "verint.db")
+        terms = [f"ATM{x * 7:06}" for x in range(n_lookups)]
+
+        # A connection string makes pandas build a new engine + connection per call
+        bench("per-call", url, terms)
+
+        engine = create_engine(url, pool_pre_ping=True)
+        bench("pooled", engine, terms)
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main(*[int(x) for x in sys.argv[1:2]])
@@ -0,0 +1,64 @@
+"""
+Face similarity search latency over a large synthetic index
+
+    python benchmarks/bench_faces.py [faces] [dim] [queries]
+
+Builds a FaceIndex of random unit embeddings and times top-10 queries, plus
+loading the same index back from a FaceStore-shaped SQLite table.
+"""
+
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+from autovid.faces import FaceIndex, FaceStore
+
+
+def bench_search(index: FaceIndex, queries: int) -> None:
+    rng = np.random.default_rng(1)
+    timings = []
+    for _ in range(queries):
+        query = rng.normal(size=index.embeddings.shape[1]).astype(np.float32)
+        start = time.perf_counter()
+        index.search(query, k=10)
+        timings.append((time.perf_counter() - start) * 1000)
+
+    print(
+        f"search top-10 over {len(index)} faces: "
+        f"p50 {statistics.median(timings):.2f} ms, max {max(timings):.2f} ms"
+    )
+
+
+def bench_load(embeddings: np.ndarray) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        store = FaceStore(Path(tmp) / "faces.db")
+        db = sqlite3.connect(store.path)
+        db.executemany(
+            "INSERT INTO faces (image, x, y, w, h, crop, embedding) "
+            "VALUES ('', 0, 0, 0, 0, x'', ?)",
+            ((x.tobytes(),) for x in embeddings),
+        )
+        db.commit()
+        db.close()
+
+        start = time.perf_counter()
+        index = FaceIndex.from_store(store)
+        elapsed = time.perf_counter() - start
+        store.close()
+
+    print(f"load {len(index)} faces from SQLite: {elapsed * 1000:.0f} ms")
+
+
+def main(faces: int = 300_000, dim: int = 128, queries: int = 50) -> None:
+    embeddings = np.random.default_rng(0).normal(size=(faces, dim)).astype(np.float32)
+    bench_search(FaceIndex(np.arange(faces), embeddings), queries)
+    bench_load(embeddings)
+
+
+if __name__ == "__main__":
+    main(*[int(x) for x in sys.argv[1:4]])
@@ -0,0 +1,69 @@
+"""
+Cold import time of the autovid entry points, each in a fresh interpreter
+
+    python benchmarks/bench_import.py [runs] [budget_ms]
+
+Planning, lookup and reporting modules must stay under budget_ms and must not
+pull in pandas, SQLAlchemy, tkinter or pywinauto at import. Exits 1 otherwise so
+it can gate CI.
+"""
+
+import statistics
+import subprocess
+import sys
+
+# Modules a dry run / lookup / report imports, and those allowed to be heavier
+LIGHT = [
+    "autovid.common",
+    "autovid.directory",
+    "autovid.jobs",
+    "autovid.jobqueue",
+    "autovid.scheduler",
+    "autovid.spans",
+    "autovid.__main__",
+]
+UI = ["autovid.verint", "autovid.main", "autovid.batch", "autovid.workers"]
+HEAVY = ("pandas", "sqlalchemy", "tkinter", "pywinauto", "numpy")
+
+_PROBE = """
+import sys, time
+start = time.perf_counter()
+import {module}
+elapsed = (time.perf_counter() - start) * 1000
+print(elapsed, ",".join(x for x in {heavy!r} if x in sys.modules))
+"""
+
+
+def probe(module: str) -> tuple[float, list[str]]:
+    output = subprocess.run(
+        [sys.executable, "-c", _PROBE.format(module=module, heavy=HEAVY)],
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout.split()
+
+    return float(output[0]), output[1].split(",") if len(output) > 1 else []
+
+
+def main(runs: int = 5, budget_ms: float = 100) -> int:
+    failed = False
+    print(f"{'module':<22}{'p50 ms':>9}{'max ms':>9}  heavy")
+
+    for module in LIGHT + UI:
+        results = [probe(module) for _ in range(runs)]
+        timings = [x[0] for x in results]
+        heavy = results[0][1]
+        p50 = statistics.median(timings)
+
+        over = module in LIGHT and (p50 > budget_ms or heavy)
+        failed |= bool(over)
+        print(
+            f"{module:<22}{p50:>9.1f}{max(timings):>9.1f}  {','.join(heavy) or '-'}"
+            + ("  OVER BUDGET" if over else "")
+        )
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(*[int(x) for x in sys.argv[1:2]], *[float(x) for x in sys.argv[2:3]]))
@@ -0,0 +1,54 @@
+"""
+Memory and throughput of ResultsWriter over a large batch
+
+    python benchmarks/bench_report.py [rows]
+
+Streams synthetic results to CSV, JSON lines and xlsx and prints RSS every
+tenth of the way, which should stay flat once the writers are warmed up. Every
+row shares one output Path: pathlib interns the parts of each new path, which
+would show up here as ~100 B per row that has nothing to do with the writer.
+"""
+
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import psutil
+
+from autovid.jobs import Job, JobResult
+from autovid.report import ResultsWriter
+
+EVENT = datetime(2025, 1, 2, 3, 4, 5)
+STEPS = {"select_site": 1.5, "select_camera": 0.8, "videoview": 20.25, "save": 1.1}
+
+
+def main(rows: int = 100_000) -> None:
+    process = psutil.Process()
+    with tempfile.TemporaryDirectory() as tmp:
+        output = Path(tmp) / "ATM1001_20250102_030405.jpg"
+        start = time.perf_counter()
+        with ResultsWriter(Path(tmp) / "report") as writer:
+            for i in range(rows):
+                writer.append(
+                    JobResult(
+                        job=Job(f"ATM{i % 5000}", EVENT + timedelta(seconds=i)),
+                        ok=True,
+                        site_id="SITE-SOUTH",
+                        output=output,
+                        finished=EVENT,
+                        steps=STEPS,
+                    )
+                )
+                if (i + 1) % (rows // 10) == 0:
+                    rss = process.memory_info().rss / 1024**2
+                    print(f"{i + 1:>8} rows  RSS {rss:6.1f} MB")
+
+        elapsed = time.perf_counter() - start
+        size = (Path(tmp) / "report.xlsx").stat().st_size / 1024**2
+        print(f"{rows / elapsed:,.0f} rows/s, xlsx {size:.1f} MB")
+
+
+if __name__ == "__main__":
+    main(*[int(x) for x in sys.argv[1:2]])
@@ -0,0 +1,136 @@
+"""
+COM-equivalent calls and wall time per VERINT method on the simulated backend
+
+    python benchmarks/bench_verint.py [latency_ms] [runs]
+
+Every wrapper call on the simulated tree costs latency_ms, roughly what a UIA
+round trip costs on a loaded VDI desktop. The end-to-end row runs AutoVid.pull_image
+(DB lookup through the final reset) against a SQLite stand-in of the VERINT DB.
+The "no prefetch" column counts the calls again with VERINT(prefetch=False), i.e.
+walking the tree instead of taking bulk snapshots of it.
+"""
+
+import os
+import statistics
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from sqlalchemy import create_engine, insert
+
+from autovid.common import dispose_engine
+from autovid.schema import dvr_cameras, metadata, sites
+from autovid.sim import SimBackend
+from autovid.verint import VERINT
+
+SITES = {"SITE-SOUTH": ["ATM2001"]}
+EVENT = datetime(2025, 1, 2, 3, 4, 5)
+
+
+def setup(tmp: Path) -> Path:
+    verint_dir = tmp / "verint"
+    verint_dir.mkdir()
+    (verint_dir / "Verint.VideoInvestigator.exe").touch()
+
+    engine = create_engine(f"sqlite:///{tmp / 'verint.db'}")
+    metadata.create_all(engine)
+    with engine.begin() as conn:
+        conn.execute(insert(sites), [{"ID": 1, "SiteName": "SITE-SOUTH"}])
+        conn.execute(
+            insert(dvr_cameras),
+            [{"DvrCamera_ID": 1, "Dvr_ID": 1, "Name": "ATM2001", "InUse": True}],
+        )
+    engine.dispose()
+
+    os.environ["AUTOVID_DB_CONN_STRING"] = f"sqlite:///{tmp / 'verint.db'}"
+    return verint_dir
+
+
+def backend(latency: float) -> SimBackend:
+    return SimBackend(SITES, latency=latency, launch_time=0.05, load_time=0.1)
+
+
+def bench_methods(tmp: Path, verint_dir: Path, latency: float, runs: int) -> None:
+    steps = {
+        "init_app": lambda x: x.init_app(),
+        "login": lambda x: x.login(),
+        "reset_state": lambda x: x.reset_state(),
+        "select_site": lambda x: x.select_site("SITE-SOUTH"),
+        "select_camera": lambda x: x.select_camera("ATM2001"),
+        "set_time_range": lambda x: x.set_time_range(EVENT, timedelta(seconds=5)),
+        "click_recorded_button": lambda x: x.click_recorded_button(),
+        "videoview": lambda x: x.videoview(),
+        "export_image_click": lambda x: x.export_image_click(),
+        "save_image": lambda x: x.save_image(fl_name="bench"),
+    }
+    calls: dict[str, list[int]] = defaultdict(list)
+    walked: dict[str, list[int]] = defaultdict(list)
+    timings: dict[str, list[float]] = defaultdict(list)
+
+    for _ in range(runs):
+        sim = backend(latency)
+        verint = VERINT(outdir=tmp, verint_path=verint_dir, backend=sim)
+        for name, step in steps.items():
+            before = sim.total_calls
+            start = time.perf_counter()
+            step(verint)
+            timings[name].append((time.perf_counter() - start) * 1000)
+            calls[name].append(sim.total_calls - before)
+
+    sim = backend(0)
+    verint = VERINT(outdir=tmp, verint_path=verint_dir, backend=sim, prefetch=False)
+    for name, step in steps.items():
+        before = sim.total_calls
+        step(verint)
+        walked[name].append(sim.total_calls - before)
+
+    print(f"{'method':<24}{'calls':>8}{'no prefetch':>13}{'p50 ms':>10}{'max ms':>10}")
+    for name in steps:
+        print(
+            f"{name:<24}{statistics.median(calls[name]):>8.0f}"
+            f"{walked[name][0]:>13}"
+            f"{statistics.median(timings[name]):>10.1f}{max(timings[name]):>10.1f}"
+        )
+    print(
+        f"{'total':<24}{sum(statistics.median(x) for x in calls.values()):>8.0f}"
+        f"{sum(x[0] for x in walked.values()):>13}"
+    )
+
+
+def bench_pull_image(tmp: Path, verint_dir: Path, latency: float, runs: int) -> None:
+    from autovid.main import AutoVid
+
+    timings, calls = [], []
+    for _ in range(runs):
+        sim = backend(latency)
+        autovid = AutoVid(
+            term_id="ATM2001",
+            tran_dt=EVENT,
+            outdir=tmp,
+            verint_path=verint_dir,
+            backend=sim,
+        )
+        start = time.perf_counter()
+        autovid.pull_image()
+        timings.append((time.perf_counter() - start) * 1000)
+        calls.append(sim.total_calls)
+
+    print(
+        f"{'pull_image end-to-end':<24}{statistics.median(calls):>8.0f}{'':>13}"
+        f"{statistics.median(timings):>10.1f}{max(timings):>10.1f}"
+    )
+
+
+def main(latency_ms: float = 1.0, runs: int = 5) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        verint_dir = setup(Path(tmp))
+        bench_methods(Path(tmp), verint_dir, latency_ms / 1000, runs)
+        bench_pull_image(Path(tmp), verint_dir, latency_ms / 1000, runs)
+        dispose_engine()
+
+
+if __name__ == "__main__":
+    main(*[float(x) for x in sys.argv[1:2]], *[int(x) for x in sys.argv[2:3]])
@@ -0,0 +1,140 @@
+import argparse
+import json
+import sys
+from pathlib import Path
+
+from autovid.spans import format_report, load_traces, summarize
+
+
+def report(args: argparse.Namespace) -> None:
+    summary = summarize(load_traces(args.spans))
+    if args.json:
+        print(json.dumps(summary, indent=2))
+    else:
+        print(format_report(summary))
+
+
+def frames(args: argparse.Namespace) -> None:
+    from autovid.frames import FramePipeline
+
+    with FramePipeline(
+        args.outdir,
+        threshold=args.threshold,
+        thumbnails=not args.no_thumbnails,
+        drop=args.drop,
+        processes=args.processes,
+        history=None,
+    ) as pipeline:
+        count = pipeline.scan()
+
+    duplicates = [x for x in pipeline.records if x.duplicate_of is not None]
+    print(f"Hashed {count} new frames, {len(duplicates)} duplicates")
+    for record in duplicates:
+        print(f"{record.path} ~ {record.duplicate_of} ({record.distance} bits)")
+
+
+def faces(args: argparse.Namespace) -> None:
+    from autovid.faces import FaceExtractor, FaceIndex, FaceStore, frames_from_results
+
+    outdir = Path(args.outdir)
+    store = FaceStore(args.db or outdir / "autovid_faces.db")
+
+    if args.similar is None:
+        results = outdir / "autovid_results.csv"
+        if results.exists():
+            frames = frames_from_results(results)
+        else:
+            frames = sorted(x for x in outdir.iterdir() if x.suffix.lower() == ".jpg")
+
+        found = FaceExtractor(store, workers=args.workers).run(frames)
+        print(f"Found {found} faces, {store.count()} in {store.path}")
+        return
+
+    (query,) = store.get([args.similar])
+    index = FaceIndex.from_store(store)
+    for face in store.get(x for x, _ in index.search(query.embedding, k=args.k)):
+        score = float(face.embedding @ query.embedding)
+        print(f"{face.id}\t{score:.3f}\t{face.camera}\t{face.taken}\t{face.image}")
+
+
+def workbook(args: argparse.Namespace) -> None:
+    from autovid.report import rebuild_workbook
+
+    print(rebuild_workbook(args.manifest, args.output))
+
+
+def daemon(args: argparse.Namespace) -> None:
+    from autovid.batch import AutoVidBatch
+    from autovid.daemon import Daemon
+
+    driver = AutoVidBatch(jobs=[], outdir=args.outdir, directory=args.directory)
+    Daemon(driver, port=args.port, health_every=args.health_every).serve_forever()
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(prog="autovid")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    parser_report = commands.add_parser(
+        "report", help="p50/p95/max seconds per step from autovid_spans.jsonl files"
+    )
+    parser_report.add_argument("spans", nargs="+", help="Span JSON lines files")
+    parser_report.add_argument("--json", action="store_true", help="Print JSON")
+    parser_report.set_defaults(func=report)
+
+    parser_frames = commands.add_parser(
+        "frames", help="Flag near-duplicate frames and write thumbnails"
+    )
+    parser_frames.add_argument("outdir", help="Directory of exported frames")
+    parser_frames.add_argument(
+        "--threshold", type=int, default=6, help="Max Hamming distance, of 64 bits"
+    )
+    parser_frames.add_argument(
+        "--drop", action="store_true", help="Move duplicates to outdir/duplicates"
+    )
+    parser_frames.add_argument("--no-thumbnails", action="store_true")
+    parser_frames.add_argument(
+        "--processes", action="store_true", help="Hash in a process pool"
+    )
+    parser_frames.set_defaults(func=frames)
+
+    parser_faces = commands.add_parser(
+        "faces", help="Extract faces from exported frames, or find similar faces"
+    )
+    parser_faces.add_argument("outdir", help="Directory of exported frames")
+    parser_faces.add_argument("--db", help="Defaults to outdir/autovid_faces.db")
+    parser_faces.add_argument("--workers", type=int, default=4, help="Processes")
+    parser_faces.add_argument(
+        "--similar", type=int, metavar="FACE_ID", help="Search instead of extracting"
+    )
+    parser_faces.add_argument("-k", type=int, default=10, help="Results to show")
+    parser_faces.set_defaults(func=faces)
+
+    parser_workbook = commands.add_parser(
+        "workbook", help="Write the Excel report of a results manifest"
+    )
+    parser_workbook.add_argument("manifest", help="autovid_report.jsonl or .csv")
+    parser_workbook.add_argument(
+        "-o", "--output", help="Defaults to the manifest with an .xlsx extension"
+    )
+    parser_workbook.set_defaults(func=workbook)
+
+    parser_daemon = commands.add_parser(
+        "daemon", help="Keep VERINT logged in and serve exports on localhost"
+    )
+    parser_daemon.add_argument("outdir", help="Output directory of images")
+    parser_daemon.add_argument("--port", type=int, default=8642)
+    parser_daemon.add_argument(
+        "--health-every", type=float, default=300, help="Seconds between health checks"
+    )
+    parser_daemon.add_argument(
+        "--directory", help="SQLite file of the camera directory, kept in memory if not"
+    )
+    parser_daemon.set_defaults(func=daemon)
+
+    args = parser.parse_args(argv)
+    args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,122 @@
+import importlib
+import os
+import sys
+from typing import Any, Protocol
+
+from autovid.snapshot import CachedElement, Snapshot
+
+
+class Backend(Protocol):
+    """
+    Entry points into the UI automation library VERINT drives
+
+    Mirrors the slice of pywinauto VERINT uses so a simulated desktop (see
+    autovid.sim) can stand in for the real one
+    """
+
+    ElementNotFoundError: type[Exception]
+
+    def application(self) -> Any:
+        """A pywinauto Application-like object, not yet started or connected"""
+        ...
+
+    def desktop(self) -> Any:
+        """A pywinauto Desktop-like object for top level windows and popups"""
+        ...
+
+    def snapshot(self, element: Any, depth: int | None = None) -> Snapshot:
+        """The subtree under a wrapper in one request, depth levels deep (all if None)"""
+        ...
+
+
+class UIABackend:
+    """pywinauto over Microsoft UI Automation, the real VERINT desktop"""
+
+    def __init__(self) -> None:
+        sys.coinit_flags = 2  # Single-threaded COM helps with stability
+
+        import pywinauto
+        from pywinauto import findwindows
+
+        self._pywinauto = pywinauto
+        self.ElementNotFoundError = findwindows.ElementNotFoundError
+
+    def application(self) -> Any:
+        return self._pywinauto.Application(backend="uia")
+
+    def desktop(self) -> Any:
+        return self._pywinauto.Desktop(backend="uia")
+
+    def snapshot(self, element: Any, depth: int | None = None) -> Snapshot:
+        """
+        The subtree under element from a single BuildUpdatedCache call
+
+        The cache request covers the raw view, like pywinauto's children(), and only
+        the properties CachedElement serves. Live wrappers are only built for the
+        elements that get acted on.
+        """
+        from pywinauto.controls.uiawrapper import UIAWrapper
+        from pywinauto.uia_defines import IUIA
+        from pywinauto.uia_element_info import UIAElementInfo
+
+        uia = IUIA()
+        ids = uia.UIA_dll
+        request = uia.iuia.CreateCacheRequest()
+        for prop in (
+            ids.UIA_ClassNamePropertyId,
+            ids.UIA_NamePropertyId,
+            ids.UIA_RuntimeIdPropertyId,
+            ids.UIA_IsOffscreenPropertyId,
+            ids.UIA_IsEnabledPropertyId,
+        ):
+            request.AddProperty(prop)
+        request.TreeScope = uia.tree_scope["subtree"]
+        request.TreeFilter = uia.true_condition
+
+        snapshot = Snapshot()
+
+        def copy(com: Any, depth: int | None) -> CachedElement:
+            children = None
+            if depth is None or depth > 0:
+                found = com.GetCachedChildren()
+                children = [
+                    copy(found.GetElement(i), None if depth is None else depth - 1)
+                    for i in range(found.Length if found else 0)
+                ]
+
+            return CachedElement(
+                snapshot,
+                lambda: UIAWrapper(UIAElementInfo(com)),
+                class_name=com.CachedClassName,
+                title=com.CachedName,
+                runtime_id=com.GetCachedPropertyValue(ids.UIA_RuntimeIdPropertyId),
+                visible=not com.CachedIsOffscreen,
+                enabled=bool(com.CachedIsEnabled),
+                children=children,
+            )
+
+        snapshot.root = copy(
+            element.element_info.element.BuildUpdatedCache(request), depth
+        )
+        return snapshot
+
+
+# Import paths so a backend's dependencies only load when it's selected
+BACKENDS = {
+    "uia": "autovid.backends:UIABackend",
+    "sim": "autovid.sim:SimBackend",
+}
+
+
+def get_backend(name: str | None = None, **kwargs) -> Backend:
+    """
+    Creates a backend by name, AUTOVID_BACKEND or "uia" if not given
+
+    kwargs are passed to the backend, e.g. sites/latency for "sim"
+    """
+    name = (name or os.getenv("AUTOVID_BACKEND") or "uia").lower()
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown backend {name!r}, expected one of {list(BACKENDS)}")
+
+    module, _, attr = BACKENDS[name].partition(":")
+    return getattr(importlib.import_module(module), attr)(**kwargs)
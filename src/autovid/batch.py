@@ -0,0 +1,403 @@
+from __future__ import annotations
+
+import logging
+from collections.abc import Iterable, Iterator
+from dataclasses import replace
+from datetime import datetime
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from autovid.common import Ambiguous
+from autovid.events import Progress
+from autovid.jobqueue import JobQueue, JobState, verify_image
+from autovid.jobs import Job, JobResult, ResultsCSV, load_jobs
+from autovid.scheduler import VideoRequest, plan_jobs
+from autovid.verint import VERINT
+from autovid.waits import Cancelled
+
+if TYPE_CHECKING:
+    from autovid.frames import FramePipeline
+    from autovid.report import ResultsWriter
+
+lg = logging.getLogger(__name__)
+
+
+class AutoVidBatch(VERINT):
+    """
+    Runs many exports through a single VERINT session
+
+    VERINT is launched and logged in once. Jobs are grouped by site and camera
+    (see scheduler.plan_jobs) and the UI is only reset between sites or after a
+    failure. If a reset fails VERINT is restarted and the batch carries on.
+
+    With a queue every job is checkpointed in SQLite once its image is on disk, so
+    rerunning the same batch after a crash only runs the unfinished jobs.
+
+    With frames each saved image is handed to a FramePipeline, which hashes and
+    thumbnails it in the background while the next job drives the UI.
+
+    With sweep, a video request merging several jobs loads its video once and
+    seeks the player to each job's time instead of reloading it per job.
+
+    With report every result is also streamed, with its step timings, to a
+    CSV/JSON lines manifest and an Excel workbook (see report.ResultsWriter).
+    """
+
+    def __init__(
+        self,
+        jobs: Iterable[Job] | Path | str,
+        outdir: Path | str,
+        results: Path | str | None = None,
+        queue: JobQueue | Path | str | None = None,
+        frames: FramePipeline | bool = False,
+        sweep: bool = False,
+        report: ResultsWriter | Path | str | bool = False,
+        **kwargs,
+    ) -> None:
+        """
+        Parameters
+        ----------
+
+        jobs: Iterable[Job] | Path | str
+            Jobs or a CSV/Excel file of (terminal, datetime, buffer, jira_id) rows
+        outdir: Path | str
+            Output directory of images
+        results: Path | str, optional
+            CSV the per-job results are appended to. Defaults to outdir/autovid_results.csv
+        queue: JobQueue | Path | str, optional
+            Job queue (or its SQLite file) to checkpoint progress in and resume from
+        frames: FramePipeline | bool, optional
+            Dedupe and thumbnail saved frames, True for a FramePipeline on outdir
+        sweep: bool, optional
+            Export every job of a merged video request from one video load
+        report: ResultsWriter | Path | str | bool, optional
+            Report writer or path (without extension), True for outdir/autovid_report
+        """
+        super().__init__(outdir=outdir, **kwargs)
+
+        if isinstance(jobs, (Path, str)):
+            jobs = load_jobs(jobs)
+
+        self.jobs: list[Job] = list(jobs)
+        self.results = ResultsCSV(results or Path(self.outdir) / "autovid_results.csv")
+
+        if isinstance(queue, (Path, str)):
+            queue = JobQueue(queue)
+        self.queue: JobQueue | None = queue
+        self._site_id: str | None = None
+        self._camera: str | None = None
+
+        if frames is True:
+            from autovid.frames import FramePipeline
+
+            frames = FramePipeline(self.outdir)
+        self.frames: FramePipeline | None = frames or None
+        self.sweep_requests = sweep
+
+        if report is True:
+            report = Path(self.outdir) / "autovid_report"
+        if isinstance(report, (Path, str)):
+            from autovid.report import ResultsWriter
+
+            report = ResultsWriter(report)
+        self.report: ResultsWriter | None = report or None
+
+    def start(self) -> None:
+        self.init_app()
+        self.login()
+        self.reset_state()
+        self._site_id = self._camera = None
+
+    def recover(self) -> None:
+        self._site_id = self._camera = None
+        if self.cancel.cancelled:
+            # A reset would stop at its first wait, leave VERINT as it is
+            self.cleanup()
+            self.cancel.check()
+
+        try:
+            self.reset_state()
+        except Exception as err:  # noqa: BLE001
+            lg.error(f"Unable to reset VERINT ({err}), restarting it")
+            self._kill_app(restart=True)
+            self.start()
+
+    def healthy(self) -> bool:
+        """Whether VERINT is still up and logged in, without waiting"""
+        if self.verint is None:
+            return False
+
+        self.locators.invalidate()
+        try:
+            if not self.verint.exists(timeout=0):
+                return False
+            login_button = self.ui.resolve("login_button")
+        except Exception:  # noqa: BLE001
+            return True  # No login dialog
+
+        return not login_button.is_visible()
+
+    def relogin(self) -> None:
+        """Logs back in after VERINT dropped the session, restarting it if it's gone"""
+        self._site_id = self._camera = None
+        if self.verint is not None and self.verint.exists(timeout=0):
+            self.locators.invalidate()
+            self.login()
+            self.reset_state()
+            return
+
+        if self.app is not None:
+            try:
+                self._kill_app()
+            except Exception as err:  # noqa: BLE001
+                lg.warning(f"VERINT already gone: {err}")
+        self._chk_exec()
+        self.start()
+
+    def close(self) -> None:
+        """Writes out the report and kills VERINT, if it was ever started"""
+        if self.report is not None:
+            self.report.close()
+        if self.app is not None:
+            self._kill_app()
+
+    def run_job(self, job: Job, site_id: str) -> Path:
+        """
+        Exports one job's frame and returns the image once it's on disk
+
+        The site is only selected when it changes and the camera only when it
+        changes within a site. Jobs found in the cache never touch VERINT.
+        """
+        with self.trace.job(job.fl_name), self.job_budget():
+            if cached := self._cached(
+                job.term_id, job.tran_dt, job.lookback, job.fl_name
+            ):
+                return cached
+
+            self._select(site_id, job.term_id)
+            output = self.export_frame(
+                event_dt=job.tran_dt, event_td_range=job.lookback, fl_name=job.fl_name
+            )
+            self._on_disk(output)
+            self._store(job.term_id, job.tran_dt, job.lookback, output)
+            return output
+
+    def _select(self, site_id: str, camera: str) -> None:
+        if site_id != self._site_id:
+            if self._site_id is not None:
+                with self.trace.span("reset_state"):
+                    self.reset_state()
+            with self.trace.span("select_site"):
+                self.select_site(site_id)
+            self._site_id, self._camera = site_id, None
+
+        if camera != self._camera:
+            with self.trace.span("select_camera"):
+                self.select_camera(camera_name=camera)
+            self._camera = camera
+
+    def _on_disk(self, output: Path) -> None:
+        self.wait.until(lambda: verify_image(output), timeout=10, name="image_on_disk")
+
+    def run_request(self, request: VideoRequest) -> Iterator[tuple[Job, Path]]:
+        """
+        Exports every job of a video request from one video load
+
+        Jobs are exported in time order, each (job, image) is yielded once the
+        image is on disk. Raises on the first failure, leaving the rest unexported.
+        """
+        jobs = sorted(request.jobs, key=lambda x: x.tran_dt)
+        name = f"{request.camera}_{request.start:%Y%m%d_%H%M%S}_sweep"
+        with self.trace.job(name), self.job_budget():
+            self._select(request.site_id, request.camera)
+            frames = self.export_frames(
+                request.start, request.end, [(x.tran_dt, x.fl_name) for x in jobs]
+            )
+            for job, output in zip(jobs, frames):
+                self._on_disk(output)
+                yield job, output
+
+    @staticmethod
+    def _unresolved(job: Job, site_id: str | None | Ambiguous) -> JobResult:
+        if isinstance(site_id, Ambiguous):
+            error = f"{job.term_id} matched multiple cameras: {list(site_id.cameras)}"
+        else:
+            error = f"Could not return a valid site from: {job.term_id}"
+
+        return JobResult(job=job, ok=False, error=error, finished=datetime.now())
+
+    def _finish(self, result: JobResult, outputs: list[JobResult]) -> None:
+        result.finished = result.finished or datetime.now()
+        trace = self.trace.last
+        if not result.steps and trace and trace.job == result.job.fl_name:
+            for span in trace.spans:
+                result.steps[span.name] = result.steps.get(span.name, 0) + span.duration
+
+        if result.ok and self.frames is not None:
+            self.frames.submit(result.output)
+        self.results.append(result)
+        if self.report is not None:
+            self.report.append(result)
+        outputs.append(result)
+        self.events.publish(
+            Progress(done=len(outputs), total=len(self.jobs), job=result.job.fl_name)
+        )
+
+    def _pending(self) -> list[Job]:
+        if self.queue is None:
+            return self.jobs
+
+        self.queue.resume()
+        return [x.job for x in self.queue.jobs(JobState.PENDING)]
+
+    def _checkpoint(self, result: JobResult, retryable: bool = True) -> None:
+        if self.queue is None:
+            return
+
+        queued = self.queue.get(result.job)
+        if result.ok:
+            if not self.queue.complete(
+                queued.id, result.output, site_id=result.site_id
+            ):
+                lg.warning(f"Lost the lease on {result.job.fl_name} to another worker")
+        else:
+            self.queue.fail(
+                queued.id, result.error, retryable=retryable, site_id=result.site_id
+            )
+
+    def run(self) -> list[JobResult]:
+        """
+        Runs the jobs in plan_jobs order
+
+        The site is only selected when it changes and the camera only when it
+        changes within a site. After a failure VERINT is reset and the next job
+        selects its site and camera again. With a queue, failed jobs are retried in
+        another pass until they run out of retries.
+        """
+        if self.queue is not None:
+            self.queue.enqueue(self.jobs)
+
+        outputs: list[JobResult] = []
+        started = False
+        try:
+            while jobs := self._pending():
+                lg.info(f"Starting batch of {len(jobs)} jobs")
+                started = self._run_plan(jobs, outputs, started)
+
+                if self.queue is None:
+                    break
+        finally:
+            if self.report is not None:
+                self.report.close()
+
+        if self.frames is not None:
+            self.frames.close()
+            lg.info(
+                f"Hashed {self.frames.count} frames, "
+                f"{self.frames.duplicates} duplicates"
+            )
+
+        lg.info(
+            f"Finished batch: {sum(x.ok for x in outputs)}/{len(outputs)} succeeded"
+        )
+        return outputs
+
+    def _run_plan(
+        self, jobs: list[Job], outputs: list[JobResult], started: bool
+    ) -> bool:
+        sites = self.term2site({x.term_id for x in jobs})
+        plan = plan_jobs(jobs, sites, sweep=self.sweep_requests)
+
+        for job in plan.unresolved:
+            result = self._unresolved(job, sites.get(job.term_id))
+            self._checkpoint(result, retryable=False)
+            self._finish(result, outputs)
+
+        if not plan.requests:
+            return started
+
+        if not started:
+            self.start()
+
+        for request in plan.requests:
+            jobs = list(request.jobs)
+            if self.sweep_requests and len(jobs) > 1:
+                jobs = self._sweep(request, outputs)
+            else:
+                jobs = [x for x in jobs if self._claim(x)]
+
+            for i, job in enumerate(jobs):
+                lg.info(f"Job {len(outputs) + 1}: {job.fl_name}")
+                result = JobResult(job=job, ok=False, site_id=request.site_id)
+
+                try:
+                    result.output = self.run_job(job, request.site_id)
+                    result.ok = True
+
+                except Cancelled:
+                    lg.warning(f"Cancelled during {job.fl_name}")
+                    self._release(jobs[i:])
+                    self.cleanup()
+                    raise
+
+                except Exception as err:  # noqa: BLE001
+                    lg.error(f"Job {job.fl_name} failed: {err}")
+                    result.error = f"{type(err).__name__}: {err}"
+                    self.recover()
+
+                self._checkpoint(result)
+                self._finish(result, outputs)
+
+        return True
+
+    def _release(self, jobs: Iterable[Job]) -> None:
+        """Puts claimed jobs that didn't run back in the queue"""
+        if self.queue is None:
+            return
+
+        for job in jobs:
+            self.queue.release(self.queue.get(job).id)
+
+    def _claim(self, job: Job) -> bool:
+        if self.queue is None:
+            return True
+
+        try:
+            self.queue.start(job)
+        except LookupError:
+            lg.info(f"Job {job.fl_name} was taken by another worker")
+            return False
+
+        return True
+
+    def _sweep(self, request: VideoRequest, outputs: list[JobResult]) -> list[Job]:
+        """Runs a request through run_request, returns the jobs it didn't export"""
+        claimed = [x for x in request.jobs if self._claim(x)]
+        remaining = list(claimed)
+        if not claimed:
+            return remaining
+
+        lg.info(f"Sweeping {len(claimed)} jobs on {request.camera}")
+
+        try:
+            for job, output in self.run_request(replace(request, jobs=tuple(claimed))):
+                result = JobResult(
+                    job=job, ok=True, site_id=request.site_id, output=output
+                )
+                self._checkpoint(result)
+                self._finish(result, outputs)
+                remaining.remove(job)
+
+        except Cancelled:
+            self._release(remaining)
+            self.cleanup()
+            raise
+
+        except Exception as err:  # noqa: BLE001
+            lg.error(
+                f"Sweep of {request.camera} failed ({err}), "
+                f"exporting the other {len(remaining)} jobs one by one"
+            )
+            self.recover()
+
+        return remaining
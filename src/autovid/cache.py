@@ -0,0 +1,290 @@
+"""
+Content-addressed cache of exported frames
+
+Entries are keyed by camera and the minute-truncated time range VERINT loads
+(see verint.time_range), so every request that would type the same range into
+VERINT shares an entry. Images are stored once per SHA-256 under
+objects/ab/abcdef...jpg and indexed in SQLite next to them. Every hit re-hashes
+the image, a missing or corrupt one is dropped and counts as a miss.
+"""
+
+import hashlib
+import logging
+import os
+import shutil
+import sqlite3
+import tempfile
+from collections.abc import Iterable
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from pathlib import Path
+from threading import RLock
+
+from autovid.jobqueue import verify_image
+from autovid.verint import time_range
+from autovid.waits import SYSTEM_CLOCK, Clock
+
+lg = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    key TEXT PRIMARY KEY,
+    camera TEXT NOT NULL,
+    start TEXT NOT NULL,
+    end TEXT NOT NULL,
+    digest TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    created REAL NOT NULL,
+    accessed REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_entries_accessed ON entries (accessed);
+CREATE INDEX IF NOT EXISTS ix_entries_digest ON entries (digest);
+"""
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    corrupt: int = 0
+    evicted: int = 0
+
+
+def file_digest(path: Path | str) -> str:
+    with open(path, "rb") as fl:
+        return hashlib.file_digest(fl, "sha256").hexdigest()
+
+
+class ExportCache:
+    """
+    Keeps exported images so repeat requests never touch VERINT
+
+    Eviction runs after every put: entries older than max_age go first, then the
+    least recently used until the images fit in max_bytes.
+    """
+
+    def __init__(
+        self,
+        root: Path | str,
+        max_bytes: int | None = 5 * 1024**3,
+        max_age: timedelta | int | None = None,
+        clock: Clock = SYSTEM_CLOCK,
+    ) -> None:
+        """
+        Parameters
+        ----------
+
+        root: Path | str
+            Cache directory, holds index.db and the objects directory
+        max_bytes: int, optional
+            Total size of the stored images. None for no limit
+        max_age: timedelta | int, optional
+            How long (seconds if int) an entry is kept after its export. None for ever
+        clock: Clock, optional
+            Time source for export and last use times, overridable for tests
+        """
+        if isinstance(max_age, int):
+            max_age = timedelta(seconds=max_age)
+
+        self.root = Path(root)
+        self.objects = self.root / "objects"
+        self.objects.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.max_age: timedelta | None = max_age
+        self.clock = clock
+        self.stats = CacheStats()
+
+        self._lock = RLock()
+        self._db = sqlite3.connect(
+            str(self.root / "index.db"),
+            timeout=30,
+            isolation_level=None,
+            check_same_thread=False,
+        )
+        self._db.execute("PRAGMA busy_timeout = 30000")
+        self._db.executescript(_SCHEMA)
+
+    def close(self) -> None:
+        self._db.close()
+
+    def _execute(self, sql: str, params: Iterable = ()) -> list[tuple]:
+        with self._lock:
+            return self._db.execute(sql, tuple(params)).fetchall()
+
+    @staticmethod
+    def key(camera: str, event_dt: datetime, event_td_range: timedelta) -> str:
+        start, end = time_range(event_dt, event_td_range)
+        return f"{camera.strip().upper()}|{start:%Y-%m-%dT%H:%M}|{end:%Y-%m-%dT%H:%M}"
+
+    def _object(self, digest: str) -> Path:
+        return self.objects / digest[:2] / f"{digest}.jpg"
+
+    def __len__(self) -> int:
+        return self._execute("SELECT COUNT(*) FROM entries")[0][0]
+
+    def size(self) -> int:
+        """Bytes of images stored, each distinct image counted once"""
+        rows = self._execute(
+            "SELECT COALESCE(SUM(size), 0) FROM "
+            "(SELECT size FROM entries GROUP BY digest)"
+        )
+        return rows[0][0]
+
+    def get(
+        self, camera: str, event_dt: datetime, event_td_range: timedelta
+    ) -> Path | None:
+        """The cached image of an export, None on a miss"""
+        key = self.key(camera, event_dt, event_td_range)
+        rows = self._execute(
+            "SELECT digest, size, created FROM entries WHERE key = ?", (key,)
+        )
+        if not rows:
+            self.stats.misses += 1
+            return None
+
+        digest, size, created = rows[0]
+        path = self._object(digest)
+        now = self.clock.time()
+
+        if self.max_age is not None and now - created > self.max_age.total_seconds():
+            self._drop(key, digest)
+            self.stats.misses += 1
+            return None
+
+        if not self._intact(path, digest, size):
+            lg.warning(f"Cached image of {key} is missing or corrupt, dropping it")
+            self._drop(key, digest)
+            self.stats.corrupt += 1
+            self.stats.misses += 1
+            return None
+
+        self._execute("UPDATE entries SET accessed = ? WHERE key = ?", (now, key))
+        self.stats.hits += 1
+        return path
+
+    def fetch(
+        self,
+        camera: str,
+        event_dt: datetime,
+        event_td_range: timedelta,
+        dest: Path | str,
+    ) -> Path | None:
+        """Copies the cached image of an export to dest, None on a miss"""
+        if (path := self.get(camera, event_dt, event_td_range)) is None:
+            return None
+
+        dest = Path(dest)
+        shutil.copyfile(path, dest)
+        return dest
+
+    def put(
+        self,
+        camera: str,
+        event_dt: datetime,
+        event_td_range: timedelta,
+        image: Path | str,
+    ) -> Path:
+        """Stores an exported image, returns its path in the cache"""
+        if not verify_image(image):
+            raise FileNotFoundError(f"Not caching missing or empty image: {image}")
+
+        key = self.key(camera, event_dt, event_td_range)
+        start, end = time_range(event_dt, event_td_range)
+        digest = file_digest(image)
+        path = self._object(digest)
+
+        if not path.exists():
+            # Copied next to its final name first so a crash never leaves half a file
+            path.parent.mkdir(exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+            os.close(fd)
+            try:
+                shutil.copyfile(image, tmp)
+                os.replace(tmp, path)
+            except BaseException:
+                Path(tmp).unlink(missing_ok=True)
+                raise
+
+        now = self.clock.time()
+        with self._lock:
+            replaced = self._execute("SELECT digest FROM entries WHERE key = ?", (key,))
+            self._execute(
+                "INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    key,
+                    camera.strip().upper(),
+                    start.isoformat(),
+                    end.isoformat(),
+                    digest,
+                    path.stat().st_size,
+                    now,
+                    now,
+                ),
+            )
+            if replaced and replaced[0][0] != digest:
+                self._unlink_unused(replaced[0][0])
+
+        self.evict()
+        return path
+
+    @staticmethod
+    def _intact(path: Path, digest: str, size: int) -> bool:
+        try:
+            return path.stat().st_size == size and file_digest(path) == digest
+        except OSError:
+            return False
+
+    def _unlink_unused(self, digest: str) -> bool:
+        with self._lock:
+            if self._execute("SELECT 1 FROM entries WHERE digest = ?", (digest,)):
+                return False
+            self._object(digest).unlink(missing_ok=True)
+            return True
+
+    def _drop(self, key: str, digest: str) -> None:
+        with self._lock:
+            self._execute("DELETE FROM entries WHERE key = ?", (key,))
+            self._unlink_unused(digest)
+
+    def evict(self) -> int:
+        """Drops expired entries, then the least recently used ones over max_bytes"""
+        evicted = 0
+        with self._lock:
+            if self.max_age is not None:
+                cutoff = self.clock.time() - self.max_age.total_seconds()
+                for key, digest in self._execute(
+                    "SELECT key, digest FROM entries WHERE created < ?", (cutoff,)
+                ):
+                    self._drop(key, digest)
+                    evicted += 1
+
+            if self.max_bytes is not None:
+                total = self.size()
+                oldest = self._execute(
+                    "SELECT key, digest, size FROM entries ORDER BY accessed"
+                )
+                for key, digest, size in oldest:
+                    if total <= self.max_bytes:
+                        break
+
+                    self._execute("DELETE FROM entries WHERE key = ?", (key,))
+                    if self._unlink_unused(digest):
+                        total -= size
+                    evicted += 1
+
+        if evicted:
+            lg.info(f"Evicted {evicted} cached exports")
+        self.stats.evicted += evicted
+        return evicted
+
+    def verify(self) -> list[str]:
+        """Re-hashes every stored image, drops and returns the keys that failed"""
+        failed = []
+        for key, digest, size in self._execute("SELECT key, digest, size FROM entries"):
+            if not self._intact(self._object(digest), digest, size):
+                self._drop(key, digest)
+                failed.append(key)
+
+        if failed:
+            lg.warning(f"Dropped {len(failed)} missing or corrupt cached exports")
+        return failed
@@ -1,9 +1,24 @@
+from __future__ import annotations
+
 import logging
 import os
-import time
-from typing import Any, Callable
+import random
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from functools import wraps
+from threading import Lock
+from typing import TYPE_CHECKING, Any, overload
+
+from autovid.termindex import TermIndex
+from autovid.waits import SYSTEM_CLOCK, CancelToken, Clock, current_token, sleep
 
-import pandas as pd
+# pandas and SQLAlchemy take most of a second to import so they're only loaded
+# once a lookup actually runs, planning and reporting never pay for them
+if TYPE_CHECKING:
+    import pandas as pd
+    from sqlalchemy.engine import Engine
 
 lg = logging.getLogger(__name__)
 
@@ -25,54 +40,349 @@ class LocalConfig:
 
         return outvar
 
+    @property
+    def POOL_SIZE(self) -> int:
+        return int(os.getenv("AUTOVID_DB_POOL_SIZE", "5"))
+
 
-def term2site(term_str: str | list[str] | set[str]) -> str | None:
-    config = LocalConfig()
-    conn_string = config.CONN_STRING
+_engine: Engine | None = None
+_engine_lock = Lock()
 
-    # TODO: Come back to this later...
-    if isinstance(term_str, (list, set)):
-        raise ValueError("Haven't implemented this year... come back later.")
 
-    # TODO: VERINT only supports SQL Server + sqlite. No one uses sqllite but should abstract this to ORM models for more complex logic?
-    # TODO: Fix not safe code...
-    sql = """SELECT InUse, DvrCamera_ID, Dvr_ID, [Name], B.SiteName, B.LocationId, B.AddressStreet, B.AddressCity, B.PostalCode, B.AddressState, B.AddressCountry FROM DvrCameras as A LEFT JOIN Sites as B ON A.Dvr_ID = B.ID WHERE A.[Name] LIKE '%{}%';
-    """.format(term_str)
+def get_engine() -> Engine:
+    """
+    Returns the shared, lazily created engine for the VERINT database
 
-    try:
-        output: pd.DataFrame = pd.read_sql(sql, con=conn_string)
-    except Exception as err:
-        raise err
+    Connections are pooled and pre-pinged so a dropped ODBC connection is replaced
+    instead of failing the next lookup.
+    """
+    global _engine
+
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                from sqlalchemy import create_engine
+
+                config = LocalConfig()
+                _engine = create_engine(
+                    config.CONN_STRING,
+                    pool_size=config.POOL_SIZE,
+                    pool_pre_ping=True,
+                )
+
+    return _engine
+
+
+def dispose_engine() -> None:
+    global _engine
+
+    with _engine_lock:
+        if _engine is not None:
+            _engine.dispose()
+            _engine = None
+
+
+# SQL Server caps a statement at 2100 parameters, keep some headroom
+TERM_CHUNK_SIZE = 2000
+
+
+@dataclass(frozen=True)
+class Ambiguous:
+    """A terminal that matched more than one camera"""
+
+    term_id: str
+    cameras: tuple[str, ...]
+    sites: tuple[str | None, ...]
+
+
+def _clean_site(site: Any) -> str | None:
+    import pandas as pd
+
+    if site is None or pd.isna(site):
+        return None
 
-    match len(output):
+    return str(site).strip()
+
+
+def _pick_site(
+    term: str, found: list[tuple[str, str | None]]
+) -> str | None | Ambiguous:
+    # A camera named exactly like the terminal beats cameras that merely contain it
+    if len(found) > 1:
+        exact = [x for x in found if x[0].casefold() == term.casefold()]
+        found = exact if len(exact) == 1 else found
+
+    match len(found):
         case 0:
             return None
         case 1:
-            return str(output.to_dict(orient="records")[0]["SiteName"]).strip()
+            return found[0][1]
         case _:
-            raise ValueError(f"{term_str} return greater than 1 value... {output}")
+            return Ambiguous(
+                term_id=term,
+                cameras=tuple(x[0] for x in found),
+                sites=tuple(x[1] for x in found),
+            )
 
 
-# TODO: add wraps() later for retry
-def retry(max_retries: int = 3, wait_time: int = 5):
-    def decorator(func: Callable[[Any, Any], Any]) -> Any:
-        def wrapper(*args, **kwargs) -> Any:
-            retries = 0
-            if retries < max_retries:
+def _resolve_terms(
+    terms: list[str], con: Any, chunk_size: int | None = None
+) -> dict[str, str | None | Ambiguous]:
+    import pandas as pd
+
+    from autovid.schema import camera_site_query
+
+    chunk_size = chunk_size or TERM_CHUNK_SIZE
+    # Dedupe but keep the callers ordering
+    terms = list(dict.fromkeys(terms))
+    matches: dict[str, list[tuple[str, str | None]]] = {x: [] for x in terms}
+
+    for idx in range(0, len(terms), chunk_size):
+        chunk = terms[idx : idx + chunk_size]
+        output: pd.DataFrame = pd.read_sql(camera_site_query(chunk), con=con)
+
+        sites_by_name: dict[str, list[str | None]] = {}
+        for name, site in zip(output["Name"], output["SiteName"]):
+            sites_by_name.setdefault(str(name), []).append(_clean_site(site))
+
+        # Map the rows back to the terminal(s) they matched. Case insensitive like
+        # LIKE on the default SQL Server collation
+        index = TermIndex(sites_by_name)
+        for term in chunk:
+            for candidate in index.match(term, limit=None, fuzzy=False).candidates:
+                matches[term] += [
+                    (candidate.name, x) for x in sites_by_name[candidate.name]
+                ]
+
+    return {term: _pick_site(term, found) for term, found in matches.items()}
+
+
+@overload
+def term2site(term_str: str, con: Any = None) -> str | None: ...
+
+
+@overload
+def term2site(
+    term_str: list[str] | set[str], con: Any = None
+) -> dict[str, str | None | Ambiguous]: ...
+
+
+def term2site(
+    term_str: str | list[str] | set[str], con: Any = None
+) -> str | None | dict[str, str | None | Ambiguous]:
+    """
+    Converts terminal IDs to VERINT site names
+
+    A single terminal returns the site name (or None). A list/set of terminals is
+    resolved in chunked queries and returns a mapping of terminal to site name,
+    None when nothing matched, or Ambiguous when several cameras matched.
+    """
+    if con is None:
+        con = get_engine()
+
+    if isinstance(term_str, (list, set)):
+        return _resolve_terms(
+            sorted(term_str) if isinstance(term_str, set) else term_str, con
+        )
+
+    output = _resolve_terms([term_str], con)[term_str]
+    if isinstance(output, Ambiguous):
+        raise ValueError(
+            f"{term_str} return greater than 1 value... {list(output.cameras)}"
+        )
+
+    return output
+
+
+# Errors that won't go away by trying again
+FATAL_ERRORS: tuple[type[BaseException], ...] = (
+    FileNotFoundError,
+    ConnectionAbortedError,
+    NotImplementedError,
+)
+
+# Absolute clock.monotonic() deadline shared by every retry within a job
+_job_deadline: ContextVar[float | None] = ContextVar("job_deadline", default=None)
+
+
+@contextmanager
+def job_budget(seconds: float, clock: Clock = SYSTEM_CLOCK) -> Iterator[None]:
+    """Caps the total time retries may take for everything inside the block"""
+    token = _job_deadline.set(clock.monotonic() + seconds)
+    try:
+        yield
+    finally:
+        _job_deadline.reset(token)
+
+
+@dataclass
+class RetryStats:
+    calls: int = 0
+    attempts: int = 0
+    failures: int = 0
+    slept: float = 0.0
+    elapsed: float = 0.0
+
+    @property
+    def retries(self) -> int:
+        return self.attempts - self.calls
+
+    def add(self, **counts: float) -> None:
+        with _stats_lock:
+            for name, value in counts.items():
+                setattr(self, name, getattr(self, name) + value)
+
+
+# Attempt/latency counters per decorated function, keyed by qualified name. Worker
+# and daemon threads retry at the same time, so they're only updated under the lock
+retry_stats: dict[str, RetryStats] = {}
+_stats_lock = Lock()
+
+
+# Counters of the count_retries blocks the current thread (or task) is in
+_retry_scopes: ContextVar[tuple[list[int], ...]] = ContextVar(
+    "retry_scopes", default=()
+)
+
+
+@contextmanager
+def count_retries() -> Iterator[list[int]]:
+    """
+    Counts the retries made inside the block, in [0]
+
+    Only retries on the current thread (or asyncio task) count, including those
+    inside nested blocks, so concurrent workers don't leak into each other's counts.
+    """
+    counter = [0]
+    token = _retry_scopes.set((*_retry_scopes.get(), counter))
+    try:
+        yield counter
+    finally:
+        _retry_scopes.reset(token)
+
+
+class RetryPolicy:
+    """
+    Retries a callable with exponential backoff and jitter
+
+    Parameters
+    ----------
+
+    max_retries: int, optional
+        Total attempts, including the first one
+    wait_time: float, optional
+        Wait before the first retry
+    backoff: float, optional
+        Multiplier applied to the wait after each failed attempt
+    max_wait: float, optional
+        Upper bound of a single wait
+    jitter: float, optional
+        Randomizes each wait by +/- this fraction
+    budget: float, optional
+        Max seconds a single call may spend including retries
+    fatal: tuple[type[BaseException], ...], optional
+        Errors raised immediately without retrying
+
+    Attempts and waits stop with Cancelled once the CancelToken of the enclosing
+    waits.cancel_scope is cancelled, or for methods the `cancel` token of the
+    object they're bound to (e.g. VERINT.cancel).
+    """
+
+    def __init__(
+        self,
+        max_retries: int = 3,
+        wait_time: float = 5,
+        backoff: float = 2.0,
+        max_wait: float = 30,
+        jitter: float = 0.25,
+        budget: float | None = None,
+        fatal: tuple[type[BaseException], ...] = FATAL_ERRORS,
+        clock: Clock = SYSTEM_CLOCK,
+        rng: Callable[[], float] = random.random,
+    ) -> None:
+        self.max_retries = max_retries
+        self.wait_time = wait_time
+        self.backoff = backoff
+        self.max_wait = max_wait
+        self.jitter = jitter
+        self.budget = budget
+        self.fatal = fatal
+        self.clock = clock
+        self.rng = rng
+
+    def delay(self, attempt: int) -> float:
+        """Wait after the given (1 based) failed attempt"""
+        wait = min(self.max_wait, self.wait_time * self.backoff ** (attempt - 1))
+        return max(0.0, wait * (1 + self.jitter * (2 * self.rng() - 1)))
+
+    def _deadline(self, start: float) -> float | None:
+        deadlines = [] if (job := _job_deadline.get()) is None else [job]
+        if self.budget is not None:
+            deadlines.append(start + self.budget)
+
+        return min(deadlines) if deadlines else None
+
+    @staticmethod
+    def _token(args: tuple) -> CancelToken | None:
+        if token := current_token():
+            return token
+
+        token = getattr(args[0], "cancel", None) if args else None
+        return token if isinstance(token, CancelToken) else None
+
+    def call(self, func: Callable[..., Any], *args, **kwargs) -> Any:
+        name = getattr(func, "__qualname__", repr(func))
+        with _stats_lock:
+            stats = retry_stats.setdefault(name, RetryStats())
+        stats.add(calls=1)
+
+        start = self.clock.monotonic()
+        deadline = self._deadline(start)
+        token = self._token(args)
+        attempt = 0
+
+        try:
+            while True:
+                attempt += 1
+                stats.add(attempts=1)
                 try:
-                    result = func(*args, **kwargs)
-                    return result
+                    if token:
+                        token.check()
+                    return func(*args, **kwargs)
+                except self.fatal:
+                    stats.add(failures=1)
+                    raise
                 except Exception as err:
-                    retries += 1
-                    lg.warning(
-                        f"Retrying {func} in {wait_time} seconds due to error {err}"
-                    )
-                    time.sleep(wait_time)
-            else:
-                raise Exception(
-                    f"Max retries ({max_retries}) for function {func} exceeded."
-                )
+                    wait = self.delay(attempt)
+                    now = self.clock.monotonic()
+
+                    if attempt >= self.max_retries:
+                        lg.error(f"{name} failed after {attempt} attempts: {err}")
+                        stats.add(failures=1)
+                        raise
 
+                    if deadline is not None and now + wait > deadline:
+                        lg.error(f"{name} ran out of retry budget: {err}")
+                        stats.add(failures=1)
+                        raise
+
+                    lg.warning(f"Retrying {name} in {wait:.1f} seconds due to: {err}")
+                    sleep(wait, self.clock, token)
+                    stats.add(slept=wait)
+                    for counter in _retry_scopes.get():
+                        counter[0] += 1
+        finally:
+            stats.add(elapsed=self.clock.monotonic() - start)
+
+    def __call__(self, func: Callable[..., Any]) -> Any:
+        @wraps(func)
+        def wrapper(*args, **kwargs) -> Any:
+            return self.call(func, *args, **kwargs)
+
+        wrapper.retry_policy = self  # type: ignore[attr-defined]
         return wrapper
 
-    return decorator
+
+def retry(max_retries: int = 3, wait_time: float = 5, **kwargs) -> RetryPolicy:
+    """Decorator shorthand for RetryPolicy"""
+    return RetryPolicy(max_retries=max_retries, wait_time=wait_time, **kwargs)
@@ -0,0 +1,469 @@
+"""
+Keeps one logged-in VERINT session warm and serves exports over localhost HTTP
+
+A single thread owns the driver and runs requests one at a time in the order
+they came in. While idle it checks every health_every seconds that VERINT is
+still up and logged in, and logs back in (or restarts it) when it isn't, so a
+request only ever pays for the export itself.
+
+    POST /requests  {"term_id", "tran_dt", "lookback", "jira_id", "site_id", "wait"}
+    GET  /requests/<id>
+    GET  /health
+    POST /relogin
+
+Every reply is a JSON object, requests are returned as DaemonRequest.to_dict().
+"""
+
+import json
+import logging
+import queue
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import OrderedDict
+from collections.abc import Callable
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from itertools import count
+from pathlib import Path
+from typing import Any, Protocol
+
+from autovid.common import Ambiguous
+from autovid.jobs import Job
+from autovid.waits import SYSTEM_CLOCK, Cancelled, Clock
+from autovid.workers import Driver
+
+lg = logging.getLogger(__name__)
+
+DEFAULT_PORT = 8642
+
+
+class WarmDriver(Driver, Protocol):
+    """A Driver that can tell whether its session is still usable"""
+
+    def healthy(self) -> bool:
+        """Whether the app is up and logged in, without waiting"""
+        ...
+
+    def relogin(self) -> None:
+        """Logs back in, restarting the app if it's gone"""
+        ...
+
+
+@dataclass
+class DaemonRequest:
+    id: int
+    job: Job
+    site_id: str | None = None
+    state: str = "queued"  # queued, running, done or failed
+    output: Path | None = None
+    error: str | None = None
+    submitted: datetime = field(default_factory=datetime.now)
+    finished: datetime | None = None
+    _done: threading.Event = field(default_factory=threading.Event, repr=False)
+
+    def wait(self, timeout: float | None = None) -> bool:
+        return self._done.wait(timeout)
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "id": self.id,
+            "term_id": self.job.term_id,
+            "tran_dt": self.job.tran_dt.isoformat(),
+            "lookback": self.job.lookback.total_seconds(),
+            "jira_id": self.job.jira_id,
+            "site_id": self.site_id,
+            "state": self.state,
+            "output": str(self.output) if self.output else None,
+            "error": self.error,
+            "submitted": self.submitted.isoformat(),
+            "finished": self.finished.isoformat() if self.finished else None,
+        }
+
+
+def _default_resolve(driver: WarmDriver) -> Callable[[str], str | None]:
+    if getattr(driver, "directory", None) is not None:
+        return driver.term2site
+
+    from autovid.directory import CameraDirectory
+
+    return CameraDirectory().term2site
+
+
+class Daemon:
+    """
+    Serializes export requests onto one warm driver
+
+    Use start() and close(), or serve_forever() to block until interrupted.
+    """
+
+    def __init__(
+        self,
+        driver: WarmDriver,
+        host: str = "127.0.0.1",
+        port: int = DEFAULT_PORT,
+        health_every: float = 300,
+        resolve: Callable[[str], str | None | Ambiguous] | None = None,
+        history: int = 1000,
+        clock: Clock = SYSTEM_CLOCK,
+    ) -> None:
+        """
+        Parameters
+        ----------
+
+        driver: WarmDriver
+            Runs the exports, AutoVidBatch for a real VERINT desktop
+        host: str, optional
+            Interface the API listens on. Keep it on localhost, there's no auth
+        port: int, optional
+            API port, 0 picks a free one (see .port)
+        health_every: float, optional
+            Seconds between health checks while idle
+        resolve: Callable[[str], str | None], optional
+            Terminal -> site lookup for requests without a site_id. Defaults to the
+            driver's term2site, or an in-memory CameraDirectory so requests don't
+            each query the VERINT database
+        history: int, optional
+            Finished requests kept for GET /requests/<id>
+        """
+        self.driver = driver
+        self.health_every = health_every
+        self.resolve = resolve or _default_resolve(driver)
+        self.history = history
+        self.clock = clock
+
+        self.healthy = False
+        self.checked: float | None = None
+        self.relogins = 0
+        self.done = 0
+        self.failed = 0
+        self.running: DaemonRequest | None = None
+
+        self._ids = count(1)
+        self._lock = threading.Lock()
+        self._requests: OrderedDict[int, DaemonRequest] = OrderedDict()
+        self._queue: queue.Queue[DaemonRequest | None] = queue.Queue()
+        self._relogin = threading.Event()
+        self._stop = threading.Event()
+        self._started = clock.monotonic()
+        self._thread = threading.Thread(target=self._work, name="autovid-daemon")
+
+        self._server = _Server((host, port), self)
+        self.port: int = self._server.server_address[1]
+        self._server_thread = threading.Thread(
+            target=self._server.serve_forever, name="autovid-api", daemon=True
+        )
+
+    def start(self) -> None:
+        """Starts the driver, then the worker thread and the API"""
+        self.driver.start()
+        self.healthy = True
+        self.checked = self.clock.monotonic()
+        self._thread.start()
+        self._server_thread.start()
+        lg.info(f"AutoVid daemon listening on http://127.0.0.1:{self.port}")
+
+    def serve_forever(self) -> None:
+        self.start()
+        try:
+            while self._thread.is_alive():
+                self._thread.join(1)
+        except KeyboardInterrupt:
+            lg.info("Stopping the AutoVid daemon")
+        finally:
+            self.close()
+
+    def close(self, timeout: float = 30) -> None:
+        """Stops the API and the worker once the running request ends, closes the driver"""
+        self._stop.set()
+        # Abort a running export straight away if the driver supports it
+        if cancel := getattr(self.driver, "cancel", None):
+            cancel.cancel("AutoVid daemon stopped")
+        self._queue.put(None)
+
+        if self._server_thread.is_alive():
+            self._server.shutdown()
+        self._server.server_close()
+        if self._thread.is_alive():
+            self._thread.join(timeout)
+
+        with self._lock:
+            waiting = [x for x in self._requests.values() if x.state == "queued"]
+        for request in waiting:
+            self._finish(request, error="Daemon stopped")
+
+        self.driver.close()
+
+    def submit(self, job: Job, site_id: str | None = None) -> DaemonRequest:
+        """Queues a job, the site is looked up when it runs if not given"""
+        request = DaemonRequest(id=next(self._ids), job=job, site_id=site_id)
+        with self._lock:
+            self._requests[request.id] = request
+        self._queue.put(request)
+        return request
+
+    def get(self, request_id: int) -> DaemonRequest | None:
+        with self._lock:
+            return self._requests.get(request_id)
+
+    def request_relogin(self) -> None:
+        """Makes the worker log back in before the next request"""
+        self._relogin.set()
+        self._queue.put(None)  # Wake it up if idle
+
+    def health(self) -> dict[str, Any]:
+        running = self.running
+        now = self.clock.monotonic()
+        return {
+            "ok": self.healthy,
+            "since_check": None
+            if self.checked is None
+            else round(now - self.checked, 1),
+            "relogins": self.relogins,
+            "queued": self._queue.qsize(),
+            "running": running.id if running else None,
+            "done": self.done,
+            "failed": self.failed,
+            "uptime": round(now - self._started, 1),
+        }
+
+    def _check(self) -> None:
+        forced = self._relogin.is_set()
+        self._relogin.clear()
+        try:
+            self.healthy = not forced and self.driver.healthy()
+            if not self.healthy:
+                lg.warning("VERINT session is not usable, logging back in")
+                self.relogins += 1
+                self.driver.relogin()
+                self.healthy = self.driver.healthy()
+        except Cancelled:
+            raise
+        except Exception as err:  # noqa: BLE001
+            lg.error(f"Health check failed: {err}")
+            self.healthy = False
+
+        self.checked = self.clock.monotonic()
+
+    def _due(self) -> float:
+        """Seconds until the next health check"""
+        return self.checked + self.health_every - self.clock.monotonic()
+
+    def _work(self) -> None:
+        while True:
+            try:
+                request = self._queue.get(timeout=max(self._due(), 0))
+            except queue.Empty:
+                request = None
+
+            if self._stop.is_set():
+                return  # close() fails whatever is still queued
+
+            try:
+                if self._relogin.is_set() or not self.healthy or self._due() <= 0:
+                    self._check()
+                if request is not None:
+                    self._run(request)
+            except Cancelled:
+                if request is not None:
+                    self._finish(request, error="Cancelled")
+                self.driver.cleanup()
+                return
+
+    def _run(self, request: DaemonRequest) -> None:
+        job = request.job
+        request.state = "running"
+        self.running = request
+        try:
+            site_id = request.site_id or self.resolve(job.term_id)
+        except Exception as err:  # noqa: BLE001
+            site_id = None
+            lg.error(f"Site lookup of {job.term_id} failed: {err}")
+
+        if not site_id or isinstance(site_id, Ambiguous):
+            self.running = None
+            self._finish(
+                request, error=f"Could not return a valid site from: {job.term_id}"
+            )
+            return
+
+        request.site_id = site_id
+        try:
+            output = self.driver.run_job(job, site_id)
+        except (Cancelled, KeyboardInterrupt):
+            raise
+        except Exception as err:  # noqa: BLE001
+            lg.error(f"Request {request.id} ({job.fl_name}) failed: {err}")
+            self._finish(request, error=f"{type(err).__name__}: {err}")
+            try:
+                self.driver.recover()
+            except Cancelled:
+                raise
+            except Exception as err:  # noqa: BLE001
+                lg.error(f"Unable to recover VERINT: {err}")
+                self.healthy = False
+        else:
+            self._finish(request, output=output)
+        finally:
+            self.running = None
+
+    def _finish(
+        self,
+        request: DaemonRequest,
+        output: Path | None = None,
+        error: str | None = None,
+    ) -> None:
+        request.output = output
+        request.error = error
+        request.state = "failed" if error else "done"
+        request.finished = datetime.now()
+        if error:
+            self.failed += 1
+        else:
+            self.done += 1
+        request._done.set()
+
+        with self._lock:
+            finished = [k for k, v in self._requests.items() if v.finished]
+            for key in finished[: max(len(finished) - self.history, 0)]:
+                del self._requests[key]
+
+
+def _job(body: dict[str, Any]) -> Job:
+    try:
+        return Job(
+            term_id=str(body["term_id"]),
+            tran_dt=datetime.fromisoformat(body["tran_dt"]),
+            lookback=timedelta(seconds=float(body.get("lookback", 5))),
+            jira_id=body.get("jira_id"),
+        )
+    except KeyError as err:
+        raise ValueError(f"Missing field {err}") from None
+    except (TypeError, ValueError) as err:
+        raise ValueError(f"Invalid request: {err}") from None
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address: tuple[str, int], daemon: Daemon) -> None:
+        super().__init__(address, _Handler)
+        self.autovid = daemon
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server: _Server
+
+    @property
+    def daemon(self) -> Daemon:
+        return self.server.autovid
+
+    def log_message(self, format: str, *args) -> None:
+        lg.debug(f"{self.address_string()} {format % args}")
+
+    def _reply(self, status: HTTPStatus, body: dict[str, Any]) -> None:
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _body(self) -> dict[str, Any]:
+        length = int(self.headers.get("Content-Length") or 0)
+        body = json.loads(self.rfile.read(length) or b"{}")
+        if not isinstance(body, dict):
+            raise ValueError("Expected a JSON object")  # noqa: TRY004
+        return body
+
+    def do_GET(self) -> None:
+        if self.path == "/health":
+            self._reply(HTTPStatus.OK, self.daemon.health())
+            return
+
+        parts = self.path.strip("/").split("/")
+        if (
+            len(parts) == 2
+            and parts[0] == "requests"
+            and parts[1].isdigit()
+            and (request := self.daemon.get(int(parts[1])))
+        ):
+            self._reply(HTTPStatus.OK, request.to_dict())
+            return
+
+        self._reply(HTTPStatus.NOT_FOUND, {"error": f"Not found: {self.path}"})
+
+    def do_POST(self) -> None:
+        if self.path == "/relogin":
+            self.daemon.request_relogin()
+            self._reply(HTTPStatus.ACCEPTED, {"relogin": True})
+            return
+
+        if self.path != "/requests":
+            self._reply(HTTPStatus.NOT_FOUND, {"error": f"Not found: {self.path}"})
+            return
+
+        try:
+            body = self._body()
+            job = _job(body)
+            wait = float(body.get("wait") or 0)
+        except ValueError as err:
+            self._reply(HTTPStatus.BAD_REQUEST, {"error": str(err)})
+            return
+
+        request = self.daemon.submit(job, site_id=body.get("site_id"))
+        finished = request.wait(wait) if wait else False
+        status = HTTPStatus.OK if finished else HTTPStatus.ACCEPTED
+        self._reply(status, request.to_dict())
+
+
+def request_export(
+    term_id: str,
+    tran_dt: datetime,
+    lookback: timedelta | int = timedelta(seconds=5),
+    jira_id: str | None = None,
+    site_id: str | None = None,
+    port: int = DEFAULT_PORT,
+    timeout: float = 600,
+) -> Path:
+    """Asks a running daemon for an export and returns the image once it's saved"""
+    if isinstance(lookback, int):
+        lookback = timedelta(seconds=lookback)
+
+    url = f"http://127.0.0.1:{port}"
+    body = {
+        "term_id": term_id,
+        "tran_dt": tran_dt.isoformat(),
+        "lookback": lookback.total_seconds(),
+        "jira_id": jira_id,
+        "site_id": site_id,
+        "wait": timeout,
+    }
+    post = urllib.request.Request(
+        f"{url}/requests",
+        data=json.dumps(body).encode(),
+        headers={"Content-Type": "application/json"},
+        method="POST",
+    )
+    deadline = time.monotonic() + timeout
+    try:
+        with urllib.request.urlopen(post, timeout=timeout + 10) as response:
+            reply = json.load(response)
+
+        # The daemon stops waiting on our behalf after timeout, poll for the rest
+        while reply["state"] in ("queued", "running"):
+            if time.monotonic() >= deadline:
+                raise TimeoutError(f"Request {reply['id']} not done after {timeout}s")
+            time.sleep(1)
+            with urllib.request.urlopen(f"{url}/requests/{reply['id']}") as response:
+                reply = json.load(response)
+    except urllib.error.HTTPError as err:
+        raise ValueError(json.load(err).get("error", str(err))) from None
+
+    if reply["state"] != "done":
+        raise RuntimeError(f"Export of {term_id} failed: {reply['error']}")
+
+    return Path(reply["output"])
@@ -0,0 +1,262 @@
+from __future__ import annotations
+
+import logging
+import sqlite3
+from datetime import timedelta
+from pathlib import Path
+from threading import RLock
+from typing import TYPE_CHECKING, Any, overload
+
+from autovid.common import Ambiguous, _clean_site, _pick_site, get_engine
+from autovid.termindex import TermIndex, TermMatch
+from autovid.waits import SYSTEM_CLOCK, Clock
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+lg = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS cameras (
+    camera_id INTEGER PRIMARY KEY,
+    dvr_id INTEGER,
+    name TEXT NOT NULL,
+    name_folded TEXT NOT NULL,
+    site_name TEXT,
+    in_use INTEGER
+);
+CREATE INDEX IF NOT EXISTS ix_cameras_name ON cameras (name_folded);
+CREATE INDEX IF NOT EXISTS ix_cameras_site ON cameras (site_name COLLATE NOCASE);
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+"""
+
+_Row = tuple[int, int | None, str, str, str | None, int | None]
+
+
+class CameraDirectory:
+    """
+    Local snapshot of the VERINT DvrCameras + Sites join
+
+    Answers terminal -> site, site -> cameras and camera -> DVR lookups from an
+    indexed SQLite copy and terminal names through a TermIndex. The snapshot is
+    refreshed once it is older than the ttl and only changed rows are written.
+    Terminals missing from the snapshot fall back to the live database.
+    """
+
+    def __init__(
+        self,
+        con: Any = None,
+        path: Path | str | None = None,
+        ttl: timedelta | int = timedelta(hours=12),
+        clock: Clock = SYSTEM_CLOCK,
+    ) -> None:
+        """
+        Parameters
+        ----------
+
+        con: Any, optional
+            SQLAlchemy engine of the VERINT database. Defaults to get_engine()
+        path: Path | str, optional
+            Location of the on-disk snapshot. Kept in memory if not provided
+        ttl: timedelta | int, optional
+            Age (seconds if int) after which the snapshot is refreshed. A refresh
+            reads the whole DvrCameras + Sites join (one row per camera, the schema
+            has no modified time to filter on) and diffs it locally, so keep it
+            in hours
+        clock: Clock, optional
+            Time source for the snapshot age, overridable for tests
+        """
+        if isinstance(ttl, int):
+            ttl = timedelta(seconds=ttl)
+
+        self.con = con
+        self.ttl: timedelta = ttl
+        self.clock = clock
+
+        self._lock = RLock()
+        self._db = sqlite3.connect(
+            str(path) if path else ":memory:", check_same_thread=False
+        )
+        self._db.executescript(_SCHEMA)
+        self._index: TermIndex | None = None
+
+    def _source(self) -> Any:
+        if self.con is None:
+            self.con = get_engine()
+
+        return self.con
+
+    @property
+    def refreshed_at(self) -> float | None:
+        row = self._db.execute(
+            "SELECT value FROM meta WHERE key = 'refreshed_at'"
+        ).fetchone()
+
+        return float(row[0]) if row else None
+
+    def is_stale(self) -> bool:
+        refreshed_at = self.refreshed_at
+        if refreshed_at is None:
+            return True
+
+        return (self.clock.time() - refreshed_at) >= self.ttl.total_seconds()
+
+    @staticmethod
+    def _to_rows(output: pd.DataFrame) -> dict[int, _Row]:
+        import pandas as pd
+
+        rows: dict[int, _Row] = {}
+        for rec in output.to_dict(orient="records"):
+            in_use = rec["InUse"]
+            rows[int(rec["DvrCamera_ID"])] = (
+                int(rec["DvrCamera_ID"]),
+                None if pd.isna(rec["Dvr_ID"]) else int(rec["Dvr_ID"]),
+                str(rec["Name"]),
+                str(rec["Name"]).casefold(),
+                _clean_site(rec["SiteName"]),
+                None if pd.isna(in_use) else int(in_use),
+            )
+
+        return rows
+
+    def _upsert(self, rows: list[_Row]) -> None:
+        self._db.executemany(
+            "INSERT OR REPLACE INTO cameras VALUES (?, ?, ?, ?, ?, ?)", rows
+        )
+
+    def refresh(self, force: bool = False) -> tuple[int, int]:
+        """
+        Syncs the snapshot with the live database if it's stale (or forced)
+
+        Returns the number of (upserted, deleted) cameras
+        """
+        with self._lock:
+            if not force and not self.is_stale():
+                return (0, 0)
+
+            import pandas as pd
+
+            from autovid.schema import camera_site_select
+
+            lg.info("Refreshing the local camera directory")
+            remote = self._to_rows(
+                pd.read_sql(camera_site_select(), con=self._source())
+            )
+            local = {row[0]: row for row in self._db.execute("SELECT * FROM cameras")}
+
+            changed = [row for key, row in remote.items() if local.get(key) != row]
+            removed = [(key,) for key in local.keys() - remote.keys()]
+
+            with self._db:
+                self._index = None if (changed or removed) else self._index
+                self._upsert(changed)
+                self._db.executemany("DELETE FROM cameras WHERE camera_id = ?", removed)
+                self._db.execute(
+                    "INSERT OR REPLACE INTO meta VALUES ('refreshed_at', ?)",
+                    (str(self.clock.time()),),
+                )
+
+            lg.info(
+                f"Camera directory: {len(changed)} upserted, {len(removed)} deleted"
+            )
+            return (len(changed), len(removed))
+
+    @property
+    def index(self) -> TermIndex:
+        """Name index over the snapshot, rebuilt whenever the snapshot changes"""
+        with self._lock:
+            if self._index is None:
+                names = [x[0] for x in self._db.execute("SELECT name FROM cameras")]
+                self._index = TermIndex(names)
+
+            return self._index
+
+    def match(self, term: str, limit: int | None = 10) -> TermMatch:
+        """Ranked camera names for a terminal, including fuzzy alternatives"""
+        self.refresh()
+        return self.index.match(term, limit=limit)
+
+    def _lookup(self, term: str) -> list[tuple[str, str | None]]:
+        # Same semantics as the LIKE '%term%' query against the live database
+        names = [
+            x.name for x in self.index.match(term, limit=None, fuzzy=False).candidates
+        ]
+        if not names:
+            return []
+
+        return self._db.execute(
+            "SELECT name, site_name FROM cameras WHERE name IN "
+            f"({', '.join('?' * len(names))})",
+            names,
+        ).fetchall()
+
+    def _lookup_live(self, term: str) -> list[tuple[str, str | None]]:
+        import pandas as pd
+
+        from autovid.schema import camera_site_query
+
+        lg.debug(f"{term} not in camera directory, querying the live database")
+        rows = self._to_rows(pd.read_sql(camera_site_query([term]), con=self._source()))
+
+        with self._lock, self._db:
+            self._upsert(list(rows.values()))
+            self._index = None if rows else self._index
+
+        return [(row[2], row[4]) for row in rows.values()]
+
+    def _resolve(self, term: str) -> str | None | Ambiguous:
+        with self._lock:
+            self.refresh()
+            found = self._lookup(term)
+
+        if not found:
+            found = self._lookup_live(term)
+
+        return _pick_site(term, found)
+
+    @overload
+    def term2site(self, term_str: str) -> str | None: ...
+
+    @overload
+    def term2site(
+        self, term_str: list[str] | set[str]
+    ) -> dict[str, str | None | Ambiguous]: ...
+
+    def term2site(
+        self, term_str: str | list[str] | set[str]
+    ) -> str | None | dict[str, str | None | Ambiguous]:
+        """Same contract as common.term2site but served from the snapshot"""
+        if isinstance(term_str, (list, set)):
+            return {x: self._resolve(x) for x in dict.fromkeys(term_str)}
+
+        output = self._resolve(term_str)
+        if isinstance(output, Ambiguous):
+            raise ValueError(  # noqa: TRY004
+                f"{term_str} return greater than 1 value... {list(output.cameras)}"
+            )
+
+        return output
+
+    def site_cameras(self, site_name: str) -> list[str]:
+        with self._lock:
+            self.refresh()
+            found = self._db.execute(
+                "SELECT name FROM cameras WHERE site_name = ? COLLATE NOCASE "
+                "ORDER BY name",
+                (site_name.strip(),),
+            ).fetchall()
+
+        return [x[0] for x in found]
+
+    def camera_dvr(self, camera_name: str) -> int | None:
+        with self._lock:
+            self.refresh()
+            found = self._db.execute(
+                "SELECT dvr_id FROM cameras WHERE name_folded = ?",
+                (camera_name.casefold(),),
+            ).fetchone()
+
+        return found[0] if found else None
+
+    def close(self) -> None:
+        self._db.close()
@@ -0,0 +1,239 @@
+"""
+Progress events from the automation thread to the overlay and other sinks
+
+publish() never blocks: every subscriber has its own bounded queue and when a
+slow subscriber's queue is full its oldest event is dropped. The Tk overlay
+drains its queue from the mainloop with after(), other sinks (JSON lines file,
+localhost socket) are drained by a thread each.
+"""
+
+import json
+import logging
+import queue
+import socket
+import time
+from collections.abc import Callable
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from threading import Lock, Thread
+from typing import Any, ClassVar
+
+lg = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class Event:
+    kind: ClassVar[str] = "event"
+    ts: float = field(default_factory=time.time, kw_only=True)
+
+    def to_dict(self) -> dict[str, Any]:
+        return {"kind": self.kind, **asdict(self)}
+
+
+@dataclass(frozen=True)
+class Status(Event):
+    kind: ClassVar[str] = "status"
+    message: str
+
+
+@dataclass(frozen=True)
+class StepStarted(Event):
+    kind: ClassVar[str] = "step_started"
+    step: str
+    job: str | None = None
+
+
+@dataclass(frozen=True)
+class StepFinished(Event):
+    kind: ClassVar[str] = "step_finished"
+    step: str
+    job: str | None = None
+    ok: bool = True
+    duration: float = 0.0
+    error: str | None = None
+
+
+@dataclass(frozen=True)
+class Progress(Event):
+    kind: ClassVar[str] = "progress"
+    done: int
+    total: int
+    job: str | None = None
+
+    @property
+    def percent(self) -> float:
+        return 100 * self.done / self.total if self.total else 0.0
+
+
+@dataclass(frozen=True)
+class Error(Event):
+    kind: ClassVar[str] = "error"
+    message: str
+    step: str | None = None
+
+
+@dataclass(frozen=True)
+class Finished(Event):
+    kind: ClassVar[str] = "finished"
+    ok: bool = True
+
+
+class Subscription:
+    """Bounded queue of events for one subscriber"""
+
+    def __init__(self, maxsize: int = 1000) -> None:
+        self.queue: queue.Queue[Event | None] = queue.Queue(maxsize=maxsize)
+        self.dropped = 0
+
+    def put(self, event: Event | None) -> None:
+        while True:
+            try:
+                self.queue.put_nowait(event)
+                return
+            except queue.Full:
+                try:
+                    self.queue.get_nowait()
+                    self.dropped += 1
+                except queue.Empty:
+                    pass
+
+    def drain(self, limit: int | None = None) -> list[Event]:
+        """Events waiting in the queue, without blocking"""
+        events = []
+        while limit is None or len(events) < limit:
+            try:
+                event = self.queue.get_nowait()
+            except queue.Empty:
+                break
+            if event is not None:
+                events.append(event)
+
+        return events
+
+    def get(self, timeout: float | None = None) -> Event | None:
+        """Next event, None once the bus is closed or on timeout"""
+        try:
+            return self.queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+
+class EventBus:
+    def __init__(self) -> None:
+        self._lock = Lock()
+        self._subscriptions: list[Subscription] = []
+        self._threads: list[Thread] = []
+
+    def publish(self, event: Event) -> None:
+        with self._lock:
+            subscriptions = list(self._subscriptions)
+
+        for subscription in subscriptions:
+            subscription.put(event)
+
+    def subscribe(self, maxsize: int = 1000) -> Subscription:
+        subscription = Subscription(maxsize)
+        with self._lock:
+            self._subscriptions.append(subscription)
+
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        with self._lock:
+            if subscription in self._subscriptions:
+                self._subscriptions.remove(subscription)
+
+    def attach(self, sink: Callable[[Event], None], maxsize: int = 1000) -> Thread:
+        """Feeds every event to sink from a thread of its own"""
+        subscription = self.subscribe(maxsize)
+
+        def drain() -> None:
+            while (event := subscription.get()) is not None:
+                try:
+                    sink(event)
+                except Exception as err:  # noqa: BLE001
+                    lg.error(f"Event sink {sink!r} failed: {err}")
+
+            if close := getattr(sink, "close", None):
+                close()
+
+        thread = Thread(target=drain, name=f"events-{sink!r}", daemon=True)
+        thread.start()
+        with self._lock:
+            self._threads.append(thread)
+
+        return thread
+
+    def close(self, timeout: float = 5) -> None:
+        """Stops the subscriptions once their queued events are handled"""
+        with self._lock:
+            subscriptions, self._subscriptions = self._subscriptions, []
+            threads, self._threads = self._threads, []
+
+        for subscription in subscriptions:
+            subscription.put(None)
+        for thread in threads:
+            thread.join(timeout)
+
+
+class JsonlSink:
+    """Appends every event to a JSON lines file"""
+
+    def __init__(self, path: Path | str) -> None:
+        self.path = Path(path)
+        self._file = self.path.open("a", encoding="utf-8")
+
+    def __repr__(self) -> str:
+        return f"JsonlSink({str(self.path)!r})"
+
+    def __call__(self, event: Event) -> None:
+        self._file.write(json.dumps(event.to_dict()) + "\n")
+        self._file.flush()
+
+    def close(self) -> None:
+        self._file.close()
+
+
+class SocketSink:
+    """
+    Streams events as JSON lines to every client connected to a localhost port
+
+    port=0 picks a free port, see .port. Clients that disconnect are dropped.
+    """
+
+    def __init__(self, port: int = 0, host: str = "127.0.0.1") -> None:
+        self._server = socket.create_server((host, port))
+        self.port: int = self._server.getsockname()[1]
+        self._clients: list[socket.socket] = []
+        self._lock = Lock()
+        Thread(target=self._accept, name="events-socket", daemon=True).start()
+
+    def __repr__(self) -> str:
+        return f"SocketSink(port={self.port})"
+
+    def _accept(self) -> None:
+        while True:
+            try:
+                client, _ = self._server.accept()
+            except OSError:
+                return  # Closed
+
+            with self._lock:
+                self._clients.append(client)
+
+    def __call__(self, event: Event) -> None:
+        line = (json.dumps(event.to_dict()) + "\n").encode()
+        with self._lock:
+            for client in list(self._clients):
+                try:
+                    client.sendall(line)
+                except OSError:
+                    self._clients.remove(client)
+                    client.close()
+
+    def close(self) -> None:
+        self._server.close()
+        with self._lock:
+            for client in self._clients:
+                client.close()
+            self._clients.clear()
@@ -0,0 +1,317 @@
+"""
+Perceptual hashing, near-duplicate detection and thumbnails for exported frames
+
+Needs the frames extra (pip install autovid[frames]) for NumPy and Pillow.
+"""
+
+import json
+import logging
+import shutil
+from collections import deque
+from collections.abc import Callable, Iterable
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import asdict, dataclass
+from functools import cache
+from pathlib import Path
+from threading import Condition
+from typing import Any, Self
+
+try:
+    import numpy as np
+except ImportError as err:
+    raise ImportError(
+        "autovid.frames needs NumPy, install it with: pip install autovid[frames]"
+    ) from err
+
+lg = logging.getLogger(__name__)
+
+HASH_SIZE = 8  # 8x8 low frequencies -> 64 bit hash
+SAMPLE_SIZE = 32  # Images are shrunk to 32x32 grayscale before the DCT
+IMAGE_SUFFIXES = (".jpg", ".jpeg", ".png", ".bmp")
+
+
+def _pillow() -> Any:
+    try:
+        from PIL import Image
+    except ImportError as err:
+        raise ImportError(
+            "Reading images needs Pillow, install it with: pip install autovid[frames]"
+        ) from err
+
+    return Image
+
+
+def load_gray(path: Path | str, size: int = SAMPLE_SIZE) -> np.ndarray:
+    """Image as a size x size float32 grayscale array"""
+    Image = _pillow()
+    with Image.open(path) as img:
+        small = img.convert("L").resize((size, size), Image.Resampling.LANCZOS)
+        return np.asarray(small, dtype=np.float32)
+
+
+def make_thumbnail(
+    path: Path | str, thumb_dir: Path | str, size: tuple[int, int] = (320, 180)
+) -> Path:
+    Image = _pillow()
+    output = Path(thumb_dir) / f"{Path(path).stem}.jpg"
+    with Image.open(path) as img:
+        img.thumbnail(size)
+        img.convert("RGB").save(output, "JPEG", quality=80)
+
+    return output
+
+
+@cache
+def _dct_matrix(n: int) -> np.ndarray:
+    """Orthonormal DCT-II basis, so dct(x) == D @ x"""
+    k = np.arange(n)[:, None]
+    i = np.arange(n)[None, :]
+    matrix = np.cos(np.pi * (2 * i + 1) * k / (2 * n)) * np.sqrt(2 / n)
+    matrix[0] /= np.sqrt(2)
+    return matrix.astype(np.float32)
+
+
+def phash_batch(images: np.ndarray, hash_size: int = HASH_SIZE) -> np.ndarray:
+    """
+    64 bit perceptual hashes of a stack of N x S x S grayscale images
+
+    Each image goes through a 2D DCT, the top-left hash_size x hash_size low
+    frequencies are compared to their median and packed into a uint64.
+    """
+    images = np.asarray(images, dtype=np.float32)
+    if images.ndim == 2:
+        images = images[None]
+
+    dct = _dct_matrix(images.shape[-1])
+    coeffs = (dct @ images @ dct.T)[:, :hash_size, :hash_size]
+    coeffs = coeffs.reshape(len(images), -1)
+
+    bits = coeffs > np.median(coeffs, axis=1, keepdims=True)
+    weights = np.uint64(1) << np.arange(bits.shape[1] - 1, -1, -1, dtype=np.uint64)
+    return (bits.astype(np.uint64) * weights).sum(axis=1, dtype=np.uint64)
+
+
+def phash(image: np.ndarray) -> int:
+    return int(phash_batch(image)[0])
+
+
+_BYTE_BITS = np.array([x.bit_count() for x in range(256)], dtype=np.uint8)
+
+
+def _popcount_bytes(values: np.ndarray) -> np.ndarray:
+    """Set bits per uint64 through a per-byte table, for NumPy < 2.0"""
+    values = np.ascontiguousarray(values, dtype=np.uint64)
+    return _BYTE_BITS[values.view(np.uint8)].reshape(*values.shape, 8).sum(axis=-1)
+
+
+_popcount = getattr(np, "bitwise_count", _popcount_bytes)
+
+
+def hamming(hashes: np.ndarray, other: int) -> np.ndarray:
+    """Bit distance between every hash in hashes and other"""
+    return _popcount(np.asarray(hashes, dtype=np.uint64) ^ np.uint64(other))
+
+
+@dataclass
+class FrameRecord:
+    path: str
+    phash: str
+    duplicate_of: str | None = None
+    distance: int | None = None
+    thumbnail: str | None = None
+    error: str | None = None
+
+
+def analyze(
+    path: Path | str,
+    thumb_dir: Path | str | None = None,
+    loader: Callable[[Path | str], np.ndarray] = load_gray,
+) -> tuple[int, str | None]:
+    """Hashes one image and writes its thumbnail. Runs in the worker pool"""
+    value = phash(loader(path))
+    thumb = str(make_thumbnail(path, thumb_dir)) if thumb_dir else None
+    return value, thumb
+
+
+class FramePipeline:
+    """
+    Dedupes and thumbnails exported frames in the background
+
+    submit() hands a saved image to a thread (or process) pool and returns straight
+    away so the next UI job isn't held up. Each hash is compared against every
+    frame seen so far; frames within threshold bits of an earlier one are flagged
+    as its duplicate, and moved to outdir/duplicates if drop is set. Every frame
+    gets a line in the JSON lines manifest, and the last history of them are kept
+    in records.
+    """
+
+    def __init__(
+        self,
+        outdir: Path | str,
+        threshold: int = 6,
+        thumbnails: bool = True,
+        drop: bool = False,
+        workers: int = 2,
+        processes: bool = False,
+        manifest: Path | str | None = None,
+        loader: Callable[[Path | str], np.ndarray] = load_gray,
+        history: int | None = 10_000,
+    ) -> None:
+        """
+        Parameters
+        ----------
+
+        outdir: Path | str
+            Directory the frames are exported to
+        threshold: int, optional
+            Max Hamming distance (of 64 bits) for two frames to count as duplicates
+        thumbnails: bool, optional
+            Write thumbnails to outdir/thumbnails
+        drop: bool, optional
+            Move duplicates to outdir/duplicates instead of only flagging them
+        workers: int, optional
+            Pool size
+        processes: bool, optional
+            Use a process pool instead of threads
+        manifest: Path | str, optional
+            Defaults to outdir/autovid_frames.jsonl
+        loader: Callable, optional
+            Reads an image into a grayscale array, must be picklable for processes
+        history: int, optional
+            FrameRecords kept in records, None for all of them
+        """
+        self.outdir = Path(outdir)
+        self.threshold = threshold
+        self.drop = drop
+        self.loader = loader
+        self.manifest = Path(manifest or self.outdir / "autovid_frames.jsonl")
+        self.thumb_dir = self.outdir / "thumbnails" if thumbnails else None
+        if self.thumb_dir:
+            self.thumb_dir.mkdir(exist_ok=True)
+
+        pool = ProcessPoolExecutor if processes else ThreadPoolExecutor
+        self._pool: Executor = pool(max_workers=workers)
+        self._pending = 0
+        self._done = Condition()
+        self._paths: list[str] = []
+        self._recorded: set[str] = set()
+        # Hashes of the unique frames, in a buffer that doubles when it's full
+        self._buffer = np.empty(256, dtype=np.uint64)
+        self.records: deque[FrameRecord] = deque(maxlen=history)
+        self.count = 0
+        self.duplicates = 0
+
+        self._load_manifest()
+
+    def _load_manifest(self) -> None:
+        """Picks up hashes from an earlier run so reruns still dedupe across them"""
+        if not self.manifest.exists():
+            return
+
+        with self.manifest.open(encoding="utf-8") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+
+                record = FrameRecord(**json.loads(line))
+                self._recorded.add(record.path)
+                if record.error is None and record.duplicate_of is None:
+                    self._add(record.path, int(record.phash, 16))
+
+    @property
+    def _hashes(self) -> np.ndarray:
+        return self._buffer[: len(self._paths)]
+
+    def _add(self, path: str, value: int) -> None:
+        if len(self._paths) == len(self._buffer):
+            buffer = np.empty(2 * len(self._buffer), dtype=np.uint64)
+            buffer[: len(self._paths)] = self._buffer
+            self._buffer = buffer
+
+        self._buffer[len(self._paths)] = value
+        self._paths.append(path)
+
+    @property
+    def seen(self) -> set[str]:
+        return set(self._recorded)
+
+    def submit(self, path: Path | str) -> Future:
+        """Queues a saved frame, never blocks on the hashing"""
+        with self._done:
+            self._pending += 1
+
+        future = self._pool.submit(analyze, str(path), self.thumb_dir, self.loader)
+        future.add_done_callback(lambda x: self._record(str(path), x))
+        return future
+
+    def scan(self, paths: Iterable[Path] | None = None) -> int:
+        """Submits image files in outdir that aren't in the manifest yet"""
+        if paths is None:
+            paths = sorted(
+                x for x in self.outdir.iterdir() if x.suffix.lower() in IMAGE_SUFFIXES
+            )
+
+        seen = self.seen
+        new = [x for x in paths if str(x) not in seen]
+        for path in new:
+            self.submit(path)
+
+        return len(new)
+
+    def _record(self, path: str, future: Future) -> None:
+        with self._done:
+            try:
+                self._dedupe(path, future)
+            finally:
+                self._pending -= 1
+                self._done.notify_all()
+
+    def _dedupe(self, path: str, future: Future) -> None:
+        try:
+            value, thumb = future.result()
+        except Exception as err:  # noqa: BLE001
+            lg.error(f"Unable to hash {path}: {err}")
+            record = FrameRecord(path=path, phash="", error=str(err))
+        else:
+            record = FrameRecord(path=path, phash=f"{value:016x}", thumbnail=thumb)
+            if len(self._hashes):
+                distances = hamming(self._hashes, value)
+                nearest = int(distances.argmin())
+                if distances[nearest] <= self.threshold:
+                    record.duplicate_of = self._paths[nearest]
+                    record.distance = int(distances[nearest])
+
+            if record.duplicate_of is None:
+                self._add(path, value)
+            elif self.drop:
+                record.path = self._move_duplicate(path)
+
+        self.records.append(record)
+        self._recorded.add(record.path)
+        self.count += 1
+        self.duplicates += record.duplicate_of is not None
+        with self.manifest.open("a", encoding="utf-8") as f:
+            f.write(json.dumps(asdict(record)) + "\n")
+
+    def _move_duplicate(self, path: str) -> str:
+        target = self.outdir / "duplicates"
+        target.mkdir(exist_ok=True)
+        return str(shutil.move(path, target / Path(path).name))
+
+    def wait(self) -> list[FrameRecord]:
+        """Blocks until every submitted frame is recorded"""
+        with self._done:
+            self._done.wait_for(lambda: self._pending == 0)
+
+        return list(self.records)
+
+    def close(self) -> list[FrameRecord]:
+        records = self.wait()
+        self._pool.shutdown()
+        return records
+
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
@@ -0,0 +1,396 @@
+import logging
+import os
+import socket
+import sqlite3
+from collections.abc import Iterable, Mapping
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from enum import StrEnum
+from pathlib import Path
+from threading import RLock
+
+from autovid.jobs import Job
+from autovid.waits import SYSTEM_CLOCK, Clock
+
+lg = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY,
+    term_id TEXT NOT NULL,
+    tran_dt TEXT NOT NULL,
+    lookback REAL NOT NULL,
+    jira_id TEXT NOT NULL DEFAULT '',
+    state TEXT NOT NULL DEFAULT 'pending',
+    retries INTEGER NOT NULL DEFAULT 0,
+    site_id TEXT,
+    output TEXT,
+    error TEXT,
+    lease_owner TEXT,
+    lease_expires REAL,
+    updated REAL,
+    started REAL,
+    UNIQUE (term_id, tran_dt, lookback, jira_id)
+);
+CREATE INDEX IF NOT EXISTS ix_jobs_state ON jobs (state, lease_expires);
+CREATE TABLE IF NOT EXISTS workers (
+    owner TEXT PRIMARY KEY,
+    last_seen REAL NOT NULL,
+    job_id INTEGER,
+    done INTEGER NOT NULL DEFAULT 0,
+    failed INTEGER NOT NULL DEFAULT 0
+);
+"""
+
+
+class JobState(StrEnum):
+    PENDING = "pending"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+
+
+@dataclass(frozen=True)
+class QueuedJob:
+    id: int
+    job: Job
+    state: JobState
+    retries: int
+    site_id: str | None = None
+    output: Path | None = None
+    error: str | None = None
+    lease_owner: str | None = None
+    started: datetime | None = None
+    finished: datetime | None = None
+
+
+@dataclass(frozen=True)
+class WorkerInfo:
+    owner: str
+    last_seen: float
+    job_id: int | None
+    done: int
+    failed: int
+
+
+def default_owner() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def verify_image(path: Path | str | None) -> bool:
+    """True if the exported image exists on disk and isn't empty"""
+    return bool(path) and Path(path).is_file() and Path(path).stat().st_size > 0
+
+
+class JobQueue:
+    """
+    Crash safe SQLite queue of export jobs
+
+    Jobs move pending -> running -> done, or back to pending on a retryable failure
+    until max_retries is reached and they are marked failed. A running job holds a
+    lease, if its worker dies the lease expires and the job is handed out again.
+    Enqueueing is idempotent so a crashed batch can simply be enqueued and resumed.
+    """
+
+    def __init__(
+        self,
+        path: Path | str,
+        lease: timedelta | int = timedelta(minutes=10),
+        max_retries: int = 3,
+        clock: Clock = SYSTEM_CLOCK,
+    ) -> None:
+        """
+        Parameters
+        ----------
+
+        path: Path | str
+            Location of the SQLite file, can be on a share for multiple workers
+        lease: timedelta | int, optional
+            How long (seconds if int) a running job is reserved for its worker
+        max_retries: int, optional
+            Attempts per job before it's marked failed
+        clock: Clock, optional
+            Time source for claim, lease and finish times, overridable for tests
+        """
+        if isinstance(lease, int):
+            lease = timedelta(seconds=lease)
+
+        self.path = Path(path)
+        self.lease: timedelta = lease
+        self.max_retries = max_retries
+        self.clock = clock
+
+        self._lock = RLock()
+        self._db = sqlite3.connect(
+            str(self.path), timeout=30, isolation_level=None, check_same_thread=False
+        )
+        self._db.execute("PRAGMA busy_timeout = 30000")
+        self._db.executescript(_SCHEMA)
+        columns = {x[1] for x in self._db.execute("PRAGMA table_info(jobs)")}
+        if "started" not in columns:
+            # Queue files from before claims were timed
+            self._db.execute("ALTER TABLE jobs ADD COLUMN started REAL")
+
+    def close(self) -> None:
+        self._db.close()
+
+    def _transaction(self, sql: str, params: Iterable = ()) -> list[tuple]:
+        # BEGIN IMMEDIATE takes the write lock up front so two workers can't claim
+        # the same job between the SELECT and the UPDATE
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                cursor = self._db.execute(sql, tuple(params))
+                rows = cursor.fetchall()
+                self._db.execute("COMMIT")
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+
+        return rows
+
+    @staticmethod
+    def _key(job: Job) -> tuple[str, str, float, str]:
+        return (
+            job.term_id,
+            job.tran_dt.isoformat(),
+            job.lookback.total_seconds(),
+            job.jira_id or "",
+        )
+
+    @staticmethod
+    def _to_queued(row: tuple) -> QueuedJob:
+        (idx, term_id, tran_dt, lookback, jira_id, state, retries, site_id) = row[:8]
+        (output, error, lease_owner) = row[8:11]
+        # Done and failed rows aren't updated again, so updated is when they finished
+        finished = row[12] if state in (JobState.DONE, JobState.FAILED) else None
+        started = row[13]
+        return QueuedJob(
+            id=idx,
+            job=Job(
+                term_id=term_id,
+                tran_dt=datetime.fromisoformat(tran_dt),
+                lookback=timedelta(seconds=lookback),
+                jira_id=jira_id or None,
+            ),
+            state=JobState(state),
+            retries=retries,
+            site_id=site_id,
+            output=Path(output) if output else None,
+            error=error,
+            lease_owner=lease_owner,
+            started=datetime.fromtimestamp(started) if started else None,
+            finished=datetime.fromtimestamp(finished) if finished else None,
+        )
+
+    def enqueue(
+        self, jobs: Iterable[Job], sites: Mapping[str, str | None] | None = None
+    ) -> int:
+        """
+        Adds jobs that aren't queued yet, returns how many were new
+
+        sites (term_id -> site_id) lets workers skip the DB lookup and claim jobs
+        on the site they already have loaded
+        """
+        sites = sites or {}
+        keys = [self._key(x) for x in jobs]
+        with self._lock:
+            before = self._db.total_changes
+            self._db.execute("BEGIN IMMEDIATE")
+            self._db.executemany(
+                "INSERT OR IGNORE INTO jobs (term_id, tran_dt, lookback, jira_id, "
+                "site_id, updated) VALUES (?, ?, ?, ?, ?, ?)",
+                [(*x, sites.get(x[0]), self.clock.time()) for x in keys],
+            )
+            self._db.execute("COMMIT")
+            added = self._db.total_changes - before
+
+        lg.info(f"Queued {added} new jobs ({len(keys) - added} already queued)")
+        return added
+
+    def get(self, job: Job) -> QueuedJob | None:
+        row = self._db.execute(
+            "SELECT * FROM jobs WHERE term_id = ? AND tran_dt = ? AND lookback = ? "
+            "AND jira_id = ?",
+            self._key(job),
+        ).fetchone()
+
+        return self._to_queued(row) if row else None
+
+    def jobs(self, state: JobState | None = None) -> list[QueuedJob]:
+        if state is None:
+            rows = self._db.execute("SELECT * FROM jobs ORDER BY id").fetchall()
+        else:
+            rows = self._db.execute(
+                "SELECT * FROM jobs WHERE state = ? ORDER BY id", (state,)
+            ).fetchall()
+
+        return [self._to_queued(x) for x in rows]
+
+    def counts(self) -> dict[str, int]:
+        found = dict(
+            self._db.execute("SELECT state, count(*) FROM jobs GROUP BY state")
+        )
+        return {x.value: found.get(x.value, 0) for x in JobState}
+
+    def resume(self) -> int:
+        """
+        Hands jobs whose lease expired (crashed worker) back out as pending
+
+        Done jobs are never touched so a rerun skips finished work
+        """
+        rows = self._transaction(
+            "UPDATE jobs SET state = 'pending', lease_owner = NULL, "
+            "lease_expires = NULL, updated = ? "
+            "WHERE state = 'running' AND lease_expires <= ? RETURNING id",
+            (self.clock.time(), self.clock.time()),
+        )
+        if rows:
+            lg.warning(f"Reclaimed {len(rows)} jobs stuck in running")
+
+        return len(rows)
+
+    def claim(
+        self,
+        owner: str | None = None,
+        limit: int = 1,
+        site_id: str | None = None,
+        camera: str | None = None,
+    ) -> list[QueuedJob]:
+        """
+        Leases up to limit pending jobs to owner
+
+        Jobs whose lease expired are stolen back from their dead worker. Jobs on
+        site_id/camera come first so a worker keeps the site it has loaded.
+        """
+        now = self.clock.time()
+        owner = owner or default_owner()
+        rows = self._transaction(
+            "UPDATE jobs SET state = 'running', lease_owner = ?, lease_expires = ?, "
+            "updated = ?, started = ? WHERE id IN (SELECT id FROM jobs WHERE state = 'pending' "
+            "OR (state = 'running' AND lease_expires <= ?) "
+            "ORDER BY site_id IS ? DESC, term_id IS ? DESC, site_id, term_id, "
+            "tran_dt LIMIT ?) RETURNING *",
+            (
+                owner,
+                now + self.lease.total_seconds(),
+                now,
+                now,
+                now,
+                site_id,
+                camera,
+                limit,
+            ),
+        )
+
+        claimed = sorted((self._to_queued(x) for x in rows), key=lambda x: x.id)
+        self.checkin(owner, claimed[0].id if claimed else None)
+        return claimed
+
+    def start(self, job: Job, owner: str | None = None) -> QueuedJob:
+        """Leases a specific pending job, e.g. when running jobs in a planned order"""
+        now = self.clock.time()
+        rows = self._transaction(
+            "UPDATE jobs SET state = 'running', lease_owner = ?, lease_expires = ?, "
+            "updated = ?, started = ? WHERE term_id = ? AND tran_dt = ? AND lookback = ? "
+            "AND jira_id = ? AND (state = 'pending' OR (state = 'running' "
+            "AND lease_expires <= ?)) RETURNING *",
+            (
+                owner or default_owner(),
+                now + self.lease.total_seconds(),
+                now,
+                now,
+                *self._key(job),
+                now,
+            ),
+        )
+        if not rows:
+            raise LookupError(f"{job.fl_name} is not pending in the queue")
+
+        return self._to_queued(rows[0])
+
+    def heartbeat(self, job_id: int, owner: str | None = None) -> bool:
+        """Extends the lease of a running job, False if it was lost to another worker"""
+        now = self.clock.time()
+        rows = self._transaction(
+            "UPDATE jobs SET lease_expires = ?, updated = ? WHERE id = ? "
+            "AND state = 'running' AND lease_owner = ? RETURNING id",
+            (now + self.lease.total_seconds(), now, job_id, owner or default_owner()),
+        )
+        self.checkin(owner or default_owner(), job_id if rows else None)
+        return bool(rows)
+
+    def checkin(
+        self, owner: str, job_id: int | None = None, done: int = 0, failed: int = 0
+    ) -> None:
+        """Records that a worker is alive and what it's working on"""
+        self._transaction(
+            "INSERT INTO workers (owner, last_seen, job_id, done, failed) "
+            "VALUES (?, ?, ?, ?, ?) ON CONFLICT (owner) DO UPDATE SET "
+            "last_seen = excluded.last_seen, job_id = excluded.job_id, "
+            "done = done + excluded.done, failed = failed + excluded.failed",
+            (owner, self.clock.time(), job_id, done, failed),
+        )
+
+    def workers(self) -> list[WorkerInfo]:
+        rows = self._db.execute("SELECT * FROM workers ORDER BY owner").fetchall()
+        return [WorkerInfo(*x) for x in rows]
+
+    def unfinished(self) -> int:
+        """Jobs still pending or running"""
+        return self._db.execute(
+            "SELECT count(*) FROM jobs WHERE state IN ('pending', 'running')"
+        ).fetchone()[0]
+
+    def complete(
+        self,
+        job_id: int,
+        output: Path | str,
+        site_id: str | None = None,
+        owner: str | None = None,
+    ) -> bool:
+        """
+        Checkpoints a job as done. The image must already be on disk
+
+        False if owner no longer holds the job's lease, e.g. it expired and
+        another worker claimed the job, which is then left as it is.
+        """
+        if not verify_image(output):
+            raise FileNotFoundError(f"Exported image is missing or empty: {output}")
+
+        rows = self._transaction(
+            "UPDATE jobs SET state = 'done', output = ?, error = NULL, "
+            "site_id = COALESCE(?, site_id), lease_owner = NULL, "
+            "lease_expires = NULL, updated = ? WHERE id = ? AND state = 'running' "
+            "AND lease_owner = ? RETURNING id",
+            (str(output), site_id, self.clock.time(), job_id, owner or default_owner()),
+        )
+        return bool(rows)
+
+    def release(self, job_id: int) -> bool:
+        """Hands a running job back to pending without using up a retry"""
+        rows = self._transaction(
+            "UPDATE jobs SET state = 'pending', lease_owner = NULL, "
+            "lease_expires = NULL, updated = ? WHERE id = ? AND state = 'running' "
+            "RETURNING id",
+            (self.clock.time(), job_id),
+        )
+        return bool(rows)
+
+    def fail(
+        self,
+        job_id: int,
+        error: str,
+        retryable: bool = True,
+        site_id: str | None = None,
+    ) -> JobState:
+        """Records a failure, the job goes back to pending until it's out of retries"""
+        rows = self._transaction(
+            "UPDATE jobs SET retries = retries + 1, error = ?, "
+            "site_id = COALESCE(?, site_id), "
+            "state = CASE WHEN ? AND retries + 1 < ? THEN 'pending' ELSE 'failed' END, "
+            "lease_owner = NULL, lease_expires = NULL, updated = ? WHERE id = ? "
+            "RETURNING state",
+            (error, site_id, retryable, self.max_retries, self.clock.time(), job_id),
+        )
+        return JobState(rows[0][0])
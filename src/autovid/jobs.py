@@ -0,0 +1,141 @@
+from __future__ import annotations
+
+import csv
+import logging
+import re
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, ClassVar
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+lg = logging.getLogger(__name__)
+
+# Accepted spreadsheet headers for each Job field
+_COLUMNS = {
+    "term_id": ("term_id", "terminal", "term"),
+    "tran_dt": ("tran_dt", "datetime", "dt"),
+    "lookback": ("lookback_buffer", "buffer", "lookback"),
+    "jira_id": ("jira_id", "jira"),
+}
+
+_UNSAFE_CHARS = re.compile(r"[^\w.-]+")
+
+
+@dataclass(frozen=True)
+class Job:
+    """A single terminal/time export request"""
+
+    term_id: str
+    tran_dt: datetime
+    lookback: timedelta = timedelta(seconds=5)
+    jira_id: str | None = None
+
+    @property
+    def fl_name(self) -> str:
+        """Deterministic image name (without extension) for the job"""
+        parts = [self.jira_id, self.term_id, self.tran_dt.strftime("%Y%m%d_%H%M%S")]
+        return "_".join(_UNSAFE_CHARS.sub("-", str(x)) for x in parts if x)
+
+
+@dataclass
+class JobResult:
+    job: Job
+    ok: bool
+    site_id: str | None = None
+    output: Path | None = None
+    error: str | None = None
+    started: datetime = field(default_factory=datetime.now)
+    finished: datetime | None = None
+    # Seconds per traced step, for report.ResultsWriter. Not part of the CSV row
+    steps: dict[str, float] = field(default_factory=dict)
+
+    def to_row(self) -> dict[str, Any]:
+        return {
+            "term_id": self.job.term_id,
+            "tran_dt": self.job.tran_dt.isoformat(),
+            "lookback": self.job.lookback.total_seconds(),
+            "jira_id": self.job.jira_id or "",
+            "site_id": self.site_id or "",
+            "status": "ok" if self.ok else "failed",
+            "output": str(self.output or ""),
+            "error": self.error or "",
+            "started": self.started.isoformat(),
+            "finished": self.finished.isoformat() if self.finished else "",
+        }
+
+
+def _pick_column(df: pd.DataFrame, name: str) -> str | None:
+    lowered = {str(x).strip().lower(): x for x in df.columns}
+    for alias in _COLUMNS[name]:
+        if alias in lowered:
+            return lowered[alias]
+
+    return None
+
+
+def load_jobs(path: Path | str, default_lookback: int = 5) -> list[Job]:
+    """
+    Reads jobs from a CSV or Excel file
+
+    Expects terminal and datetime columns, buffer (seconds) and jira_id are optional.
+    """
+    import pandas as pd
+
+    path = Path(path)
+    if not path.exists():
+        raise FileNotFoundError(f"Job file does not exist: {path}")
+
+    if path.suffix.lower() in (".xlsx", ".xlsm", ".xls"):
+        df = pd.read_excel(path, dtype=object)
+    else:
+        df = pd.read_csv(path, dtype=object)
+
+    cols = {x: _pick_column(df, x) for x in _COLUMNS}
+    if not cols["term_id"] or not cols["tran_dt"]:
+        raise ValueError(
+            f"{path} needs terminal and datetime columns, found: {list(df.columns)}"
+        )
+
+    jobs = []
+    for row in df.to_dict(orient="records"):
+        if pd.isna(row[cols["term_id"]]):
+            continue
+
+        lookback = row[cols["lookback"]] if cols["lookback"] else None
+        jira_id = row[cols["jira_id"]] if cols["jira_id"] else None
+
+        jobs.append(
+            Job(
+                term_id=str(row[cols["term_id"]]).strip(),
+                tran_dt=pd.to_datetime(row[cols["tran_dt"]]).to_pydatetime(),
+                lookback=timedelta(
+                    seconds=default_lookback if pd.isna(lookback) else int(lookback)
+                ),
+                jira_id=None if pd.isna(jira_id) else str(jira_id).strip(),
+            )
+        )
+
+    lg.info(f"Loaded {len(jobs)} jobs from {path}")
+    return jobs
+
+
+class ResultsCSV:
+    """Appends one row per finished job, flushed immediately"""
+
+    fields: ClassVar[list[str]] = list(
+        JobResult(job=Job("", datetime.min), ok=False).to_row()
+    )
+
+    def __init__(self, path: Path | str) -> None:
+        self.path = Path(path)
+
+    def append(self, result: JobResult) -> None:
+        new_file = not self.path.exists() or self.path.stat().st_size == 0
+        with self.path.open("a", newline="", encoding="utf-8") as f:
+            writer = csv.DictWriter(f, fieldnames=self.fields)
+            if new_file:
+                writer.writeheader()
+            writer.writerow(result.to_row())
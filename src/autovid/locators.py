@@ -0,0 +1,318 @@
+import logging
+import re
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass
+from functools import cache
+from threading import RLock
+from typing import Any
+
+from autovid.snapshot import CachedElement
+
+lg = logging.getLogger(__name__)
+
+
+def runtime_id(element: Any) -> Any:
+    """UIA runtime ID of a wrapper. Raises if the element no longer exists"""
+    return tuple(element.element_info.runtime_id)
+
+
+class LocatorCache:
+    """
+    Memoizes resolved UI wrappers by logical name
+
+    A cached wrapper is validated with a single runtime ID lookup before it's reused.
+    If the element was destroyed (or its ID changed) the entry is stale and the
+    wrapper is resolved again from the tree.
+    """
+
+    def __init__(self, validate: Callable[[Any], Any] = runtime_id) -> None:
+        self.validate = validate
+        self.hits = 0
+        self.misses = 0
+        self.stale = 0
+
+        self._entries: dict[str, tuple[Any, Any]] = {}
+        self._lock = RLock()
+
+    def _is_valid(self, element: Any, token: Any) -> bool:
+        try:
+            return self.validate(element) == token
+        except Exception:  # noqa: BLE001
+            return False
+
+    def get(self, name: str, resolve: Callable[[], Any]) -> Any:
+        with self._lock:
+            if name in self._entries:
+                element, token = self._entries[name]
+                if self._is_valid(element, token):
+                    self.hits += 1
+                    return element
+
+                lg.debug(f"Locator {name} went stale, resolving it again")
+                self.stale += 1
+                del self._entries[name]
+
+            self.misses += 1
+            element = resolve()
+
+            try:
+                self._entries[name] = (element, self.validate(element))
+            except Exception:  # noqa: BLE001
+                lg.debug(f"Locator {name} has no runtime ID, not caching it")
+
+            return element
+
+    def put(self, name: str, element: Any, token: Any) -> None:
+        """Caches an element whose runtime ID is already known, e.g. from a snapshot"""
+        with self._lock:
+            self._entries[name] = (element, token)
+
+    def invalidate(self, name: str | None = None) -> None:
+        with self._lock:
+            if name is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(name, None)
+
+    @property
+    def stats(self) -> dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses, "stale": self.stale}
+
+
+@dataclass(frozen=True)
+class Step:
+    """One children(class_name=..., title=...)[index] hop. index None returns all"""
+
+    class_name: str | None = None
+    title: str | None = None
+    index: int | None = 0
+
+    def __str__(self) -> str:
+        title = f"{{{self.title}}}" if self.title is not None else ""
+        index = "*" if self.index is None else self.index
+        return f"{self.class_name or '*'}{title}[{index}]"
+
+    def apply(self, element: Any) -> Any:
+        criteria = {}
+        if self.class_name:
+            criteria["class_name"] = self.class_name
+        if self.title is not None:
+            criteria["title"] = self.title
+
+        found = element.children(**criteria)
+        if self.index is None:
+            return found
+
+        try:
+            return found[self.index]
+        except IndexError:
+            raise IndexError(f"Found {len(found)} matches for {self}") from None
+
+
+_STEP_RE = re.compile(
+    r"^(?P<cls>\*|[\w.]+)(?:\{(?P<title>[^}]*)\})?(?:\[(?P<idx>-?\d+|\*)\])?$"
+)
+
+
+@cache
+def parse_path(path: str) -> tuple[Step, ...]:
+    """
+    Parses "ClassName{Title}[index] > ..." into Steps
+
+    "*" matches any class, the title and index are optional and the index defaults to
+    0. "[*]" returns every match and is only allowed on the last step.
+    """
+    steps = []
+    for part in (x.strip() for x in path.split(">")):
+        if not (found := _STEP_RE.match(part)):
+            raise ValueError(f"Invalid locator step {part!r} in {path!r}")
+
+        idx = found["idx"]
+        steps.append(
+            Step(
+                class_name=None if found["cls"] == "*" else found["cls"],
+                title=found["title"],
+                index=None if idx == "*" else int(idx or 0),
+            )
+        )
+
+    if any(x.index is None for x in steps[:-1]):
+        raise ValueError(f"[*] is only allowed on the last step of {path!r}")
+
+    return tuple(steps)
+
+
+# name -> (parent name or None for the root window, path relative to the parent)
+LocatorSpec = dict[str, tuple[str | None, str]]
+
+
+class LocatorEngine:
+    """
+    Compiles a LocatorSpec into cached traversals
+
+    Every named locator and every path prefix shared by more than one locator is a
+    cache point. A lookup walks back to the closest cached, still valid, ancestor and
+    only applies the remaining steps from there.
+
+    With a snapshot function (a backend's snapshot), prefetch() serves every lookup
+    in a subtree from one bulk request instead.
+    """
+
+    def __init__(
+        self,
+        spec: LocatorSpec,
+        root: Callable[[], Any],
+        cache: LocatorCache | None = None,
+        snapshot: Callable[[Any], Any] | None = None,
+    ) -> None:
+        self.spec = spec
+        self.root = root
+        self.cache = cache if cache is not None else LocatorCache()
+        self.snapshot = snapshot
+
+        # Cache key of a prefetched locator -> its snapshot, None until first used
+        self._prefetched: dict[str, Any] = {}
+
+        self.paths: dict[str, tuple[Step, ...]] = {}
+        for name in spec:
+            self.paths[name] = self._expand(name, ())
+
+        self._plans = self._compile()
+
+    def _expand(self, name: str, seen: tuple[str, ...]) -> tuple[Step, ...]:
+        if name in seen:
+            raise ValueError(f"Locator cycle: {' -> '.join((*seen, name))}")
+        if name not in self.spec:
+            raise KeyError(f"Unknown locator {name!r}")
+
+        parent, path = self.spec[name]
+        prefix = self._expand(parent, (*seen, name)) if parent else ()
+        if prefix and prefix[-1].index is None:
+            raise ValueError(f"{name} can't descend from the [*] locator {parent}")
+
+        return prefix + parse_path(path)
+
+    def _compile(self) -> dict[str, list[tuple[str | None, tuple[Step, ...]]]]:
+        keys: dict[tuple[Step, ...], str] = {}
+        self._keys = keys
+        for name, path in self.paths.items():
+            if path[-1].index is not None:
+                keys.setdefault(path, name)
+
+        counts: dict[tuple[Step, ...], int] = {}
+        for path in self.paths.values():
+            for size in range(1, len(path)):
+                counts[path[:size]] = counts.get(path[:size], 0) + 1
+
+        for prefix, count in counts.items():
+            if count > 1:
+                keys.setdefault(prefix, " > ".join(str(x) for x in prefix))
+
+        plans = {}
+        for name, path in self.paths.items():
+            plan: list[tuple[str | None, tuple[Step, ...]]] = []
+            last = 0
+            for size in range(1, len(path) + 1):
+                if path[:size] in keys:
+                    plan.append((keys[path[:size]], path[last:size]))
+                    last = size
+
+            if last < len(path):
+                plan.append((None, path[last:]))
+
+            plans[name] = plan
+
+        return plans
+
+    def _walk(self, plan: list[tuple[str | None, tuple[Step, ...]]], depth: int) -> Any:
+        key, steps = plan[depth]
+
+        def resolve() -> Any:
+            element = self._walk(plan, depth - 1) if depth else self.root()
+            for step in steps:
+                element = step.apply(element)
+
+            return element
+
+        below = self._prefetched and any(x in self._prefetched for x, _ in plan[:depth])
+        if key in self._prefetched and not below:
+            snapshot = self._prefetched[key]
+            if snapshot is None or snapshot.stale:
+                element = self.cache.get(key, resolve)
+                snapshot = self._prefetched[key] = self.snapshot(element)
+            return snapshot.root
+
+        if key is None or below:
+            element = resolve()
+            # A snapshot element reads the live tree once its step is over, so it's
+            # cached like a wrapper under the runtime ID the snapshot already fetched
+            if (
+                key is not None
+                and isinstance(element, CachedElement)
+                and element.cached
+            ):
+                self.cache.put(key, element, element.runtime_id)
+            return element
+
+        return self.cache.get(key, resolve)
+
+    @contextmanager
+    def prefetch(self, name: str) -> Iterator[None]:
+        """
+        Serves lookups of name and the locators below it from a snapshot
+
+        The subtree is fetched in one request on the first lookup, and again on the
+        next lookup once the snapshot went stale (an action on one of its elements,
+        or refresh()). Does nothing without a snapshot function.
+        """
+        path = self.paths[name]
+        if self.snapshot is None or path[-1].index is None:
+            yield
+            return
+
+        key = self._keys[path]
+        if key in self._prefetched:
+            yield  # Already prefetched by an enclosing step
+            return
+
+        self._prefetched[key] = None
+        try:
+            yield
+        finally:
+            if snapshot := self._prefetched.pop(key):
+                snapshot.stale = True
+
+    def refresh(self) -> None:
+        """Marks prefetched snapshots stale, e.g. between the polls of a wait"""
+        for snapshot in self._prefetched.values():
+            if snapshot is not None:
+                snapshot.stale = True
+
+    def resolve(self, name: str) -> Any:
+        plan = self._plans[name]
+        try:
+            return self._walk(plan, len(plan) - 1)
+        except IndexError as err:
+            raise IndexError(f"Unable to locate {name}: {err}") from None
+
+    def find(self, element: Any, path: str) -> Any:
+        """Applies an ad-hoc path below an already resolved element"""
+        for step in parse_path(path):
+            element = step.apply(element)
+
+        return element
+
+    def describe(self, name: str) -> str:
+        return " > ".join(str(x) for x in self.paths[name])
+
+    def validate(self) -> dict[str, str]:
+        """Resolves every locator against the current tree, returns the failures"""
+        failures = {}
+        for name in self.spec:
+            try:
+                self.resolve(name)
+            except Exception as err:  # noqa: BLE001
+                failures[name] = str(err)
+
+        return failures
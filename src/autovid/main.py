@@ -1,19 +1,44 @@
+from __future__ import annotations
+
 import logging
 import math
-import tkinter as tk
 from datetime import datetime, timedelta
 from pathlib import Path
 from threading import Event, Thread
+from typing import TYPE_CHECKING
 
-from autovid.common import term2site
-from autovid.overlay import Overlay
+from autovid.events import Error, Finished, Status
+from autovid.jobs import Job
 from autovid.verint import VERINT
+from autovid.waits import Cancelled
+
+if TYPE_CHECKING:
+    from autovid.overlay import Overlay
 
 lg = logging.getLogger(__name__)
 kill_thread = Event()
 
+# Spans pull_image goes through, for the overlay's progress bar. Plus "cache" first
+# when there's an export cache
+PULL_IMAGE_STEPS = (
+    "db_lookup",
+    "init_app",
+    "login",
+    "reset_state",
+    "select_site",
+    "select_camera",
+    "set_time_range",
+    "recorded",
+    "videoview",
+    "export",
+    "save",
+    "reset_state",
+)
+
 
 class AutoVid(VERINT):
+    check_on_init = False
+
     def __init__(
         self,
         term_id: str,
@@ -22,8 +47,9 @@ class AutoVid(VERINT):
         jira_id: str | None = None,
         outdir: Path | str | None = None,
         w_percent: int = 80,
+        **kwargs,
     ) -> None:
-        super().__init__(outdir=outdir)
+        super().__init__(outdir=outdir, **kwargs)
 
         if isinstance(lookback_buffer, int):
             lookback_buffer = timedelta(seconds=lookback_buffer)
@@ -39,80 +65,94 @@ class AutoVid(VERINT):
 
     def start_overlay(self) -> None:
         global kill_thread
+        from autovid.overlay import Overlay
+
         overlay_width = math.floor(100 - self.w_percent)
-        self.overlay = Overlay(w_percent=overlay_width)
+        self.overlay = Overlay(w_percent=overlay_width, bus=self.events)
         self.overlay.after(5000, self._start_thread, self.overlay)
         self.overlay.mainloop()
         kill_thread.set()
+        self.cancel.cancel("Overlay closed")
 
     def _start_thread(self, overlay_obj: Overlay) -> None:
         self.thread = Thread(target=self.pull_image, args=(overlay_obj,), daemon=True)
         self.thread.start()
 
     def pull_image(self, overlay_obj: Overlay | None = None) -> None:
+        # Never touches Tk, the overlay picks the events up from its own thread
         def update_status(msg: str):
-            if overlay_obj:
-                if kill_thread.is_set():
-                    raise ConnectionAbortedError("Command to Kill Thread Received")
-
-                status_label: tk.StringVar = overlay_obj.status_label
-                status_label.set(msg)
-
+            self.cancel.check()
+            self.events.publish(Status(msg))
             lg.info(msg)
 
+        job = Job(self.term_id, self.tran_dt, self.lookback_td, self.jira_id)
+        ok = False
+
         try:
-            update_status("Querying Database To Convert ATM ID to SITE Name")
-            site_id = term2site(self.term_id)
-            if not site_id:
-                raise ValueError(
-                    f"Could not return a valid site from: {self.term_id}. Please double check the value"
+            steps = len(PULL_IMAGE_STEPS) + (self.cache is not None)
+            with self.trace.job(job.fl_name, steps=steps), self.job_budget():
+                cached = self._cached(
+                    self.term_id, self.tran_dt, self.lookback_td, job.fl_name
                 )
-            update_status(f"Linked Terminal: {self.term_id} to {site_id}")
-
-            update_status("Starting VERINT. Please wait...")
-            self.init_app()
-
-            update_status("Finding and Clicking Login Button")
-            self.login()
-
-            update_status("Resetting the State")
-            self.reset_state()
-
-            update_status(f"Found Site: {site_id}")
-            self.select_site(site_id)
-
-            update_status(f"Finding DVR Camera: {self.term_id}")
-            self.select_camera(camera_name=self.term_id)
-
-            update_status("Input Datetime Range")
-            self.set_time_range(event_dt=self.tran_dt, event_td_range=self.lookback_td)
-
-            update_status("Clicking the Recorded Button")
-            self.click_recorded_button()
-
-            update_status("Pulling Up Video. Please wait...")
-            self.videoview()
-
-            update_status("Starting the Export Image Process")
-            self.export_image_click()
-
-            update_status("Saving the Image to {self.outdir}")
-            self.save_image()
+                if cached:
+                    ok = True
+                    update_status(f"Copied the cached export to {cached}")
+                    return
+
+                update_status("Querying Database To Convert ATM ID to SITE Name")
+                with self.trace.span("db_lookup"):
+                    site_id = self.term2site(self.term_id)
+                if not site_id:
+                    raise ValueError(
+                        f"Could not return a valid site from: {self.term_id}. Please double check the value"
+                    )
+                update_status(f"Linked Terminal: {self.term_id} to {site_id}")
+
+                update_status("Starting VERINT. Please wait...")
+                with self.trace.span("init_app"):
+                    self._chk_exec()
+                    self.init_app()
+
+                update_status("Finding and Clicking Login Button")
+                with self.trace.span("login"):
+                    self.login()
+
+                update_status("Resetting the State")
+                with self.trace.span("reset_state"):
+                    self.reset_state()
+
+                output = self.pull_frame(
+                    site_id=site_id,
+                    camera_name=self.term_id,
+                    event_dt=self.tran_dt,
+                    event_td_range=self.lookback_td,
+                    fl_name=job.fl_name,
+                    status=update_status,
+                )
+                self._store(self.term_id, self.tran_dt, self.lookback_td, output)
 
-            update_status("Resetting State")
-            self.reset_state()
+                update_status("Resetting State")
+                with self.trace.span("reset_state"):
+                    self.reset_state()
 
         except KeyboardInterrupt as err:
             raise err
 
+        except Cancelled as err:
+            lg.warning(f"Aborted: {err}")
+            self.cleanup()
+            self.events.publish(Error(f"Aborted: {err}"))
+            raise err
+
         except Exception as err:
+            self.events.publish(Error(f"{type(err).__name__}: {err}"))
             raise err
 
         else:
+            ok = True
             update_status("Successfully Finished Execution...")
             lg.info("Finish pulling the image...")
 
         finally:
-            if overlay_obj:
-                self.overlay.destroy()
-                lg.info("Successfully destroyed thread")
+            # The overlay closes itself when it sees this
+            self.events.publish(Finished(ok=ok))
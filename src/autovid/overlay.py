@@ -4,12 +4,31 @@ import tkinter as tk
 from tkinter import ttk
 from typing import Any
 
+from autovid.events import (
+    Error,
+    EventBus,
+    Finished,
+    Progress,
+    Status,
+)
+
 lg = logging.getLogger(__name__)
 
 
 class Overlay(tk.Tk):
+    """
+    Always-on-top status window shown while the automation drives VERINT
+
+    With a bus, events are drained on the Tk thread every poll_ms via after(),
+    so the automation thread never touches a Tk widget.
+    """
+
     def __init__(
-        self, w_size: tuple[int, int] = (300, 200), w_percent: int | None = None
+        self,
+        w_size: tuple[int, int] = (300, 200),
+        w_percent: int | None = None,
+        bus: EventBus | None = None,
+        poll_ms: int = 100,
     ):
         super().__init__()
         self.wm_title("AutoVid by NMani")
@@ -42,8 +61,8 @@ class Overlay(tk.Tk):
         )
         status.pack(fill="x", expand=True)
 
-        progress = ttk.Progressbar(container, mode="determinate")
-        progress.pack(fill="both", expand=True)
+        self.progress = ttk.Progressbar(container, mode="determinate", maximum=100)
+        self.progress.pack(fill="both", expand=True)
 
         abort = ttk.Label(
             container,
@@ -65,7 +84,37 @@ class Overlay(tk.Tk):
         )
         warn.pack(fill="x", expand=True, side="bottom")
 
+        self.bus = bus
+        self.poll_ms = poll_ms
+        self.events = bus.subscribe() if bus else None
+        if self.events:
+            self.after(self.poll_ms, self.poll_events)
+
+    def poll_events(self) -> None:
+        if self.events is None:
+            return
+
+        for event in self.events.drain(limit=100):
+            match event:
+                case Status(message=message):
+                    self.status_label.set(message)
+                case Progress():
+                    self.progress["value"] = event.percent
+                case Error(message=message):
+                    self.status_label.set(f"Error: {message}")
+                case Finished():
+                    self.destroy()
+                    return
+
+        self.after(self.poll_ms, self.poll_events)
+
+    def destroy(self) -> None:
+        if self.bus and self.events:
+            self.bus.unsubscribe(self.events)
+            self.events = None
+        super().destroy()
+
     def kill_on_hover(self, event: Any):
-        self.destroy
+        self.destroy()
 
     # def _calc_screen_sizes() -> tuple[int, int]: ...
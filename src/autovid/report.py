@@ -0,0 +1,261 @@
+"""
+Streams per-job results to a CSV/JSON lines manifest and an Excel workbook
+
+Every row goes to the manifest as soon as the job finishes, so a run that dies
+midway still leaves every finished job on disk. The workbook is an openpyxl
+write-only workbook: rows are streamed to a temporary file as they come in and
+the .xlsx is only assembled on close. After a crash rebuild_workbook() turns the
+manifest into the workbook, streaming it the same way.
+"""
+
+import csv
+import json
+import logging
+import os
+from collections.abc import Iterable, Iterator
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Self
+
+from autovid.jobs import JobResult, ResultsCSV
+
+lg = logging.getLogger(__name__)
+
+# Steps that get a column of their own, any other span is counted in other_s
+STEPS = (
+    "cache",
+    "init_app",
+    "login",
+    "reset_state",
+    "select_site",
+    "select_camera",
+    "set_time_range",
+    "recorded",
+    "videoview",
+    "export",
+    "save",
+)
+
+_DATETIMES = ("tran_dt", "started", "finished")
+
+
+def columns(steps: Iterable[str] = STEPS) -> list[str]:
+    return [
+        *ResultsCSV.fields,
+        *(f"{x}_s" for x in steps),
+        "other_s",
+        "total_s",
+    ]
+
+
+def to_row(result: JobResult, steps: Iterable[str] = STEPS) -> dict[str, Any]:
+    """A result as a flat row with seconds per step, datetimes left as objects"""
+    steps = tuple(steps)
+    row: dict[str, Any] = {
+        **result.to_row(),
+        "tran_dt": result.job.tran_dt,
+        "started": result.started,
+        "finished": result.finished,
+    }
+    for step in steps:
+        row[f"{step}_s"] = result.steps.get(step)
+
+    other = sum(v for k, v in result.steps.items() if k not in steps)
+    row["other_s"] = other if other else None
+    row["total_s"] = sum(result.steps.values()) if result.steps else None
+    return row
+
+
+def _text(value: Any) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, float):
+        return f"{value:.3f}"
+    return str(value)
+
+
+def _typed(row: dict[str, Any]) -> dict[str, Any]:
+    """Turns a manifest row's strings back into datetimes and numbers"""
+    output = {}
+    for key, value in row.items():
+        if value in ("", None):
+            value = None
+        elif key in _DATETIMES:
+            value = datetime.fromisoformat(value)
+        elif key == "lookback" or key.endswith("_s"):
+            value = float(value)
+        output[key] = value
+
+    return output
+
+
+def read_manifest(path: Path | str) -> Iterator[dict[str, Any]]:
+    """Rows of a CSV or JSON lines manifest, typed like to_row()"""
+    path = Path(path)
+    with path.open(newline="", encoding="utf-8") as f:
+        if path.suffix.lower() == ".jsonl":
+            rows = (json.loads(x) for x in f if x.strip())
+        else:
+            rows = csv.DictReader(f)
+
+        for row in rows:
+            yield _typed(row)
+
+
+class _Workbook:
+    """Write-only workbook saved next to its final name, then moved into place"""
+
+    def __init__(self, path: Path, header: list[str]) -> None:
+        from openpyxl import Workbook
+
+        self.path = path
+        self.header = header
+        self._book = Workbook(write_only=True)
+        self._sheet = self._book.create_sheet("Results")
+        self._sheet.append(header)
+
+    def append(self, row: dict[str, Any]) -> None:
+        self._sheet.append([row.get(x) for x in self.header])
+
+    def save(self) -> None:
+        tmp = self.path.with_name(f".{self.path.name}.tmp")
+        self._book.save(tmp)
+        os.replace(tmp, self.path)
+
+
+def rebuild_workbook(
+    manifest: Path | str,
+    path: Path | str | None = None,
+    steps: Iterable[str] = STEPS,
+) -> Path:
+    """Writes the workbook of a manifest, e.g. after the run writing it crashed"""
+    manifest = Path(manifest)
+    path = Path(path) if path else manifest.with_suffix(".xlsx")
+
+    book = _Workbook(path, columns(steps))
+    count = 0
+    for row in read_manifest(manifest):
+        book.append(row)
+        count += 1
+    book.save()
+
+    lg.info(f"Wrote {count} rows from {manifest} to {path}")
+    return path
+
+
+class ResultsWriter:
+    """
+    Appends one row per finished job to path.csv, path.jsonl and path.xlsx
+
+    Memory doesn't grow with the number of rows. Manifest rows are flushed as
+    they're written and fsynced every sync_every rows. Reopening an existing
+    manifest appends to it, and the workbook then starts with its rows.
+    """
+
+    formats = ("csv", "jsonl", "xlsx")
+
+    def __init__(
+        self,
+        path: Path | str,
+        formats: Iterable[str] = formats,
+        steps: Iterable[str] = STEPS,
+        sync_every: int = 100,
+    ) -> None:
+        """
+        Parameters
+        ----------
+
+        path: Path | str
+            Report path without the extension, e.g. outdir/autovid_report
+        formats: Iterable[str], optional
+            Any of csv, jsonl and xlsx. The xlsx needs csv or jsonl to recover from
+        steps: Iterable[str], optional
+            Steps with a seconds column of their own
+        sync_every: int, optional
+            Rows between fsyncs of the manifest files
+        """
+        self.path = Path(path)
+        self.formats = tuple(formats)
+        if unknown := set(self.formats) - set(ResultsWriter.formats):
+            raise ValueError(f"Unknown report formats: {sorted(unknown)}")
+
+        self.steps = tuple(steps)
+        self.header = columns(self.steps)
+        self.sync_every = sync_every
+        self.rows = 0
+        self.closed = False
+
+        self._csv = self._jsonl = None
+        self._writer: csv.DictWriter | None = None
+        self._workbook: _Workbook | None = None
+
+        if "xlsx" in self.formats:
+            self._workbook = _Workbook(self.path.with_suffix(".xlsx"), self.header)
+            if (manifest := self.manifest) and manifest.exists():
+                for row in read_manifest(manifest):
+                    self._workbook.append(row)
+
+        if "csv" in self.formats:
+            path = self.path.with_suffix(".csv")
+            new_file = not path.exists() or path.stat().st_size == 0
+            self._csv = path.open("a", newline="", encoding="utf-8")
+            self._writer = csv.DictWriter(self._csv, fieldnames=self.header)
+            if new_file:
+                self._writer.writeheader()
+                self._csv.flush()
+
+        if "jsonl" in self.formats:
+            self._jsonl = self.path.with_suffix(".jsonl").open("a", encoding="utf-8")
+
+    @property
+    def manifest(self) -> Path | None:
+        """The file the workbook can be rebuilt from, JSON lines first"""
+        for suffix in ("jsonl", "csv"):
+            if suffix in self.formats:
+                return self.path.with_suffix(f".{suffix}")
+
+        return None
+
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def append(self, result: JobResult) -> None:
+        row = to_row(result, self.steps)
+
+        if self._writer is not None:
+            self._writer.writerow({k: _text(v) for k, v in row.items()})
+            self._csv.flush()
+        if self._jsonl is not None:
+            self._jsonl.write(json.dumps(row, default=_text) + "\n")
+            self._jsonl.flush()
+        if self._workbook is not None:
+            self._workbook.append(row)
+
+        self.rows += 1
+        if self.sync_every and self.rows % self.sync_every == 0:
+            self.sync()
+
+    def sync(self) -> None:
+        for f in (self._csv, self._jsonl):
+            if f is not None:
+                os.fsync(f.fileno())
+
+    def close(self) -> None:
+        if self.closed:
+            return
+
+        self.closed = True
+        for f in (self._csv, self._jsonl):
+            if f is not None:
+                f.flush()
+                os.fsync(f.fileno())
+                f.close()
+
+        if self._workbook is not None:
+            self._workbook.save()
+            lg.info(f"Wrote {self._workbook.path}")
@@ -0,0 +1,156 @@
+import logging
+from collections.abc import Iterable, Mapping
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+
+from autovid.common import Ambiguous
+from autovid.jobs import Job
+
+lg = logging.getLogger(__name__)
+
+# UI steps each VERINT call stands for, used to compare plans offline
+STEP_COSTS = {
+    "reset_state": 1,
+    "select_site": 1,
+    "select_camera": 1,
+    "load_video": 3,  # set_time_range, click_recorded_button, videoview
+    "export_frame": 2,  # export_image_click, save_image
+}
+
+
+@dataclass(frozen=True)
+class VideoRequest:
+    """One video load of a camera, exporting a frame per job"""
+
+    site_id: str
+    camera: str
+    start: datetime
+    end: datetime
+    jobs: tuple[Job, ...]
+
+    @property
+    def center(self) -> datetime:
+        return self.start + (self.end - self.start) / 2
+
+    @property
+    def span(self) -> timedelta:
+        """Half the window, what set_time_range expects as event_td_range"""
+        return (self.end - self.start) / 2
+
+
+@dataclass(frozen=True)
+class Plan:
+    requests: tuple[VideoRequest, ...]
+    unresolved: tuple[Job, ...]
+    steps_before: int
+    steps_after: int
+
+    @property
+    def saving(self) -> float:
+        return 1 - self.steps_after / self.steps_before if self.steps_before else 0.0
+
+
+def _window(job: Job) -> tuple[datetime, datetime]:
+    return (job.tran_dt - job.lookback, job.tran_dt + job.lookback)
+
+
+def _merge(
+    site_id: str, camera: str, jobs: list[Job], max_span: timedelta
+) -> list[VideoRequest]:
+    requests: list[VideoRequest] = []
+    group: list[Job] = []
+    start = end = datetime.min
+
+    for job in sorted(jobs, key=_window):
+        job_start, job_end = _window(job)
+        if group and job_start <= end and max(end, job_end) - start <= max_span:
+            group.append(job)
+            end = max(end, job_end)
+            continue
+
+        if group:
+            requests.append(VideoRequest(site_id, camera, start, end, tuple(group)))
+        group, start, end = [job], job_start, job_end
+
+    if group:
+        requests.append(VideoRequest(site_id, camera, start, end, tuple(group)))
+
+    return requests
+
+
+def estimate_steps(requests: Iterable[VideoRequest], sweep: bool = False) -> int:
+    """
+    UI steps to run the requests in order
+
+    Site and camera selections are shared by consecutive requests. With sweep a
+    request loads its video once for all its jobs, otherwise once per job.
+    """
+    steps = 0
+    site = camera = None
+    for request in requests:
+        if request.site_id != site:
+            steps += STEP_COSTS["reset_state"] + STEP_COSTS["select_site"]
+            site, camera = request.site_id, None
+        if request.camera != camera:
+            steps += STEP_COSTS["select_camera"]
+            camera = request.camera
+
+        loads = 1 if sweep else len(request.jobs)
+        steps += STEP_COSTS["load_video"] * loads
+        steps += STEP_COSTS["export_frame"] * len(request.jobs)
+
+    return steps
+
+
+def plan_jobs(
+    jobs: Iterable[Job],
+    sites: Mapping[str, str | None | Ambiguous],
+    max_span: timedelta = timedelta(minutes=30),
+    sweep: bool = False,
+) -> Plan:
+    """
+    Groups jobs by site, then camera, then time
+
+    Jobs on the same camera whose windows overlap are merged into one VideoRequest
+    as long as the merged window stays within max_span. Jobs without a single site
+    are returned as unresolved.
+
+    Parameters
+    ----------
+
+    sweep: bool, optional
+        Whether the requests will be swept (see AutoVidBatch), only then does a
+        merged request load its video once in steps_after
+    """
+    jobs = list(jobs)
+    grouped: dict[str, dict[str, list[Job]]] = {}
+    unresolved = []
+
+    for job in jobs:
+        site_id = sites.get(job.term_id)
+        if not site_id or isinstance(site_id, Ambiguous):
+            unresolved.append(job)
+            continue
+
+        grouped.setdefault(site_id, {}).setdefault(job.term_id, []).append(job)
+
+    requests = []
+    for site_id in sorted(grouped):
+        for camera in sorted(grouped[site_id]):
+            requests += _merge(site_id, camera, grouped[site_id][camera], max_span)
+
+    # Unresolved jobs never reach the UI so only resolved ones count. Run on
+    # their own every job costs a reset, site, camera, video load and export
+    steps_before = sum(
+        estimate_steps([VideoRequest(x.site_id, x.camera, x.start, x.end, (job,))])
+        for x in requests
+        for job in x.jobs
+    )
+    steps_after = estimate_steps(requests, sweep=sweep)
+
+    plan = Plan(tuple(requests), tuple(unresolved), steps_before, steps_after)
+    lg.info(
+        f"Planned {len(jobs)} jobs into {len(requests)} video requests, "
+        f"{steps_before} -> {steps_after} UI steps"
+    )
+    return plan
@@ -0,0 +1,61 @@
+from sqlalchemy import (
+    Boolean,
+    Column,
+    Integer,
+    MetaData,
+    Select,
+    String,
+    Table,
+    or_,
+    select,
+)
+
+# Mirrors the subset of the VERINT schema we read from. Only used to build
+# parameterized statements, never to create tables on the VERINT server.
+metadata = MetaData()
+
+dvr_cameras = Table(
+    "DvrCameras",
+    metadata,
+    Column("DvrCamera_ID", Integer, primary_key=True),
+    Column("Dvr_ID", Integer),
+    Column("Name", String),
+    Column("InUse", Boolean),
+)
+
+sites = Table(
+    "Sites",
+    metadata,
+    Column("ID", Integer, primary_key=True),
+    Column("SiteName", String),
+    Column("LocationId", String),
+    Column("AddressStreet", String),
+    Column("AddressCity", String),
+    Column("PostalCode", String),
+    Column("AddressState", String),
+    Column("AddressCountry", String),
+)
+
+
+def camera_site_select() -> Select:
+    """Every camera joined to its site, the base of all terminal lookups"""
+    return select(
+        dvr_cameras.c.InUse,
+        dvr_cameras.c.DvrCamera_ID,
+        dvr_cameras.c.Dvr_ID,
+        dvr_cameras.c.Name,
+        sites.c.SiteName,
+        sites.c.LocationId,
+        sites.c.AddressStreet,
+        sites.c.AddressCity,
+        sites.c.PostalCode,
+        sites.c.AddressState,
+        sites.c.AddressCountry,
+    ).select_from(dvr_cameras.outerjoin(sites, dvr_cameras.c.Dvr_ID == sites.c.ID))
+
+
+def camera_site_query(terms: list[str]) -> Select:
+    """Cameras whose name contains any of terms. LIKE wildcards are escaped"""
+    return camera_site_select().where(
+        or_(*[dvr_cameras.c.Name.contains(x, autoescape=True) for x in terms])
+    )
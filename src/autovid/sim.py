@@ -0,0 +1,683 @@
+"""
+Simulated VERINT desktop for running the automation without Windows
+
+SimBackend plugs into VERINT(backend=...) in place of pywinauto. It serves a fake
+UIA tree shaped like VERINT's (TabControl, VideoTabControl, DvrVideoPlayer, ...)
+and reacts to clicks and keystrokes enough for login through save_image to run.
+Every wrapper call is counted as one COM round trip and can be slowed down or
+made to fail, so locator, wait and retry changes can be measured off-desktop.
+"""
+
+import logging
+import random
+import re
+from collections import Counter
+from collections.abc import Callable, Iterable, Mapping
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any
+
+from autovid.snapshot import CachedElement, Snapshot
+from autovid.waits import SYSTEM_CLOCK, Clock
+
+lg = logging.getLogger(__name__)
+
+
+class ElementNotFoundError(Exception):
+    """Stand-in for pywinauto.findwindows.ElementNotFoundError"""
+
+
+class ElementNotAvailableError(Exception):
+    """Stand-in for the COM error raised when touching a destroyed element"""
+
+
+# Indented outline of the VERINT UIA tree as it looks right after login with the
+# previous session restored, "ClassName{Title}" per line
+VERINT_TREE = """
+Window{Video Inspector}
+  TabControl
+    TabItem
+      LoginDialog
+        Button{Login}
+      TextBox
+      Menu
+        MenuItem
+      ListView
+        ListBoxItem
+          Expander
+    TabItem
+      Grid
+        Border
+        Border
+          DvrVideoPlayer
+            Button
+            Button
+            Button
+            Button
+            Button
+            Button
+            Button
+            Slider
+            VideoContainer
+              Menu
+                MenuItem
+      VideoTabControl
+        Expander
+          DvrTree
+            TabControl
+              TabItem
+              TabItem
+                ScrollViewer
+                  TreeView
+                    TreeViewItem{Verint.Database.WrapperClasses.DvrNode}
+                      Menu
+        Grid
+          VideoTabItem
+            Button
+          VideoTabItem
+            Button
+          VideoRequest
+            Expander
+              ScrollViewer
+                DvrVideoDirectoryControl
+                  Button
+            ScrollViewer
+              TextBox
+              ListBox
+            Expander{Recorded Video}
+              TextBox
+              Button
+              Button
+  Window{Save Image}
+    ExportFrameDialog
+      TextBox
+"""
+
+
+class SimElement:
+    """
+    Minimal stand-in for a pywinauto UIA wrapper
+
+    visible/enabled may be callables so state can depend on the simulated clock.
+    Handlers in on["click"] / on["type_keys"] script how VERINT reacts.
+    """
+
+    _next_id = 0
+
+    def __init__(
+        self,
+        class_name: str,
+        title: str = "",
+        children: list["SimElement"] | None = None,
+        backend: "SimBackend | None" = None,
+    ) -> None:
+        SimElement._next_id += 1
+        self.class_name = class_name
+        self.title = title
+        self.runtime_id = (42, SimElement._next_id)
+        self.backend = backend
+        self.parent: SimElement | None = None
+        self.alive = True
+        self.visible: bool | Callable[[], bool] = True
+        self.enabled: bool | Callable[[], bool] = True
+        self.expanded = False
+        self.text = ""
+        self.position = 0.0
+        self.bounds = (0.0, 100.0)
+        self.calls = 0  # children() lookups made on this element
+        self.on: dict[str, Callable[..., None]] = {}
+        self._children: list[SimElement] = []
+
+        for child in children or []:
+            self.add(child)
+
+    def __repr__(self) -> str:
+        return f"SimElement({self.class_name!r}, {self.title!r})"
+
+    def _call(self, method: str) -> None:
+        if self.backend is not None:
+            self.backend.call(method)
+
+        if not self.alive:
+            raise ElementNotAvailableError(f"{self!r} no longer exists")
+
+    def _fire(self, event: str, *args: Any) -> None:
+        if handler := self.on.get(event):
+            handler(self, *args)
+
+    def add(self, child: "SimElement") -> "SimElement":
+        child.parent = self
+        self._children.append(child)
+        return child
+
+    def remove(self) -> None:
+        self.alive = False
+        for child in self.descendants():
+            child.alive = False
+
+        if self.parent is not None:
+            self.parent._children.remove(self)
+            self.parent = None
+
+    def clear(self) -> None:
+        for child in list(self._children):
+            child.remove()
+
+    def descendants(self, depth: int | None = None) -> Iterable["SimElement"]:
+        for child in self._children:
+            yield child
+            if depth is None or depth > 1:
+                yield from child.descendants(None if depth is None else depth - 1)
+
+    def matches(
+        self, class_name: str | None = None, title: str | None = None, **_
+    ) -> bool:
+        return (class_name is None or self.class_name == class_name) and (
+            title is None or self.title == title
+        )
+
+    # pywinauto wrapper API, one counted call each
+    @property
+    def element_info(self) -> SimpleNamespace:
+        self._call("element_info")
+        return SimpleNamespace(runtime_id=list(self.runtime_id))
+
+    def children(
+        self, class_name: str | None = None, title: str | None = None
+    ) -> list["SimElement"]:
+        self._call("children")
+        self.calls += 1
+        return [x for x in self._children if x.matches(class_name, title)]
+
+    def parent_element(self) -> "SimElement | None":
+        self._call("parent")
+        return self.parent
+
+    def is_visible(self) -> bool:
+        self._call("is_visible")
+        return self.visible() if callable(self.visible) else self.visible
+
+    def is_enabled(self) -> bool:
+        self._call("is_enabled")
+        return self.enabled() if callable(self.enabled) else self.enabled
+
+    def is_expanded(self) -> bool:
+        self._call("is_expanded")
+        return self.expanded
+
+    def exists(self, timeout: float = 0) -> bool:
+        if self.backend is not None:
+            self.backend.call("exists")
+        return self.alive
+
+    def texts(self) -> list[str]:
+        self._call("texts")
+        return [self.text]
+
+    def set_focus(self) -> "SimElement":
+        self._call("set_focus")
+        return self
+
+    def click_input(self) -> None:
+        self._call("click_input")
+        self._fire("click")
+
+    def click(self) -> None:
+        self._call("click")
+        self._fire("click")
+
+    def toggle(self) -> None:
+        self._call("toggle")
+        self.expanded = not self.expanded
+        self._fire("click")
+
+    def type_keys(self, keys: str, with_spaces: bool = False, **_) -> None:
+        self._call("type_keys")
+        self._fire("type_keys", keys)
+
+    def min_value(self) -> float:
+        self._call("min_value")
+        return self.bounds[0]
+
+    def max_value(self) -> float:
+        self._call("max_value")
+        return self.bounds[1]
+
+    def value(self) -> float:
+        self._call("value")
+        return self.position
+
+    def set_value(self, value: float) -> None:
+        self._call("set_value")
+        self.position = float(value)
+        self._fire("set_value", value)
+
+    def move_window(self, **_) -> None:
+        self._call("move_window")
+
+    def process_id(self) -> int:
+        self._call("process_id")
+        return 4242
+
+    def child_window(self, **criteria) -> "SimSpec":
+        return SimSpec(lambda: [self], criteria, self.backend)
+
+
+class SimSpec:
+    """
+    Lazy lookup like pywinauto's WindowSpecification
+
+    Nothing is searched until the spec is used, then the first element matching
+    class_name/title (within depth) is resolved and the call is passed on to it.
+    """
+
+    def __init__(
+        self,
+        roots: Callable[[], list[SimElement]],
+        criteria: Mapping[str, Any],
+        backend: "SimBackend | None" = None,
+    ) -> None:
+        self._roots = roots
+        self._criteria = dict(criteria)
+        self._backend = backend
+
+    def _candidates(self) -> list[SimElement]:
+        criteria = dict(self._criteria)
+        depth = criteria.pop("depth", None)
+        found_index = criteria.pop("found_index", 0)
+        if criteria.pop("control_type", None) == "Text":
+            criteria.setdefault("class_name", "Text")
+
+        found = []
+        for root in self._roots():
+            found += [x for x in root.descendants(depth) if x.matches(**criteria)]
+
+        return found[found_index:]
+
+    def resolve(self) -> SimElement:
+        if self._backend is not None:
+            self._backend.call("find")
+
+        if not (found := self._candidates()):
+            raise ElementNotFoundError(str(self._criteria))
+
+        return found[0]
+
+    def exists(self, timeout: float = 0) -> bool:
+        if self._backend is not None:
+            self._backend.call("exists")
+        return bool(self._candidates())
+
+    def child_window(self, **criteria) -> "SimSpec":
+        return SimSpec(lambda: self._candidates()[:1], criteria, self._backend)
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.resolve(), name)
+
+
+class SimApplication:
+    def __init__(self, backend: "SimBackend") -> None:
+        self.backend = backend
+
+    def start(self, cmd_line: str, work_dir: str | None = None) -> "SimApplication":
+        self.backend.launch()
+        return self
+
+    def connect(self, process: int | None = None, **_) -> "SimApplication":
+        return self
+
+    def kill(self) -> None:
+        self.backend.kill()
+
+    def __getattr__(self, name: str) -> SimSpec:
+        # app.VideoInspect etc, a spec over the running main window
+        return self.backend.desktop().window(title="Video Inspector")
+
+
+class SimDesktop:
+    def __init__(self, backend: "SimBackend") -> None:
+        self.backend = backend
+
+    def _top(self) -> list[SimElement]:
+        return [self.backend.root] + self.backend.popups if self.backend.running else []
+
+    def windows(self, title: str | None = None, **_) -> list[SimElement]:
+        self.backend.call("windows")
+        return [x for x in self._top() if x.matches(title=title)]
+
+    def window(self, **criteria) -> SimSpec:
+        criteria.setdefault("depth", 1)
+        return SimSpec(lambda: [_Desktop(self._top())], criteria, self.backend)
+
+
+class _Desktop(SimElement):
+    """Root holding the top level windows without re-parenting them"""
+
+    def __init__(self, windows: list[SimElement]) -> None:
+        super().__init__("Desktop")
+        self._children = windows
+
+
+def build_tree(outline: str, backend: "SimBackend | None" = None) -> SimElement:
+    """Builds SimElements from an indented "ClassName{Title}" outline"""
+    root = None
+    stack: list[tuple[int, SimElement]] = []
+    for line in outline.strip("\n").splitlines():
+        depth = len(line) - len(line.lstrip())
+        class_name, _, title = line.strip().rstrip("}").partition("{")
+        element = SimElement(class_name, title, backend=backend)
+
+        while stack and stack[-1][0] >= depth:
+            stack.pop()
+        if stack:
+            stack[-1][1].add(element)
+        else:
+            root = element
+
+        stack.append((depth, element))
+
+    return root
+
+
+def _path(element: SimElement, path: str) -> SimElement:
+    """Uncounted 'Class[i] > Class' lookup used to wire up the simulation"""
+    for hop in path.split(" > "):
+        class_name, _, index = hop.rstrip("]").partition("[")
+        found = [x for x in element._children if x.class_name == class_name]
+        element = found[int(index or 0)]
+
+    return element
+
+
+_KEY_FIELDS = re.compile(r"\^a ?\{BACKSPACE\}(.*?)(?=\{)")
+
+
+class SimBackend:
+    """
+    Fake pywinauto entry points over a scripted VERINT
+
+    Parameters
+    ----------
+
+    sites: Mapping[str, Iterable[str]], optional
+        Site name -> camera names VERINT knows about
+    missing: Iterable[str], optional
+        Cameras whose video comes up as "Video not found"
+    clock: Clock, optional
+        Time source for latency and loading delays. Use a fake one in tests
+    latency: float, optional
+        Seconds every wrapper call (COM round trip) takes
+    launch_time: float, optional
+        Seconds from Application.start until the main window exists
+    load_time: float, optional
+        Seconds a recorded video takes to load
+    failure_rate: float, optional
+        Chance a call in fail_on raises ElementNotAvailableError
+    fail_on: Iterable[str], optional
+        Wrapper methods failures are injected into
+    seed: int, optional
+        Seed for failure injection
+    """
+
+    ElementNotFoundError = ElementNotFoundError
+
+    def __init__(
+        self,
+        sites: Mapping[str, Iterable[str]] | None = None,
+        missing: Iterable[str] = (),
+        clock: Clock = SYSTEM_CLOCK,
+        latency: float = 0.0,
+        launch_time: float = 0.0,
+        load_time: float = 0.0,
+        failure_rate: float = 0.0,
+        fail_on: Iterable[str] = ("children",),
+        seed: int = 0,
+    ) -> None:
+        self.sites = {k: set(v) for k, v in (sites or {}).items()}
+        self.missing = set(missing)
+        self.clock = clock
+        self.latency = latency
+        self.launch_time = launch_time
+        self.load_time = load_time
+        self.failure_rate = failure_rate
+        self.fail_on = set(fail_on)
+        self.rng = random.Random(seed)
+
+        self.calls: Counter[str] = Counter()
+        self.failures = 0
+        self.saved: list[Path] = []
+        self.positions: list[float] = []  # Player position (0-1) of each save
+        self.popups: list[SimElement] = []
+        self.root: SimElement | None = None
+        self.site: str | None = None
+        self.camera: str | None = None
+
+        self._ready_at = 0.0
+        self._video_at: float | None = None
+
+    @property
+    def total_calls(self) -> int:
+        return sum(self.calls.values())
+
+    @property
+    def running(self) -> bool:
+        return self.root is not None and self.clock.monotonic() >= self._ready_at
+
+    def call(self, method: str) -> None:
+        """Accounts for one COM round trip"""
+        self.calls[method] += 1
+        if self.latency:
+            self.clock.sleep(self.latency)
+
+        if method in self.fail_on and self.rng.random() < self.failure_rate:
+            self.failures += 1
+            raise ElementNotAvailableError(f"Injected failure in {method}")
+
+    def application(self) -> SimApplication:
+        return SimApplication(self)
+
+    def snapshot(self, element: SimElement, depth: int | None = None) -> Snapshot:
+        """The subtree under element as a single counted call, like a CacheRequest"""
+        self.call("snapshot")
+        if not element.alive:
+            raise ElementNotAvailableError(f"{element!r} no longer exists")
+
+        snapshot = Snapshot()
+
+        def copy(element: SimElement, depth: int | None) -> CachedElement:
+            children = None
+            if depth is None or depth > 0:
+                below = None if depth is None else depth - 1
+                children = [copy(x, below) for x in element._children]
+
+            visible, enabled = element.visible, element.enabled
+            return CachedElement(
+                snapshot,
+                lambda: element,
+                class_name=element.class_name,
+                title=element.title,
+                runtime_id=element.runtime_id,
+                visible=visible() if callable(visible) else visible,
+                enabled=enabled() if callable(enabled) else enabled,
+                children=children,
+            )
+
+        snapshot.root = copy(element, depth)
+        return snapshot
+
+    def desktop(self) -> SimDesktop:
+        return SimDesktop(self)
+
+    def launch(self) -> None:
+        self.call("start")
+        self.root = build_tree(VERINT_TREE, backend=self)
+        self._ready_at = self.clock.monotonic() + self.launch_time
+        self._wire(self.root)
+
+    def kill(self) -> None:
+        self.call("kill")
+        self.root = None
+        self.popups = []
+        self.site = self.camera = None
+
+    def _popup(self, *children: SimElement) -> SimElement:
+        popup = SimElement("Popup", children=list(children), backend=self)
+        popup.on["type_keys"] = lambda x, keys: (
+            self._close_popup(x) if keys == "{ESC}" else None
+        )
+        self.popups.append(popup)
+        return popup
+
+    def _close_popup(self, element: SimElement) -> None:
+        while element.parent is not None:
+            element = element.parent
+        if element in self.popups:
+            self.popups.remove(element)
+            element.alive = False
+
+    def _element(self, class_name: str, title: str = "", **handlers) -> SimElement:
+        element = SimElement(class_name, title, backend=self)
+        element.on.update(handlers)
+        return element
+
+    @staticmethod
+    def _fields(keys: str) -> list[str]:
+        return [x.strip() for x in _KEY_FIELDS.findall(keys)]
+
+    def _wire(self, root: SimElement) -> None:
+        tabs = _path(root, "TabControl")
+        dashboard = _path(tabs, "TabItem[0]")
+        video = _path(tabs, "TabItem[1]")
+        request = _path(video, "VideoTabControl > Grid > VideoRequest")
+        player = _path(video, "Grid > Border[1] > DvrVideoPlayer")
+        save_dialog = _path(root, "Window")
+
+        # Login
+        login = _path(dashboard, "LoginDialog")
+        _path(login, "Button").on["click"] = lambda x: login.remove()
+
+        # Dashboard search and the site results it fills in
+        results = _path(dashboard, "ListView")
+        cards = _path(dashboard, "Menu > MenuItem")
+        cards.on["click"] = lambda x: setattr(x, "expanded", True)
+        cards.on["type_keys"] = lambda x, keys: setattr(x, "expanded", False)
+
+        def request_video(site: str) -> None:
+            tab = _path(video, "VideoTabControl > Grid")
+            item = SimElement("VideoTabItem", backend=self)
+            item.add(self._element("Button", click=lambda x: item.remove()))
+            tab._children.insert(0, item)
+            item.parent = tab
+            self.site, self.camera = site, None
+            _path(request, "ScrollViewer > ListBox").clear()
+
+        def search_site(element: SimElement, keys: str) -> None:
+            results.clear()
+            site = (self._fields(keys) or [""])[-1]
+            if site not in self.sites:
+                return
+
+            listbox = SimElement("ListBox", backend=self)
+            listbox.add(
+                self._element("ListBoxItem", click=lambda x: request_video(site))
+            )
+            expander = SimElement("Expander", backend=self)
+            expander.add(SimElement("Button", backend=self))
+            expander.add(listbox)
+            results.add(SimElement("ListBoxItem", backend=self)).add(expander)
+
+        _path(dashboard, "TextBox").on["type_keys"] = search_site
+
+        # Restored video tabs and workspaces close when their buttons are used
+        for item in _path(video, "VideoTabControl > Grid")._children:
+            if item.class_name == "VideoTabItem":
+                _path(item, "Button").on["click"] = lambda x, item=item: item.remove()
+
+        tree = _path(video, "VideoTabControl > Expander > DvrTree > TabControl")
+        for item in _path(tree, "TabItem[1] > ScrollViewer > TreeView")._children:
+            item.on["type_keys"] = lambda x, keys: x.remove()
+
+        # Camera search inside the video request
+        cameras = _path(request, "ScrollViewer > ListBox")
+
+        def select(camera: str) -> None:
+            self.camera = camera
+
+        def search_camera(element: SimElement, keys: str) -> None:
+            cameras.clear()
+            camera = (self._fields(keys) or [""])[-1]
+            if camera in self.sites.get(self.site, ()):
+                cameras.add(
+                    self._element("ListBoxItem", click=lambda x: select(camera))
+                )
+
+        _path(request, "ScrollViewer > TextBox").on["type_keys"] = search_camera
+
+        # Recorded video loads after load_time, or never if the camera is missing.
+        # The position slider spans the loaded range and starts at its beginning
+        slider = _path(player, "Slider")
+        slider.bounds = (0.0, 1000.0)
+
+        def load_video(element: SimElement) -> None:
+            for old in [x for x in root._children if x.class_name == "Text"]:
+                old.remove()
+
+            slider.position = 0.0
+            if self.camera in self.missing:
+                self._video_at = None
+                root.add(SimElement("Text", "Video not found", backend=self))
+            else:
+                self._video_at = self.clock.monotonic() + self.load_time
+
+        def video_loaded() -> bool:
+            return (
+                self._video_at is not None and self.clock.monotonic() >= self._video_at
+            )
+
+        _path(request, "Expander[1] > Button[1]").on["click"] = load_video
+        _path(player, "Button[6]").enabled = video_loaded
+        _path(player, "Button[6]").on["click"] = lambda x: setattr(
+            slider, "position", 0.0
+        )
+        slider.enabled = video_loaded
+
+        # Export Image menu -> popup -> Save Image dialog
+        save_dialog.visible = False
+        name_box = _path(save_dialog, "ExportFrameDialog > TextBox")
+
+        def show_save(element: SimElement) -> None:
+            self._close_popup(element)
+            name_box.text = f"{self.camera}_snapshot"
+            save_dialog.visible = True
+
+        def export_menu(element: SimElement) -> None:
+            self._popup(self._element("TextBlock", "Export Image", click=show_save))
+
+        _path(player, "VideoContainer > Menu > MenuItem").on["click"] = export_menu
+
+        def write(path: Path) -> None:
+            path.write_bytes(b"\xff\xd8\xff\xd9")
+            self.saved.append(path)
+            self.positions.append(slider.position / slider.bounds[1])
+            save_dialog.visible = False
+
+        def confirm(element: SimElement, path: Path) -> None:
+            self._close_popup(element)
+            write(path)
+
+        def save(element: SimElement, keys: str) -> None:
+            if keys == "{ESC}":
+                save_dialog.visible = False
+                return
+
+            name, outdir = self._fields(keys)[:2]
+            path = Path(outdir) / f"{name}.jpg"
+            if not path.exists():
+                write(path)
+                return
+
+            border = SimElement("Border", backend=self)
+            border.add(self._element("Button", "Yes", click=lambda x: confirm(x, path)))
+            self._popup(border)
+
+        save_dialog.on["type_keys"] = save
@@ -0,0 +1,143 @@
+"""
+Bulk snapshots of a UI subtree, like a UIA CacheRequest
+
+Walking the tree costs a cross-process round trip per children() call and per
+property read. A snapshot fetches a whole subtree with the properties locators
+need (class name, title, runtime ID, visibility and enabled state) in one request
+and serves lookups from memory. Anything else, clicks and keystrokes included, is
+passed on to the live element.
+
+A snapshot only describes the tree at the moment it was taken. Calling an action
+on one of its elements marks it stale and its elements read the live tree from
+then on. See LocatorEngine.prefetch for taking them per workflow step.
+"""
+
+from collections.abc import Callable
+from types import SimpleNamespace
+from typing import Any
+
+# Wrapper methods that change the UI, calling one through a snapshot marks it stale
+ACTIONS = frozenset(
+    {
+        "click",
+        "click_input",
+        "close",
+        "collapse",
+        "expand",
+        "invoke",
+        "select",
+        "set_value",
+        "toggle",
+        "type_keys",
+    }
+)
+
+
+class Snapshot:
+    """The elements of one bulk request, stale once the UI may have changed"""
+
+    def __init__(self) -> None:
+        self.stale = False
+        self.root: CachedElement | None = None
+
+
+class CachedElement:
+    """
+    Read-only copy of a wrapper's locator properties and children
+
+    children() is served from the snapshot down to the depth it was taken with, and
+    from the live wrapper below that or once the snapshot is stale.
+    """
+
+    def __init__(
+        self,
+        snapshot: Snapshot,
+        wrapper: Callable[[], Any],
+        class_name: str,
+        title: str,
+        runtime_id: tuple,
+        visible: bool,
+        enabled: bool,
+        children: list["CachedElement"] | None = None,
+    ) -> None:
+        """
+        Parameters
+        ----------
+
+        snapshot: Snapshot
+            Snapshot the element belongs to
+        wrapper: Callable[[], Any]
+            Returns the live wrapper, called once on first use
+        children: list[CachedElement], optional
+            Cached children, None if they weren't fetched
+        """
+        self.snapshot = snapshot
+        self.class_name = class_name
+        self.title = title
+        self.runtime_id = tuple(runtime_id)
+        self.visible = visible
+        self.enabled = enabled
+
+        self._wrapper = wrapper
+        self._live: Any = None
+        self._children = children
+
+    def __repr__(self) -> str:
+        return f"CachedElement({self.class_name!r}, {self.title!r})"
+
+    @property
+    def live(self) -> Any:
+        if self._live is None:
+            self._live = self._wrapper()
+        return self._live
+
+    @property
+    def cached(self) -> bool:
+        return not self.snapshot.stale
+
+    @property
+    def element_info(self) -> Any:
+        if not self.cached:
+            return self.live.element_info
+
+        return SimpleNamespace(
+            runtime_id=list(self.runtime_id),
+            class_name=self.class_name,
+            name=self.title,
+        )
+
+    def children(
+        self, class_name: str | None = None, title: str | None = None
+    ) -> list[Any]:
+        if not self.cached or self._children is None:
+            criteria = {"class_name": class_name, "title": title}
+            return self.live.children(
+                **{k: v for k, v in criteria.items() if v is not None}
+            )
+
+        return [
+            x
+            for x in self._children
+            if (class_name is None or x.class_name == class_name)
+            and (title is None or x.title == title)
+        ]
+
+    def window_text(self) -> str:
+        return self.title if self.cached else self.live.window_text()
+
+    def is_visible(self) -> bool:
+        return self.visible if self.cached else self.live.is_visible()
+
+    def is_enabled(self) -> bool:
+        return self.enabled if self.cached else self.live.is_enabled()
+
+    def __getattr__(self, name: str) -> Any:
+        attr = getattr(self.live, name)
+        if name not in ACTIONS or not callable(attr):
+            return attr
+
+        def action(*args, **kwargs) -> Any:
+            self.snapshot.stale = True
+            return attr(*args, **kwargs)
+
+        return action
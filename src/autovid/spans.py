@@ -0,0 +1,221 @@
+import json
+import logging
+import math
+from collections.abc import Callable, Iterable, Iterator
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+from autovid.common import count_retries
+from autovid.waits import SYSTEM_CLOCK, Clock, Waiter
+
+if TYPE_CHECKING:
+    # events pulls in socket and queue, only needed once there's a bus
+    from autovid.events import EventBus
+
+lg = logging.getLogger(__name__)
+
+
+@dataclass
+class Span:
+    """Time spent in one step of a job, including its retries and UI waits"""
+
+    name: str
+    duration: float = 0.0
+    ok: bool = True
+    error: str | None = None
+    retries: int = 0
+    waits: int = 0
+    waited: float = 0.0
+    calls: int = 0  # UI automation round trips, if the backend counts them
+
+
+@dataclass
+class JobTrace:
+    job: str
+    started: str = field(default_factory=lambda: datetime.now().isoformat())
+    duration: float = 0.0
+    ok: bool = True
+    spans: list[Span] = field(default_factory=list)
+
+
+class Tracer:
+    """
+    Times each step of a job and writes one JSON line per job
+
+    Retries made on the span's own thread (see common.count_retries) and UI waits
+    (from the Waiter's totals) that happen inside a span are attributed to it, and
+    so are UI automation calls when there's a call counter (e.g.
+    SimBackend.total_calls). With a bus every span publishes
+    StepStarted/StepFinished, and Progress if the job's step count is known.
+    """
+
+    def __init__(
+        self,
+        waiter: Waiter | None = None,
+        path: Path | str | None = None,
+        clock: Clock = SYSTEM_CLOCK,
+        bus: "EventBus | None" = None,
+        calls: Callable[[], int] | None = None,
+    ) -> None:
+        """
+        Parameters
+        ----------
+
+        waiter: Waiter, optional
+            Waiter whose records are attributed to the spans
+        path: Path | str, optional
+            JSON lines file job traces are appended to. Not written if None
+        bus: EventBus, optional
+            Bus step events are published to
+        calls: Callable[[], int], optional
+            Running count of UI automation calls
+        """
+        self.waiter = waiter
+        self.path = Path(path) if path else None
+        self.clock = clock
+        self.bus = bus
+        self.calls = calls
+        self.current: JobTrace | None = None
+        self.last: JobTrace | None = None
+        self.steps: int | None = None
+
+    @contextmanager
+    def span(self, name: str) -> Iterator[Span]:
+        span = Span(name=name)
+        waits = self.waiter.count if self.waiter else 0
+        waited = self.waiter.waited if self.waiter else 0.0
+        calls = self.calls() if self.calls else 0
+        start = self.clock.monotonic()
+        job = self.current.job if self.current else None
+        if self.bus:
+            from autovid.events import Progress, StepFinished, StepStarted
+
+            self.bus.publish(StepStarted(step=name, job=job))
+
+        with count_retries() as retries:
+            try:
+                yield span
+            except BaseException as err:
+                span.ok = False
+                span.error = f"{type(err).__name__}: {err}"
+                raise
+            finally:
+                span.duration = self.clock.monotonic() - start
+                span.retries = retries[0]
+                if self.calls:
+                    span.calls = self.calls() - calls
+                if self.waiter:
+                    span.waits = self.waiter.count - waits
+                    span.waited = self.waiter.waited - waited
+
+                if self.current is not None:
+                    self.current.spans.append(span)
+                lg.debug(f"{name} took {span.duration:.2f}s")
+
+                if self.bus:
+                    self.bus.publish(
+                        StepFinished(
+                            step=name,
+                            job=job,
+                            ok=span.ok,
+                            duration=span.duration,
+                            error=span.error,
+                        )
+                    )
+                    if self.steps and self.current is not None:
+                        done = min(len(self.current.spans), self.steps)
+                        self.bus.publish(Progress(done=done, total=self.steps, job=job))
+
+    @contextmanager
+    def job(self, name: str, steps: int | None = None) -> Iterator[JobTrace]:
+        """
+        Collects the spans of one job and writes them out when it finishes
+
+        steps is how many spans the job is expected to have, for Progress events
+        """
+        trace = self.current = JobTrace(job=name)
+        self.steps = steps
+        start = self.clock.monotonic()
+
+        try:
+            yield trace
+        except BaseException:
+            trace.ok = False
+            raise
+        finally:
+            trace.duration = self.clock.monotonic() - start
+            self.current = self.steps = None
+            self.last = trace
+            self.write(trace)
+
+    def write(self, trace: JobTrace) -> None:
+        if self.path is None:
+            return
+
+        with self.path.open("a", encoding="utf-8") as f:
+            f.write(json.dumps(asdict(trace)) + "\n")
+
+
+def load_traces(paths: Iterable[Path | str]) -> Iterator[dict[str, Any]]:
+    for path in paths:
+        with Path(path).open(encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+
+def percentile(values: list[float], pct: float) -> float:
+    """Nearest-rank percentile of already sorted values"""
+    if not values:
+        return math.nan
+
+    rank = math.ceil(pct / 100 * len(values))
+    return values[max(rank, 1) - 1]
+
+
+def summarize(traces: Iterable[dict[str, Any]]) -> dict[str, dict[str, float]]:
+    """count, p50, p95, max, retries, wait seconds and UI calls per step and job"""
+    durations: dict[str, list[float]] = {}
+    totals: dict[str, dict[str, float]] = {}
+
+    for trace in traces:
+        durations.setdefault("job", []).append(trace["duration"])
+        for span in trace["spans"]:
+            durations.setdefault(span["name"], []).append(span["duration"])
+            stats = totals.setdefault(
+                span["name"], {"retries": 0, "waited": 0.0, "calls": 0}
+            )
+            stats["retries"] += span["retries"]
+            stats["waited"] += span["waited"]
+            stats["calls"] += span.get("calls", 0)
+
+    output = {}
+    for name, values in durations.items():
+        values.sort()
+        output[name] = {
+            "count": len(values),
+            "p50": percentile(values, 50),
+            "p95": percentile(values, 95),
+            "max": values[-1],
+            **totals.get(name, {"retries": 0, "waited": 0.0, "calls": 0}),
+        }
+
+    return output
+
+
+def format_report(summary: dict[str, dict[str, float]]) -> str:
+    """Plain text table of summarize(), slowest steps (by p50) first"""
+    header = f"{'step':<20}{'count':>7}{'p50':>9}{'p95':>9}{'max':>9}"
+    header += f"{'retries':>9}{'waited':>9}{'calls':>9}"
+    lines = [header, "-" * len(header)]
+
+    for name, x in sorted(summary.items(), key=lambda x: -x[1]["p50"]):
+        lines.append(
+            f"{name:<20}{x['count']:>7}{x['p50']:>9.2f}{x['p95']:>9.2f}"
+            f"{x['max']:>9.2f}{x['retries']:>9}{x['waited']:>9.2f}{x['calls']:>9}"
+        )
+
+    return "\n".join(lines)
@@ -0,0 +1,127 @@
+from __future__ import annotations
+
+import logging
+import re
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from autovid.batch import AutoVidBatch
+from autovid.jobs import Job, JobResult
+from autovid.waits import Cancelled
+
+lg = logging.getLogger(__name__)
+
+TimeRange = datetime | tuple[datetime, datetime]
+
+
+def _window(when: TimeRange, lookback: timedelta | int) -> tuple[datetime, timedelta]:
+    """(event_dt, event_td_range) for a point in time or a (start, end) range"""
+    if isinstance(when, tuple):
+        start, end = when
+        if end < start:
+            raise ValueError(f"Time range ends before it starts: {start} to {end}")
+        return start + (end - start) / 2, (end - start) / 2
+
+    if isinstance(lookback, int):
+        lookback = timedelta(seconds=lookback)
+
+    return when, lookback
+
+
+class SiteSurvey(AutoVidBatch):
+    """
+    Exports one frame from every matching camera of a site
+
+    The site's cameras come from a single CameraDirectory lookup. The site is
+    selected once and each camera is selected, time ranged and exported in turn
+    without a reset in between, so a survey costs one site load instead of one
+    full pull_image cycle per camera. After a failure VERINT is reset and the
+    site is selected again for the remaining cameras.
+    """
+
+    def __init__(self, outdir: Path | str, **kwargs) -> None:
+        """
+        Parameters
+        ----------
+
+        outdir: Path | str
+            Output directory of images
+        directory: CameraDirectory | Path | str, optional
+            Site -> cameras lookup. Defaults to an in-memory snapshot of the VERINT DB
+        """
+        super().__init__(jobs=[], outdir=outdir, **kwargs)
+
+    def cameras(self, site_id: str, camera_regex: str | re.Pattern = ".*") -> list[str]:
+        """Cameras of a site whose name matches camera_regex (re.search)"""
+        if self.directory is None:
+            from autovid.directory import CameraDirectory
+
+            self.directory = CameraDirectory()
+
+        pattern = re.compile(camera_regex)
+        return [x for x in self.directory.site_cameras(site_id) if pattern.search(x)]
+
+    def survey(
+        self,
+        site_id: str,
+        camera_regex: str | re.Pattern,
+        when: TimeRange,
+        lookback: timedelta | int = timedelta(seconds=5),
+        jira_id: str | None = None,
+    ) -> list[JobResult]:
+        """
+        Exports a frame per matching camera at when, a datetime or (start, end)
+
+        lookback is the buffer either side of a datetime and is ignored for a
+        range. Each camera's outcome is appended to the results CSV.
+        """
+        event_dt, event_td_range = _window(when, lookback)
+        cameras = self.cameras(site_id, camera_regex)
+        if not cameras:
+            raise ValueError(f"No cameras of {site_id} match {camera_regex!r}")
+
+        lg.info(f"Surveying {len(cameras)} cameras of {site_id}")
+        if self.app is None:
+            self.start()
+
+        outputs: list[JobResult] = []
+        for camera in cameras:
+            job = Job(camera, event_dt, event_td_range, jira_id)
+            result = JobResult(job=job, ok=False, site_id=site_id)
+
+            try:
+                result.output = self.run_job(job, site_id)
+                result.ok = True
+
+            except Cancelled:
+                self.cleanup()
+                raise
+
+            except Exception as err:  # noqa: BLE001
+                lg.error(f"Camera {camera} failed: {err}")
+                result.error = f"{type(err).__name__}: {err}"
+                self.recover()
+
+            self._finish(result, outputs)
+
+        if self.frames is not None:
+            self.frames.wait()
+
+        lg.info(f"Finished survey: {sum(x.ok for x in outputs)}/{len(outputs)} cameras")
+        return outputs
+
+
+def survey(
+    site_id: str,
+    camera_regex: str | re.Pattern,
+    when: TimeRange,
+    outdir: Path | str,
+    lookback: timedelta | int = timedelta(seconds=5),
+    **kwargs,
+) -> list[JobResult]:
+    """Runs a SiteSurvey in a fresh VERINT session and closes it afterwards"""
+    site_survey = SiteSurvey(outdir=outdir, **kwargs)
+    try:
+        return site_survey.survey(site_id, camera_regex, when, lookback=lookback)
+    finally:
+        site_survey.close()
@@ -0,0 +1,191 @@
+import logging
+from bisect import bisect_left
+from collections import Counter
+from collections.abc import Iterable, Iterator
+from dataclasses import dataclass
+from enum import IntEnum
+
+lg = logging.getLogger(__name__)
+
+
+class MatchKind(IntEnum):
+    """How a camera name matched a terminal. Lower values rank first"""
+
+    EXACT = 0
+    PREFIX = 1
+    SUBSTRING = 2
+    FUZZY = 3
+
+
+@dataclass(frozen=True)
+class Candidate:
+    name: str
+    kind: MatchKind
+    score: float
+
+    @property
+    def rank(self) -> tuple[MatchKind, float, str]:
+        return (self.kind, -self.score, self.name)
+
+
+@dataclass(frozen=True)
+class TermMatch:
+    term: str
+    best: Candidate | None
+    alternatives: tuple[Candidate, ...] = ()
+
+    @property
+    def candidates(self) -> tuple[Candidate, ...]:
+        return (self.best, *self.alternatives) if self.best else ()
+
+    @property
+    def resolved(self) -> str | None:
+        """
+        The camera name if the match is unambiguous
+
+        An exact match always wins, otherwise there must be exactly one candidate
+        """
+        if self.best is None:
+            return None
+
+        if self.best.kind == MatchKind.EXACT or not self.alternatives:
+            return self.best.name
+
+        return None
+
+
+def _grams(folded: str, n: int = 3) -> set[str]:
+    if len(folded) <= n:
+        return {folded}
+
+    return {folded[i : i + n] for i in range(len(folded) - n + 1)}
+
+
+class TermIndex:
+    """
+    In-process n-gram + prefix index over camera names
+
+    Replaces LIKE '%term%' scans. Candidates are ranked exact, then prefix, then
+    substring, then fuzzy (trigram dice similarity).
+    """
+
+    def __init__(self, names: Iterable[str], min_score: float = 0.5) -> None:
+        self.min_score = min_score
+        self.names: list[str] = sorted(set(names))
+        self._folded: list[str] = [x.casefold() for x in self.names]
+
+        # Prefix and substring candidates are walked in rank order (shortest first)
+        # so a lookup can stop at its limit: gram postings are sorted by length and
+        # the names of each length are kept sorted for bisecting
+        def rank(idx: int) -> tuple[int, int]:
+            return len(self._folded[idx]), idx
+
+        self._exact: dict[str, list[int]] = {}
+        self._grams: dict[str, list[int]] = {}
+        for idx, folded in enumerate(self._folded):
+            self._exact.setdefault(folded, []).append(idx)
+            for gram in _grams(folded):
+                self._grams.setdefault(gram, []).append(idx)
+        for posting in self._grams.values():
+            posting.sort(key=rank)
+
+        self._by_length: dict[int, list[tuple[str, int]]] = {}
+        for idx, folded in enumerate(self._folded):
+            self._by_length.setdefault(len(folded), []).append((folded, idx))
+        for by_name in self._by_length.values():
+            by_name.sort()
+        self._lengths = sorted(self._by_length)
+
+        # Grams shared by most names ("atm") add little signal to fuzzy scoring
+        self._common_cutoff = max(50, len(self.names) // 10)
+        self.visited = 0  # Names looked at by prefix and substring lookups
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def _prefixed(self, folded: str) -> Iterator[int]:
+        """Names starting with folded, shortest first"""
+        for length in self._lengths:
+            if length < len(folded):
+                continue
+
+            names = self._by_length[length]
+            i = bisect_left(names, (folded, -1))
+            while i < len(names) and names[i][0].startswith(folded):
+                self.visited += 1
+                yield names[i][1]
+                i += 1
+
+    def _containing(self, folded: str) -> Iterator[int]:
+        """Names containing folded, shortest first"""
+        if len(folded) >= 3:
+            # Every match has all of folded's grams, the rarest one has fewest names
+            names = min((self._grams.get(x, []) for x in _grams(folded)), key=len)
+        else:
+            names = (x for n in self._lengths for _, x in self._by_length[n])
+
+        for idx in names:
+            self.visited += 1
+            if folded in self._folded[idx]:
+                yield idx
+
+    def _similar(self, folded: str) -> list[tuple[int, float]]:
+        grams = _grams(folded)
+        shared: Counter[int] = Counter()
+        for gram in grams:
+            posting = self._grams.get(gram, [])
+            if len(posting) <= self._common_cutoff:
+                shared.update(posting)
+
+        found = []
+        for idx, _ in shared.most_common():
+            other = _grams(self._folded[idx])
+            score = 2 * len(grams & other) / (len(grams) + len(other))
+            if score >= self.min_score:
+                found.append((idx, score))
+
+        return found
+
+    def match(self, term: str, limit: int | None = 10, fuzzy: bool = True) -> TermMatch:
+        folded = term.strip().casefold()
+        ranked: dict[int, Candidate] = {}
+
+        if not folded:
+            return TermMatch(term=term, best=None)
+
+        def add(idx: int, kind: MatchKind, score: float) -> None:
+            candidate = Candidate(name=self.names[idx], kind=kind, score=score)
+            if idx not in ranked or candidate.rank < ranked[idx].rank:
+                ranked[idx] = candidate
+
+        def full() -> bool:
+            return limit is not None and len(ranked) >= limit
+
+        for idx in self._exact.get(folded, []):
+            add(idx, MatchKind.EXACT, 1.0)
+
+        # Both come shortest first and every prefix match outranks every substring
+        # match, so nothing past the first limit candidates can make the cut
+        for kind, found in (
+            (MatchKind.PREFIX, self._prefixed(folded)),
+            (MatchKind.SUBSTRING, self._containing(folded)),
+        ):
+            if full():
+                break
+            for idx in found:
+                add(idx, kind, len(folded) / len(self._folded[idx]))
+                if full():
+                    break
+
+        if fuzzy and not ranked:
+            for idx, score in self._similar(folded):
+                add(idx, MatchKind.FUZZY, score)
+
+        candidates = sorted(ranked.values(), key=lambda x: x.rank)[:limit]
+
+        if not candidates:
+            return TermMatch(term=term, best=None)
+
+        return TermMatch(
+            term=term, best=candidates[0], alternatives=tuple(candidates[1:])
+        )
@@ -0,0 +1,45 @@
+# Every VERINT UI path used by the automation. If a VERINT update moves something
+# around, this is the only place that should need patching. See locators.parse_path
+# for the syntax: "ClassName{Title}[index] > ...", "*" is any class.
+from autovid.locators import LocatorSpec
+
+VERINT_LOCATORS: LocatorSpec = {
+    "tab_control": (None, "TabControl"),
+    "login_button": ("tab_control", "*[0] > LoginDialog > *{Login}"),
+    # Dashboard tab
+    "verint_tab": ("tab_control", "TabItem[0]"),
+    "searchbox": ("verint_tab", "TextBox"),
+    "cards_menu": ("verint_tab", "Menu > MenuItem"),
+    "site_results": ("verint_tab", "ListView > ListBoxItem[*]"),
+    # Video tab
+    "video_tab": ("tab_control", "TabItem[1]"),
+    "video_tab_strip": ("tab_control", "*[1] > *[1] > *[1]"),
+    "open_video_tabs": ("video_tab_strip", "VideoTabItem[*]"),
+    "video_tab_control": ("video_tab", "VideoTabControl"),
+    "dvr_tree": ("video_tab_control", "Expander > DvrTree"),
+    "workspace_tab": ("dvr_tree", "TabControl > TabItem[1]"),
+    "open_workspaces": (
+        "workspace_tab",
+        "ScrollViewer > TreeView > TreeViewItem{Verint.Database.WrapperClasses.DvrNode}[*]",
+    ),
+    "video_tabcontainer": ("video_tab_control", "*[1] > VideoRequest"),
+    "hide_history_button": (
+        "video_tabcontainer",
+        "Expander > ScrollViewer > DvrVideoDirectoryControl > Button",
+    ),
+    "camera_pane": ("video_tabcontainer", "ScrollViewer"),
+    "camera_textbox": ("camera_pane", "TextBox"),
+    "camera_results": ("camera_pane", "ListBox > ListBoxItem[*]"),
+    "recorded_video": ("video_tabcontainer", "Expander{Recorded Video}"),
+    "datebox": ("recorded_video", "TextBox"),
+    "recorded_button": ("recorded_video", "Button[1]"),
+    # Video player
+    "dvr_player": ("video_tab", "*[0] > *[1] > DvrVideoPlayer"),
+    "skip_to_beginning": ("dvr_player", "Button[6]"),
+    # Playback position over the loaded range, seeked through its RangeValue pattern
+    "position_slider": ("dvr_player", "Slider"),
+    "video_menu": ("dvr_player", "VideoContainer > Menu > *[0]"),
+    # Save Image dialog
+    "save_image_dialog": (None, "Window{Save Image}"),
+    "save_image_name": ("save_image_dialog", "ExportFrameDialog > TextBox"),
+}
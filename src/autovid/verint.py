@@ -1,17 +1,49 @@
+from __future__ import annotations
+
 import logging
-import sys
-import time
+import sqlite3
+from collections.abc import Callable, Iterator, Sequence
+from contextlib import AbstractContextManager, nullcontext
 from datetime import datetime, timedelta
 from pathlib import Path
+from typing import TYPE_CHECKING, Any, overload
 
-from autovid.common import retry
+from autovid.backends import Backend, get_backend
+from autovid.common import Ambiguous, job_budget, retry, term2site
+from autovid.events import EventBus
+from autovid.locators import LocatorCache, LocatorEngine
+from autovid.spans import Tracer
+from autovid.uimap import VERINT_LOCATORS
+from autovid.waits import CancelToken, Waiter
 
-sys.coinit_flags = 2  # Single-threaded COM helps with stability
+if TYPE_CHECKING:
+    from pywinauto import Application, WindowSpecification
 
-from pywinauto import Application, Desktop, WindowSpecification, findwindows
+    from autovid.cache import ExportCache
+    from autovid.directory import CameraDirectory
 
 lg = logging.getLogger(__name__)
 
+# Seconds to look for optional UI, like a login dialog that may already be gone
+PROBE_TIMEOUT = 2
+
+# Seconds all retries of one job may take together, see common.job_budget
+JOB_BUDGET = 300
+
+
+def time_range(
+    event_dt: datetime, event_td_range: timedelta
+) -> tuple[datetime, datetime]:
+    """
+    The (start, end) VERINT actually loads for event_dt +/- event_td_range
+
+    The datebox only takes minutes, so both ends are truncated to the minute and
+    any two requests with the same range export the same frame.
+    """
+    start = (event_dt - event_td_range).replace(second=0, microsecond=0)
+    end = (event_dt + event_td_range).replace(second=0, microsecond=0)
+    return start, end
+
 
 class VERINT:
     """
@@ -31,6 +63,11 @@ class VERINT:
         Saved an copy of the image
     """
 
+    # Check the executable and clear other VERINT instances when constructed.
+    # Subclasses that may never start VERINT (e.g. on a cache hit) turn it off and
+    # call _chk_exec just before init_app
+    check_on_init = True
+
     def __init__(
         self,
         outdir: Path | str,
@@ -39,6 +76,15 @@ class VERINT:
         ),
         verint_exe: str = r"Verint.VideoInvestigator.exe",
         verint_title: str = r"Video Inspector",
+        waiter: Waiter | None = None,
+        spans: Path | str | None = None,
+        backend: Backend | None = None,
+        events: EventBus | None = None,
+        cancel: CancelToken | None = None,
+        cache: ExportCache | Path | str | None = None,
+        directory: CameraDirectory | Path | str | None = None,
+        prefetch: bool = True,
+        retry_budget: float | None = JOB_BUDGET,
     ) -> None:
         """
         Parameters
@@ -52,6 +98,26 @@ class VERINT:
             Name of VERINT application executable located in application directory
         verint_title:  str, optionai
             Application title. Used to find multiple instances of VERINT.
+        waiter: Waiter, optional
+            Polls the UI for conditions. Holds a record of every wait
+        spans: Path | str, optional
+            JSON lines file of per-step timings. Defaults to outdir/autovid_spans.jsonl
+        backend: Backend, optional
+            UI automation backend. Defaults to get_backend(), i.e. AUTOVID_BACKEND or uia
+        events: EventBus, optional
+            Bus step, status and progress events are published to
+        cancel: CancelToken, optional
+            Aborts any wait, sleep or retry in progress once cancelled
+        cache: ExportCache | Path | str, optional
+            Cache (or its directory) of earlier exports, consulted before VERINT is
+        directory: CameraDirectory | Path | str, optional
+            Local snapshot (or its SQLite file) terminals are resolved to sites from.
+            Without one every lookup queries the VERINT database
+        prefetch: bool, optional
+            Fetch the subtrees of steps like reset_state in one request each, if the
+            backend can (see LocatorEngine.prefetch)
+        retry_budget: float, optional
+            Seconds every retry within one job may take in total. None for no limit
         """
 
         if isinstance(verint_path, str):
@@ -63,13 +129,77 @@ class VERINT:
         self.verint_full_path: Path = self.verint_path / self.verint_exe
 
         self.outdir: Path | str = outdir
+        self.backend: Backend = backend or get_backend()
 
         self.app: Application = None
         self.verint: WindowSpecification = None
+        self.locators = LocatorCache()
+        self.ui = LocatorEngine(
+            VERINT_LOCATORS,
+            root=lambda: self.verint,
+            cache=self.locators,
+            snapshot=getattr(self.backend, "snapshot", None) if prefetch else None,
+        )
+        self.cancel = cancel or CancelToken()
+        self.wait = waiter or Waiter()
+        self.wait.cancel = self.wait.cancel or self.cancel
+        self.wait.on_retry.append(self.ui.refresh)
 
-        self._chk_exec()
+        if self.check_on_init:
+            self._chk_exec()
         self._chk_outdir()
 
+        if isinstance(cache, (Path, str)):
+            from autovid.cache import ExportCache
+
+            cache = ExportCache(cache)
+        self.cache: ExportCache | None = cache
+
+        if isinstance(directory, (Path, str)):
+            from autovid.directory import CameraDirectory
+
+            directory = CameraDirectory(path=directory)
+        self.directory: CameraDirectory | None = directory
+
+        self.retry_budget = retry_budget
+        self.events = events or EventBus()
+        self.trace = Tracer(
+            waiter=self.wait,
+            path=spans or Path(self.outdir) / "autovid_spans.jsonl",
+            clock=self.wait.clock,
+            bus=self.events,
+            calls=(
+                (lambda: self.backend.total_calls)
+                if hasattr(self.backend, "total_calls")
+                else None
+            ),
+        )
+
+    @overload
+    def term2site(self, term_str: str) -> str | None: ...
+
+    @overload
+    def term2site(
+        self, term_str: list[str] | set[str]
+    ) -> dict[str, str | None | Ambiguous]: ...
+
+    def term2site(
+        self, term_str: str | list[str] | set[str]
+    ) -> str | None | dict[str, str | None | Ambiguous]:
+        """common.term2site, served from the directory when there is one"""
+        if self.directory is not None:
+            return self.directory.term2site(term_str)
+
+        return term2site(term_str)
+
+    def job_budget(self) -> AbstractContextManager[None]:
+        """Caps the retries of everything inside the block at retry_budget seconds"""
+        if self.retry_budget is None:
+            return nullcontext()
+
+        # On the system clock like the @retry policies of the methods it caps
+        return job_budget(self.retry_budget)
+
     def _chk_outdir(self) -> None:
         if not self.outdir:
             raise ValueError(
@@ -94,12 +224,12 @@ class VERINT:
 
     def init_app(self, wm: tuple[int, int, int, int] | None = None) -> None:
         lg.info("Initializing and launching VERINT...")
-        app = Application(backend="uia").start(
+        app = self.backend.application().start(
             cmd_line=str(self.verint_full_path), work_dir=str(self.verint_path)
         )
 
-        app.wait_cpu_usage_lower(threshold=2.5, timeout=30)
         verint: WindowSpecification = app.VideoInspect
+        self.wait.until(lambda: verint.exists(timeout=0), timeout=60, name="init_app")
 
         if wm:
             verint.move_window(
@@ -115,11 +245,15 @@ class VERINT:
     @retry(max_retries=5, wait_time=5)
     def login(self) -> None:
         self.verint.set_focus()
-        self.app.wait_cpu_usage_lower(threshold=2.5, timeout=30)
-        login_button = self._ret_login_button()
+        login_button = self._wait_for(
+            "login_button", "visible", timeout=PROBE_TIMEOUT, required=False
+        )
+        if login_button is None:
+            lg.info("No login dialog, VERINT is already logged in")
+            return
 
-        if login_button.is_visible():
-            login_button.click()
+        login_button.click()
+        self.wait.gone(login_button, name="login_done")
 
     def _kill_app(self, restart: bool = False) -> None:
         lg.info("Killing VERINT instance.")
@@ -131,14 +265,63 @@ class VERINT:
         else:
             self.app = None
             self.verint = None
+            self.locators.invalidate()
 
         if restart:
             lg.info("Restarting VERINT. Please wait...")
             self._chk_exec()
 
+    def cleanup(self) -> None:
+        """
+        Fast path after a cancel, never waits or retries
+
+        Dismisses the Save Image dialog and any popup an aborted step left open so
+        VERINT can be reset and reused instead of killed.
+        """
+        if self.verint is None:
+            return
+
+        self.locators.invalidate()
+        try:
+            dialog = self.ui.resolve("save_image_dialog")
+            if dialog.is_visible():
+                dialog.type_keys("{ESC}")
+        except Exception as err:  # noqa: BLE001
+            lg.debug(f"No Save Image dialog to close: {err}")
+
+        popup = self.backend.desktop().window(title="", class_name="Popup", depth=1)
+        try:
+            if popup.exists(timeout=0):
+                popup.type_keys("{ESC}")
+        except Exception as err:  # noqa: BLE001
+            lg.debug(f"No popup to close: {err}")
+
+    def _cached(
+        self, camera: str, event_dt: datetime, event_td_range: timedelta, fl_name: str
+    ) -> Path | None:
+        """Copies a cached export to outdir/fl_name.jpg, None without one"""
+        if self.cache is None:
+            return None
+
+        with self.trace.span("cache"):
+            return self.cache.fetch(
+                camera, event_dt, event_td_range, Path(self.outdir) / f"{fl_name}.jpg"
+            )
+
+    def _store(
+        self, camera: str, event_dt: datetime, event_td_range: timedelta, output: Path
+    ) -> None:
+        if self.cache is None:
+            return
+
+        try:
+            self.cache.put(camera, event_dt, event_td_range, output)
+        except (OSError, sqlite3.Error) as err:
+            lg.warning(f"Unable to cache {output}: {err}")
+
     def _chk_multi_instances(self, clear: bool = True) -> None:
         lg.info("Checking for multiple instances of VERINT..")
-        instances = Desktop(backend="uia").windows(title=self.verint_title)
+        instances = self.backend.desktop().windows(title=self.verint_title)
 
         if len(instances) > 0:
             if not clear:
@@ -149,179 +332,135 @@ class VERINT:
             lg.info(f"Killing {len(instances)} instances of VERINT.")
             for instance in instances:
                 pid = instance.process_id()
-                inst_process = Application(backend="uia").connect(process=pid)
+                inst_process = self.backend.application().connect(process=pid)
                 inst_process.kill()
 
-    @retry(max_retries=10, wait_time=1)
-    def _ret_login_button(self) -> WindowSpecification:
-        out_val = (
-            self.verint.children(class_name="TabControl")[0]
-            .children()[0]
-            .children(class_name="LoginDialog")[0]
-            .children(title="Login")[0]
-        )
-
-        return out_val
-
-    @retry(max_retries=10, wait_time=1)
-    def _ret_video_tab(self) -> WindowSpecification:
-        out_val = self.verint.children(class_name="TabControl")[0].children(
-            class_name="TabItem"
-        )[1]
-
-        return out_val
-
-    @retry(max_retries=10, wait_time=1)
-    def _ret_verint_tab(self) -> WindowSpecification:
-        out_val = self.verint.children(class_name="TabControl")[0].children(
-            class_name="TabItem"
-        )[0]
-
-        return out_val
+    def _wait_for(
+        self,
+        name: str,
+        state: str = "exists",
+        timeout: float = 30,
+        required: bool = True,
+    ) -> Any:
+        """
+        Waits for a VERINT_LOCATORS entry to exist, be visible or be enabled
 
-    @retry(max_retries=10, wait_time=1)
-    def _ret_video_tabcontainer(self) -> WindowSpecification:
-        out_val = (
-            (self._ret_video_tab())
-            .children(class_name="VideoTabControl")[0]
-            .children()[1]
-            .children(class_name="VideoRequest")[0]
+        Returns None on timeout instead of raising if it isn't required
+        """
+        condition = getattr(self.wait, state)
+        return condition(
+            lambda: self.ui.resolve(name),
+            timeout=timeout,
+            name=name,
+            required=required,
         )
 
-        return out_val
-
-    @retry(max_retries=10, wait_time=1)
-    def _ret_searchbox(self) -> WindowSpecification:
-        out_val = (self._ret_verint_tab()).children(class_name="TextBox")[0]
-
-        return out_val
-
     @retry(max_retries=3, wait_time=5)
     def reset_state(self) -> None:
-        self.app.wait_cpu_usage_lower(threshold=2.5, timeout=30)
+        self.locators.invalidate()
 
-        verint_tab = self._ret_verint_tab()
-        video_tab = self._ret_video_tab()
+        verint_tab = self._wait_for("verint_tab", "visible")
+        video_tab = self._wait_for("video_tab", "visible")
 
-        self.app.wait_cpu_usage_lower(threshold=2.5, timeout=30)
         self.verint.set_focus()
         video_tab.click_input()
         self._clear_tabs()
 
-        self.app.wait_cpu_usage_lower(threshold=2.5, timeout=30)
         self.verint.set_focus()
         verint_tab.click_input()
         self._clear_dashboard()
 
     def _clear_dashboard(self) -> None:
-        self.app.wait_cpu_usage_lower(threshold=2.5, timeout=30)
-
         self.verint.set_focus()
-        (self._ret_verint_tab()).click_input()
+        self.ui.resolve("verint_tab").click_input()
 
-        cards_menu = (
-            (self._ret_verint_tab())
-            .children(class_name="Menu")[0]
-            .children(class_name="MenuItem")[0]
-        )
+        with self.ui.prefetch("verint_tab"):
+            searchbox = self._wait_for(
+                "searchbox", "visible", timeout=PROBE_TIMEOUT, required=False
+            )
+            cards_menu = self.ui.resolve("cards_menu")
 
-        if (self._ret_searchbox()).is_visible():
+        if searchbox is not None:
             self.verint.set_focus()
-            (self._ret_searchbox()).click_input()
-            (self._ret_searchbox()).type_keys(r"^a {BACKSPACE}")  # Ctrl+A and Backspace
+            searchbox.click_input()
+            searchbox.type_keys(r"^a {BACKSPACE}")  # Ctrl+A and Backspace
 
         if cards_menu.is_visible():
             self.verint.set_focus()
             cards_menu.click_input()
-            time.sleep(1)
+            # Menu expansion isn't always exposed, worst case this is the old 1s sleep
+            self.wait.until(
+                cards_menu.is_expanded, timeout=1, name="cards_menu", required=False
+            )
             cards_menu.type_keys(r"{DOWN}{DOWN}{ENTER}")
 
     def _clear_tabs(self) -> None:
-        self.app.wait_cpu_usage_lower(threshold=2.5, timeout=30)
-        video_tab = self._ret_video_tab()
-
-        self.app.wait_cpu_usage_lower(threshold=2.5, timeout=30)
-        open_tabs = (
-            video_tab.parent()
-            .children()[1]
-            .children()[1]
-            .children()[1]
-            .children(class_name="VideoTabItem")
-        )
+        # Either list can legitimately be empty, so wait on their containers instead
+        self._wait_for("video_tab_control")
+
+        # The tabs and their close buttons come from one snapshot of the tab strip
+        with self.ui.prefetch("video_tab_strip"):
+            open_tabs = self.ui.resolve("open_video_tabs")
+            close_btns = [self.ui.find(x, "Button") for x in open_tabs]
 
-        for open_tab in open_tabs:
+        for open_tab, close_btn in zip(open_tabs, close_btns):
             self.verint.set_focus()
-            close_btn = open_tab.children(class_name="Button")[0]
             close_btn.click_input()
-            time.sleep(1)
+            self.wait.gone(open_tab, timeout=10, name="close_video_tab")
 
-        sidebar = (
-            (self._ret_video_tab())
-            .children(class_name="VideoTabControl")[0]
-            .children(class_name="Expander")[0]
-            .children(class_name="DvrTree")[0]
-        )
-
-        workspace_tab = sidebar.children(class_name="TabControl")[0].children(
-            class_name="TabItem"
-        )[1]
+        workspace_tab = self._wait_for("workspace_tab", "visible")
         workspace_tab.click_input()
 
-        self.app.wait_cpu_usage_lower(threshold=2.5, timeout=30)
-        open_workspaces = (
-            workspace_tab.children(class_name="ScrollViewer")[0]
-            .children(class_name="TreeView")[0]
-            .children(
-                class_name="TreeViewItem",
-                title="Verint.Database.WrapperClasses.DvrNode",
-            )
+        self.wait.exists(
+            lambda: self.ui.find(workspace_tab, "ScrollViewer > TreeView"),
+            name="workspace_tree",
         )
+        with self.ui.prefetch("workspace_tab"):
+            open_workspaces = self.ui.resolve("open_workspaces")
+            menus = [self.ui.find(x, "Menu") for x in open_workspaces]
 
-        for open_workspace in open_workspaces:
-            open_workspace.children(class_name="Menu")[0].click_input()
+        for open_workspace, menu in zip(open_workspaces, menus):
+            menu.click_input()
             open_workspace.set_focus()
             open_workspace.type_keys(r"{DOWN}{DOWN}{DOWN}{DOWN}{ENTER}")
-            time.sleep(1)
+            self.wait.gone(open_workspace, timeout=10, name="close_workspace")
 
     @retry(max_retries=2, wait_time=2)
     def select_site(self, site_id: str) -> None:
-        self.app.wait_cpu_usage_lower(threshold=2.5, timeout=30)
-
-        (self._ret_searchbox()).type_keys(
+        searchbox = self._wait_for("searchbox", "visible")
+        searchbox.type_keys(
             r"^a {BACKSPACE}" + str(site_id) + r"{ENTER}", with_spaces=True
         )  # Don't use f-strings
 
-        returned_results = (
-            (self._ret_verint_tab())
-            .children(class_name="ListView")[0]
-            .children(class_name="ListBoxItem")
+        returned_results = self.wait.until(
+            lambda: self.ui.resolve("site_results"),
+            timeout=15,
+            name="site_results",
+            required=False,
         )
 
         # TODO: Add logic for graceful Exceptionfor 0 results
-        if len(returned_results) != 1:
+        if not returned_results or len(returned_results) != 1:
             raise ValueError(
                 f"The site_id: {site_id} returned more than 1 result or none..."
             )
 
-        returned_result = returned_results[0]
-        site_result = returned_result.children(class_name="Expander")[0]
-        site_btn = site_result.children(class_name="Button")[0]
+        site_result = self.ui.find(returned_results[0], "Expander")
+        site_btn = self.ui.find(site_result, "Button")
 
         site_btn.toggle()
-        request_video = site_result.children(class_name="ListBox")[0].children(
-            class_name="ListBoxItem"
-        )[0]
+        request_video = self.wait.exists(
+            lambda: self.ui.find(site_result, "ListBox > ListBoxItem"),
+            name="request_video",
+        )
 
         request_video.click_input()
 
     def set_time_range(self, event_dt: datetime, event_td_range: timedelta) -> None:
-        self.app.wait_cpu_usage_lower(threshold=2.5, timeout=30)
-        prompt1_text = f"{(event_dt - event_td_range).strftime('%x %H:%M')} to {(event_dt + event_td_range).strftime('%x %H:%M')}"
+        start, end = time_range(event_dt, event_td_range)
+        prompt1_text = f"{start:%x %H:%M} to {end:%x %H:%M}"
 
-        video_tabcontainer = self._ret_video_tabcontainer()
-        datebox = video_tabcontainer.children(
-            class_name="Expander", title="Recorded Video"
-        )[0].children(class_name="TextBox")[0]
+        datebox = self._wait_for("datebox", "visible")
 
         datebox.set_focus()
         datebox.click_input()
@@ -337,98 +476,69 @@ class VERINT:
     @retry(max_retries=3, wait_time=5)
     def hide_vidhistory(self) -> None:
         # Prevents VERINT from emuerating video history saving CPU time
-        hide_button = (
-            (self._ret_video_tabcontainer())
-            .children(class_name="Expander")[0]
-            .children(class_name="ScrollViewer")[0]
-            .children(class_name="DvrVideoDirectoryControl")[0]
-            .children(class_name="Button")[0]
-        )
+        hide_button = self._wait_for("hide_history_button", "visible")
 
         hide_button.click_input()
 
     @retry(max_retries=3, wait_time=1)
     def select_camera(self, camera_name: str) -> None:
-        # self.app.wait_cpu_usage_lower(threshold=2.5, timeout=30)
-
         self.hide_vidhistory()
 
-        video_tabcontainer = (
-            (self._ret_video_tab())
-            .children(class_name="VideoTabControl")[0]
-            .children()[1]
-            .children(class_name="VideoRequest")[0]
-        )
-
-        camera_pane = video_tabcontainer.children(class_name="ScrollViewer")[0]
-        camera_textbox = camera_pane.children(class_name="TextBox")[0]
+        camera_textbox = self._wait_for("camera_textbox", "visible")
 
         camera_textbox.type_keys(
             r"^a {BACKSPACE}" + str(camera_name) + r"{ENTER}", with_spaces=True
         )
 
-        self.app.wait_cpu_usage_lower(threshold=2.5, timeout=30)
-        camera_button = camera_pane.children(class_name="ListBox")[0].children(
-            class_name="ListBoxItem"
-        )[0]
+        camera_button = self._wait_for("camera_results", timeout=15)[0]
 
         self.verint.set_focus()
         camera_button.click_input()
 
     def click_recorded_button(self) -> None:
-        self.app.wait_cpu_usage_lower(threshold=2.5, timeout=30)
-        time.sleep(2)
-        recorded_button = (
-            (self._ret_video_tabcontainer())
-            .children(class_name="Expander", title="Recorded Video")[0]
-            .children(class_name="Button")[1]
-        )
+        recorded_button = self._wait_for("recorded_button", "enabled")
 
         recorded_button.set_focus()
         recorded_button.click_input()
 
-    @retry(max_retries=3, wait_time=15)
+    @retry(max_retries=3, wait_time=5, budget=60)
     def videoview(self) -> None:
         # TODO: Actual error handling...
-        self.app.wait_cpu_usage_lower(threshold=2.5, timeout=30)
-
         # TODO: Below does full search and take too long.. Need to rewrite...
         video_notfound = self.verint.child_window(
             title="Video not found", control_type="Text", found_index=0, depth=3
         )
 
-        if video_notfound.exists():
+        def video_state() -> str | None:
+            if video_notfound.exists(timeout=0):
+                return "missing"
+
+            # The playback controls only enable once the video has loaded
+            skip = self.ui.resolve("skip_to_beginning")
+            return "ready" if skip.is_enabled() else None
+
+        if self.wait.until(video_state, timeout=60, name="videoview") == "missing":
             raise FileNotFoundError("Video could not be found")
 
-        self.app.wait_cpu_usage_lower(threshold=2.5, timeout=30)
-        dvr_player = (
-            (self._ret_video_tab())
-            .children()[0]
-            .children()[1]
-            .children(class_name="DvrVideoPlayer")[0]
-        )
+        dvr_player = self.ui.resolve("dvr_player")
 
         dvr_player.set_focus()
         dvr_player.type_keys(r"{SPACE}")
 
         # TODO: Map all buttons later...
-        skiptobeginning = dvr_player.children(class_name="Button")[6]
+        skiptobeginning = self.ui.resolve("skip_to_beginning")
         skiptobeginning.click_input()
 
     @retry(max_retries=3, wait_time=1)
-    def save_image(self, fl_name: str | None = None, overwrite: bool = True) -> None:
-        self.app.wait_cpu_usage_lower(threshold=2.5, timeout=30)
-
-        img_hwnd = self.verint.children(class_name="Window", title="Save Image")[0]
-        flname_textbox = img_hwnd.children(class_name="ExportFrameDialog")[0].children(
-            class_name="TextBox"
-        )[0]
+    def save_image(self, fl_name: str | None = None, overwrite: bool = True) -> Path:
+        img_hwnd = self._wait_for("save_image_dialog", "visible")
+        flname_textbox = self.ui.resolve("save_image_name")
 
         # Use the auto generated name
         if not fl_name:
             fl_name = flname_textbox.texts()[0]
 
-        full_flname: Path = self.outdir / str(fl_name) / ".jpg"
+        full_flname: Path = self.outdir / f"{fl_name}.jpg"
         if full_flname.exists() and not overwrite:
             raise ValueError(
                 f"{full_flname} exists already but you disabled overwriting..."
@@ -451,41 +561,179 @@ class VERINT:
             with_spaces=True,
         )
 
+        def dialog_closed() -> bool:
+            self._confirm_overwrite()
+            try:
+                return not img_hwnd.is_visible()
+            except Exception:  # noqa: BLE001
+                return True
+
+        self.wait.until(dialog_closed, timeout=30, name="save_image_done")
+        return full_flname
+
+    def _confirm_overwrite(self) -> None:
+        popup = self.backend.desktop().window(title="", class_name="Popup", depth=1)
+        if not popup.exists(timeout=0):
+            return
+
         try:
-            overwrite_prompt = (
-                Desktop(backend="uia")
-                .window(title="", class_name="Popup", depth=1)
-                .children()[0]
-                .children(class_name="Button", title="Yes")[0]
-            )
+            overwrite_prompt = popup.children()[0].children(
+                class_name="Button", title="Yes"
+            )[0]
 
             if overwrite_prompt.is_visible():
                 overwrite_prompt.click_input()
 
-        except findwindows.ElementNotFoundError:
+        except (self.backend.ElementNotFoundError, IndexError):
             pass
 
     @retry(max_retries=3, wait_time=10)
     def export_image_click(self) -> None:
-        self.app.wait_cpu_usage_lower(threshold=2.5, timeout=30)
+        dvr_player = self._wait_for("dvr_player", "visible")
+        vid_menu = self._wait_for("video_menu", "visible")
+
+        dvr_player.set_focus()
+        vid_menu.click_input()
 
-        dvr_player = (
-            (self._ret_video_tab())
-            .children()[0]
-            .children()[1]
-            .children(class_name="DvrVideoPlayer")[0]
+        export_item = (
+            self.backend.desktop()
+            .window(title="", class_name="Popup")
+            .child_window(class_name="TextBlock", title="Export Image", depth=5)
+        )
+        self.wait.until(
+            lambda: export_item.exists(timeout=0), timeout=10, name="export_menu"
         )
+        export_item.click_input()
 
-        vid_menu = (
-            dvr_player.children(class_name="VideoContainer")[0]
-            .children(class_name="Menu")[0]
-            .children()[0]
+    def export_frame(
+        self,
+        event_dt: datetime,
+        event_td_range: timedelta,
+        fl_name: str | None = None,
+        status: Callable[[str], None] = lg.info,
+    ) -> Path:
+        """Loads the selected camera's video around event_dt and saves a frame"""
+        status("Input Datetime Range")
+        with self.trace.span("set_time_range"):
+            self.set_time_range(event_dt=event_dt, event_td_range=event_td_range)
+
+        status("Clicking the Recorded Button")
+        with self.trace.span("recorded"):
+            self.click_recorded_button()
+
+        status("Pulling Up Video. Please wait...")
+        with self.trace.span("videoview"):
+            self.videoview()
+
+        status("Starting the Export Image Process")
+        with self.trace.span("export"):
+            self.export_image_click()
+
+        status(f"Saving the Image to {self.outdir}")
+        with self.trace.span("save"):
+            return self.save_image(fl_name=fl_name)
+
+    def seek(self, fraction: float) -> None:
+        """Moves the paused player to a fraction (0-1) of the loaded time range"""
+        slider = self._wait_for("position_slider", "enabled")
+        low, high = slider.min_value(), slider.max_value()
+        target = low + (high - low) * min(max(fraction, 0.0), 1.0)
+
+        slider.set_value(target)
+        self.wait.until(
+            lambda: abs(slider.value() - target) <= (high - low) / 1000,
+            timeout=10,
+            name="seek",
         )
 
-        dvr_player.set_focus()
-        vid_menu.click_input()
+    def export_frames(
+        self,
+        start: datetime,
+        end: datetime,
+        samples: Sequence[tuple[datetime, str]],
+        status: Callable[[str], None] = lg.info,
+    ) -> Iterator[Path]:
+        """
+        Loads start..end once and saves a frame per (timestamp, fl_name) sample
+
+        set_time_range only takes minutes, so the range is widened to whole minutes
+        and each timestamp is mapped onto the position slider within it. Samples
+        are exported in the order given and each image is yielded once saved.
+        """
+        first = start.replace(second=0, microsecond=0)
+        last = end.replace(second=0, microsecond=0)
+        if last < end or last == first:
+            last += timedelta(minutes=1)
+
+        status(f"Loading {first:%x %H:%M} to {last:%x %H:%M}")
+        with self.trace.span("set_time_range"):
+            self.set_time_range(first + (last - first) / 2, (last - first) / 2)
+        with self.trace.span("recorded"):
+            self.click_recorded_button()
+        with self.trace.span("videoview"):
+            self.videoview()
+
+        for when, fl_name in samples:
+            status(f"Exporting the frame at {when:%x %H:%M:%S}")
+            with self.trace.span("seek"):
+                self.seek((when - first) / (last - first))
+            with self.trace.span("export"):
+                self.export_image_click()
+            with self.trace.span("save"):
+                output = self.save_image(fl_name=fl_name)
+
+            yield output
+
+    def sweep(
+        self,
+        start: datetime,
+        end: datetime,
+        every: timedelta | int,
+        prefix: str,
+        status: Callable[[str], None] = lg.info,
+    ) -> list[Path]:
+        """
+        Saves a frame every `every` (seconds if int) from start to end inclusive
+
+        The selected camera's video is loaded once. Images are named
+        {prefix}_{YYYYmmdd_HHMMSS}, with milliseconds added if needed.
+        """
+        if isinstance(every, int):
+            every = timedelta(seconds=every)
+        if every <= timedelta(0):
+            raise ValueError(f"Sweep interval must be positive, got {every}")
+
+        samples = []
+        when = start
+        while when <= end:
+            name = f"{prefix}_{when:%Y%m%d_%H%M%S}"
+            if when.microsecond:
+                name += f"_{when.microsecond // 1000:03d}"
+            samples.append((when, name))
+            when += every
+
+        return list(self.export_frames(start, end, samples, status))
+
+    def pull_frame(
+        self,
+        site_id: str,
+        camera_name: str,
+        event_dt: datetime,
+        event_td_range: timedelta,
+        fl_name: str | None = None,
+        status: Callable[[str], None] = lg.info,
+    ) -> Path:
+        """
+        Exports a single frame from an already logged in and reset VERINT
+
+        Runs select_site through save_image and returns the saved image path
+        """
+        status(f"Found Site: {site_id}")
+        with self.trace.span("select_site"):
+            self.select_site(site_id)
+
+        status(f"Finding DVR Camera: {camera_name}")
+        with self.trace.span("select_camera"):
+            self.select_camera(camera_name=camera_name)
 
-        self.app.wait_cpu_usage_lower(threshold=2.5, timeout=30)
-        Desktop(backend="uia").window(title="", class_name="Popup").child_window(
-            class_name="TextBlock", title="Export Image", depth=5
-        ).click_input()
+        return self.export_frame(event_dt, event_td_range, fl_name, status)
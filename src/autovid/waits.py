@@ -0,0 +1,269 @@
+import logging
+import threading
+import time
+from collections import deque
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Any, TypeVar
+
+lg = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class Clock:
+    """Time source used by waits and retries. Swap it out for a fake in tests"""
+
+    def monotonic(self) -> float:
+        return time.monotonic()
+
+    def time(self) -> float:
+        """Wall clock seconds, for timestamps stored or shared across processes"""
+        return time.time()
+
+    def sleep(self, seconds: float) -> None:
+        time.sleep(seconds)
+
+
+SYSTEM_CLOCK = Clock()
+
+
+class Cancelled(ConnectionAbortedError):
+    """Raised by the next wait, sleep or retry once a CancelToken is cancelled"""
+
+
+class CancelToken:
+    """
+    Thread-safe abort flag checked by every wait, sleep and retry
+
+    On the system clock sleeps block on the flag itself, so a cancel from another
+    thread lands straight away instead of after the current sleep.
+    """
+
+    def __init__(self) -> None:
+        self._event = threading.Event()
+        self.reason = ""
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+    def cancel(self, reason: str = "Cancelled") -> None:
+        self.reason = reason
+        self._event.set()
+
+    def reset(self) -> None:
+        self._event.clear()
+        self.reason = ""
+
+    def check(self) -> None:
+        if self._event.is_set():
+            raise Cancelled(self.reason)
+
+    def sleep(self, seconds: float, clock: Clock = SYSTEM_CLOCK) -> None:
+        self.check()
+        if type(clock) is Clock:
+            self._event.wait(seconds)
+        else:
+            clock.sleep(seconds)
+        self.check()
+
+
+# Token retries (and waiters without one of their own) check, see cancel_scope
+_cancel_token: ContextVar[CancelToken | None] = ContextVar("cancel_token", default=None)
+
+
+@contextmanager
+def cancel_scope(token: CancelToken | None) -> Iterator[CancelToken | None]:
+    """Makes every wait and retry inside the block stop once token is cancelled"""
+    reset = _cancel_token.set(token)
+    try:
+        yield token
+    finally:
+        _cancel_token.reset(reset)
+
+
+def current_token() -> CancelToken | None:
+    return _cancel_token.get()
+
+
+def sleep(
+    seconds: float, clock: Clock = SYSTEM_CLOCK, token: CancelToken | None = None
+) -> None:
+    """clock.sleep that wakes up early and raises Cancelled if token is cancelled"""
+    token = token or current_token()
+    if token is None:
+        clock.sleep(seconds)
+    else:
+        token.sleep(seconds, clock)
+
+
+class WaitTimeoutError(TimeoutError):
+    pass
+
+
+@dataclass(frozen=True)
+class WaitRecord:
+    name: str
+    duration: float
+    polls: int
+    ok: bool
+
+
+class Waiter:
+    """
+    Polls a UI condition until it holds instead of waiting blindly
+
+    The poll interval starts small and backs off up to max_interval so quick UI
+    updates are caught early without hammering UIA on slow ones. Every wait is
+    counted so the time spent waiting can be broken down per step, the last
+    history waits are kept as WaitRecords.
+    """
+
+    def __init__(
+        self,
+        clock: Clock = SYSTEM_CLOCK,
+        interval: float = 0.05,
+        backoff: float = 1.5,
+        max_interval: float = 1.0,
+        cancel: CancelToken | None = None,
+        history: int | None = 10_000,
+    ) -> None:
+        self.clock = clock
+        self.cancel = cancel
+        self.interval = interval
+        self.backoff = backoff
+        self.max_interval = max_interval
+
+        # Absolute clock.monotonic() value no wait may go past, e.g. a per-job budget
+        self.deadline: float | None = None
+        # Bounded so a long-lived VERINT (e.g. the daemon's) doesn't grow with every
+        # wait, count/waited/summary() cover every wait ever made
+        self.records: deque[WaitRecord] = deque(maxlen=history)
+        self.count = 0
+        self.waited = 0.0
+        self._summary: dict[str, dict[str, float]] = {}
+        # Called after every failed poll, e.g. to drop UI snapshots before the next
+        self.on_retry: list[Callable[[], None]] = []
+
+    def _record(self, name: str, start: float, polls: int, ok: bool) -> None:
+        record = WaitRecord(
+            name=name, duration=self.clock.monotonic() - start, polls=polls, ok=ok
+        )
+        self.records.append(record)
+        self.count += 1
+        self.waited += record.duration
+
+        stats = self._summary.setdefault(
+            name, {"count": 0, "total": 0.0, "max": 0.0, "timeouts": 0}
+        )
+        stats["count"] += 1
+        stats["total"] += record.duration
+        stats["max"] = max(stats["max"], record.duration)
+        stats["timeouts"] += not ok
+        lg.debug(f"Waited {record.duration:.2f}s ({polls} polls) for {name}")
+
+    def until(
+        self,
+        condition: Callable[[], T],
+        timeout: float = 30,
+        name: str | None = None,
+        required: bool = True,
+    ) -> T | None:
+        """
+        Calls condition until it returns a truthy value and returns that value
+
+        Exceptions raised by the condition (element not in the tree yet) count as
+        not ready. On timeout WaitTimeoutError is raised, or None is returned if the
+        wait isn't required. Raises Cancelled as soon as the cancel token is set.
+        """
+        name = name or getattr(condition, "__name__", "condition")
+        start = self.clock.monotonic()
+        deadline = start + timeout
+        if self.deadline is not None:
+            deadline = min(deadline, self.deadline)
+
+        interval = self.interval
+        polls = 0
+        last_err: Exception | None = None
+        token = self.cancel or current_token()
+
+        while True:
+            polls += 1
+            try:
+                if token:
+                    token.check()
+                if result := condition():
+                    self._record(name, start, polls, True)
+                    return result
+            except Cancelled:
+                self._record(name, start, polls, False)
+                raise
+            except Exception as err:  # noqa: BLE001
+                last_err = err
+
+            remaining = deadline - self.clock.monotonic()
+            if remaining <= 0:
+                break
+
+            for callback in self.on_retry:
+                callback()
+
+            try:
+                sleep(min(interval, remaining), self.clock, token)
+            except Cancelled:
+                self._record(name, start, polls, False)
+                raise
+            interval = min(interval * self.backoff, self.max_interval)
+
+        self._record(name, start, polls, False)
+        if not required:
+            return None
+
+        raise WaitTimeoutError(
+            f"Timed out after {timeout}s waiting for {name}"
+            + (f" (last error: {last_err})" if last_err else "")
+        )
+
+    def exists(self, locate: Callable[[], T], timeout: float = 30, **kwargs) -> T:
+        return self.until(locate, timeout=timeout, **kwargs)
+
+    def visible(self, locate: Callable[[], Any], timeout: float = 30, **kwargs) -> Any:
+        def condition() -> Any:
+            element = locate()
+            return element if element.is_visible() else None
+
+        return self.until(condition, timeout=timeout, **kwargs)
+
+    def enabled(self, locate: Callable[[], Any], timeout: float = 30, **kwargs) -> Any:
+        def condition() -> Any:
+            element = locate()
+            return element if element.is_visible() and element.is_enabled() else None
+
+        return self.until(condition, timeout=timeout, **kwargs)
+
+    def text_changed(
+        self, locate: Callable[[], Any], before: Any, timeout: float = 30, **kwargs
+    ) -> Any:
+        def condition() -> Any:
+            texts = locate().texts()
+            return texts if texts != before else None
+
+        return self.until(condition, timeout=timeout, **kwargs)
+
+    def gone(self, element: Any, timeout: float = 30, **kwargs) -> bool | None:
+        """Waits for an element to be hidden or removed from the tree"""
+
+        def condition() -> bool:
+            try:
+                return not element.is_visible()
+            except Exception:  # noqa: BLE001
+                return True
+
+        return self.until(condition, timeout=timeout, **kwargs)
+
+    def summary(self) -> dict[str, dict[str, float]]:
+        """Count, total and max seconds waited per wait name"""
+        return {k: dict(v) for k, v in self._summary.items()}
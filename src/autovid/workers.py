@@ -0,0 +1,324 @@
+import logging
+import threading
+from collections.abc import Iterable, Mapping
+from dataclasses import dataclass
+from pathlib import Path
+from typing import TYPE_CHECKING, Protocol, Self
+
+from autovid.common import FATAL_ERRORS, Ambiguous, term2site
+from autovid.jobqueue import JobQueue, QueuedJob, default_owner
+from autovid.jobs import Job, JobResult, ResultsCSV
+from autovid.waits import SYSTEM_CLOCK, Cancelled, Clock
+
+if TYPE_CHECKING:
+    from autovid.directory import CameraDirectory
+
+lg = logging.getLogger(__name__)
+
+
+class Driver(Protocol):
+    """
+    What a worker drives to run jobs, AutoVidBatch in production
+
+    Swap in a simulated driver to exercise the broker protocol without VERINT
+    """
+
+    def start(self) -> None: ...
+
+    def run_job(self, job: Job, site_id: str) -> Path: ...
+
+    def recover(self) -> None: ...
+
+    def cleanup(self) -> None:
+        """Fast tidy up after a cancel, see VERINT.cleanup"""
+        ...
+
+    def close(self) -> None: ...
+
+
+@dataclass
+class WorkerStats:
+    done: int = 0
+    failed: int = 0
+    lost: int = 0  # jobs whose lease was stolen while running
+
+
+class _Heartbeat:
+    """Extends a job's lease in the background while the driver works on it"""
+
+    def __init__(self, queue: JobQueue, job_id: int, owner: str, every: float) -> None:
+        self.queue = queue
+        self.job_id = job_id
+        self.owner = owner
+        self.every = every
+        self.lost = False
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.every):
+            if not self.queue.heartbeat(self.job_id, self.owner):
+                lg.warning(f"{self.owner} lost the lease on job {self.job_id}")
+                self.lost = True
+                return
+
+    def __enter__(self) -> Self:
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._stop.set()
+        self._thread.join()
+
+
+class Worker:
+    """
+    Pulls jobs off a shared JobQueue and runs them on one VERINT desktop
+
+    Run one worker per Windows host/VM pointed at the same queue file. Each worker
+    prefers jobs on the site and camera it already has loaded, heartbeats its
+    lease while a job runs, and steals jobs whose worker stopped heartbeating.
+    """
+
+    def __init__(
+        self,
+        queue: JobQueue,
+        driver: Driver,
+        owner: str | None = None,
+        heartbeat: float | None = None,
+        poll: float = 5,
+        clock: Clock = SYSTEM_CLOCK,
+    ) -> None:
+        """
+        Parameters
+        ----------
+
+        queue: JobQueue
+            Shared queue, e.g. a SQLite file on a network share
+        driver: Driver
+            Runs the jobs, AutoVidBatch for a real VERINT desktop
+        owner: str, optional
+            Worker name recorded on leases. Defaults to host:pid
+        heartbeat: float, optional
+            Seconds between lease renewals. Defaults to a third of the lease
+        poll: float, optional
+            Seconds to wait for other workers' jobs when the queue has nothing free
+        """
+        self.queue = queue
+        self.driver = driver
+        self.owner = owner or default_owner()
+        self.heartbeat = heartbeat or queue.lease.total_seconds() / 3
+        self.poll = poll
+        self.clock = clock
+        self.stats = WorkerStats()
+
+        self._site_id: str | None = None
+        self._camera: str | None = None
+
+    def _claim(self) -> QueuedJob | None:
+        claimed = self.queue.claim(
+            self.owner, site_id=self._site_id, camera=self._camera
+        )
+        return claimed[0] if claimed else None
+
+    def run_one(self, queued: QueuedJob) -> bool:
+        """Runs a claimed job and reports the result back to the queue"""
+        job = queued.job
+        lg.info(f"{self.owner} running {job.fl_name} (attempt {queued.retries + 1})")
+
+        if not queued.site_id:
+            self.queue.fail(queued.id, "Job has no site", retryable=False)
+            self.queue.checkin(self.owner, failed=1)
+            self.stats.failed += 1
+            return False
+
+        with _Heartbeat(self.queue, queued.id, self.owner, self.heartbeat) as beat:
+            try:
+                output = self.driver.run_job(job, queued.site_id)
+                self._site_id, self._camera = queued.site_id, job.term_id
+                error = None
+            except Exception as err:  # noqa: BLE001
+                lg.error(f"{self.owner} failed {job.fl_name}: {err}")
+                error = err
+
+        if beat.lost:
+            # Another worker owns the job now, let it report the result
+            self.stats.lost += 1
+            return False
+
+        if isinstance(error, Cancelled):
+            # Not the job's fault, hand it back and stop with VERINT still usable
+            self.queue.release(queued.id)
+            self.driver.cleanup()
+            raise error
+
+        missing = False
+        if error is None:
+            try:
+                completed = self.queue.complete(
+                    queued.id, output, site_id=queued.site_id, owner=self.owner
+                )
+            except FileNotFoundError as err:
+                # The export never landed, unlike a missing VERINT that's worth a retry
+                error, missing = err, True
+            else:
+                if not completed:
+                    lg.warning(f"{self.owner} lost the lease on {job.fl_name}")
+                    self.stats.lost += 1
+                    return False
+
+        if error is None:
+            self.queue.checkin(self.owner, done=1)
+            self.stats.done += 1
+            return True
+
+        self.queue.fail(
+            queued.id,
+            f"{type(error).__name__}: {error}",
+            retryable=missing or not isinstance(error, FATAL_ERRORS),
+        )
+        self.queue.checkin(self.owner, failed=1)
+        self.stats.failed += 1
+        self._site_id = self._camera = None
+        self.driver.recover()
+        return False
+
+    def run(self, stop: threading.Event | None = None) -> WorkerStats:
+        """Works until the queue has nothing pending or running, or stop is set"""
+        stop = stop or threading.Event()
+        started = False
+
+        try:
+            while not stop.is_set():
+                queued = self._claim()
+                if queued is None:
+                    if not self.queue.unfinished():
+                        break
+
+                    # Another worker holds the rest, wait in case its lease expires
+                    self.queue.checkin(self.owner)
+                    self.clock.sleep(self.poll)
+                    continue
+
+                if not started:
+                    self.driver.start()
+                    started = True
+
+                self.run_one(queued)
+        finally:
+            if started:
+                self.driver.close()
+
+        lg.info(f"{self.owner} finished: {self.stats}")
+        return self.stats
+
+
+class Coordinator:
+    """Fills a shared JobQueue, tracks the workers and collects their results"""
+
+    def __init__(
+        self,
+        queue: JobQueue,
+        clock: Clock = SYSTEM_CLOCK,
+        directory: "CameraDirectory | None" = None,
+    ) -> None:
+        """
+        Parameters
+        ----------
+
+        queue: JobQueue
+            Queue the workers claim from
+        directory: CameraDirectory, optional
+            Local snapshot jobs are resolved to sites from, instead of the VERINT
+            database
+        """
+        self.queue = queue
+        self.clock = clock
+        self.directory = directory
+
+    def submit(
+        self,
+        jobs: Iterable[Job],
+        sites: Mapping[str, str | None | Ambiguous] | None = None,
+    ) -> int:
+        """
+        Resolves the jobs' sites once and queues them, returns how many were new
+
+        Jobs without a single site are marked failed straight away so workers
+        never pick them up.
+        """
+        jobs = list(jobs)
+        if sites is None:
+            terms = {x.term_id for x in jobs}
+            if self.directory is not None:
+                sites = self.directory.term2site(terms)
+            else:
+                sites = term2site(terms)
+
+        resolved = {
+            k: v for k, v in sites.items() if v and not isinstance(v, Ambiguous)
+        }
+        added = self.queue.enqueue(jobs, resolved)
+
+        for job in jobs:
+            if job.term_id in resolved:
+                continue
+
+            queued = self.queue.get(job)
+            if queued.state == "pending":
+                self.queue.fail(
+                    queued.id,
+                    f"Could not return a valid site from: {job.term_id}",
+                    retryable=False,
+                )
+
+        return added
+
+    def wait(self, poll: float = 5, timeout: float | None = None) -> dict[str, int]:
+        """Waits for the queue to drain, reclaiming jobs of workers that died"""
+        deadline = None if timeout is None else self.clock.monotonic() + timeout
+        while self.queue.unfinished():
+            if deadline is not None and self.clock.monotonic() >= deadline:
+                break
+
+            self.queue.resume()
+            self.clock.sleep(poll)
+
+        counts = self.queue.counts()
+        lg.info(f"Queue status: {counts}")
+        return counts
+
+    def results(self, path: Path | str | None = None) -> list[JobResult]:
+        """Finished jobs as JobResults, optionally written out to a results CSV"""
+        output = []
+        for queued in self.queue.jobs():
+            if queued.state not in ("done", "failed"):
+                continue
+
+            output.append(
+                JobResult(
+                    job=queued.job,
+                    ok=queued.state == "done",
+                    site_id=queued.site_id,
+                    output=queued.output,
+                    error=queued.error,
+                    # Jobs failed before they were ever claimed took no time
+                    started=queued.started or queued.finished,
+                    finished=queued.finished,
+                )
+            )
+
+        if path is not None:
+            writer = ResultsCSV(path)
+            for result in output:
+                writer.append(result)
+
+        return output
+
+
+def run_worker(queue: Path | str, outdir: Path | str, **kwargs) -> WorkerStats:
+    """Runs a worker on this desktop's VERINT against a shared queue file"""
+    from autovid.batch import AutoVidBatch
+
+    driver = AutoVidBatch(jobs=[], outdir=outdir, **kwargs)
+    return Worker(JobQueue(queue), driver).run()
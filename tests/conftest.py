@@ -0,0 +1,65 @@
+import pytest
+
+from autovid.sim import VERINT_TREE, SimElement, build_tree
+from autovid.waits import Clock
+
+
+class FakeClock(Clock):
+    def __init__(self) -> None:
+        self.now = 0.0
+        self.sleeps: list[float] = []
+
+    def monotonic(self) -> float:
+        return self.now
+
+    def time(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float) -> None:
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+@pytest.fixture()
+def fake_clock() -> FakeClock:
+    return FakeClock()
+
+
+@pytest.fixture()
+def verint_db(tmp_path):
+    """SQLite stand-in for the VERINT DvrCameras/Sites tables"""
+    from sqlalchemy import create_engine, insert
+
+    from autovid.schema import dvr_cameras, metadata, sites
+
+    engine = create_engine(f"sqlite:///{tmp_path / 'verint.db'}")
+    metadata.create_all(engine)
+
+    with engine.begin() as conn:
+        conn.execute(
+            insert(sites),
+            [
+                {"ID": 1, "SiteName": " SITE-NORTH "},
+                {"ID": 2, "SiteName": "SITE-SOUTH"},
+                {"ID": 3, "SiteName": "SITE-EAST"},
+            ],
+        )
+        conn.execute(
+            insert(dvr_cameras),
+            [
+                {"DvrCamera_ID": 10, "Dvr_ID": 1, "Name": "ATM1001", "InUse": True},
+                {"DvrCamera_ID": 11, "Dvr_ID": 2, "Name": "ATM2001", "InUse": True},
+                {"DvrCamera_ID": 12, "Dvr_ID": 2, "Name": "ATM2001-B", "InUse": True},
+                {"DvrCamera_ID": 13, "Dvr_ID": 3, "Name": "LOBBY_1", "InUse": True},
+                {"DvrCamera_ID": 14, "Dvr_ID": 3, "Name": "LOBBYX1", "InUse": True},
+            ],
+        )
+
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture()
+def fake_tree() -> SimElement:
+    """Static VERINT tree without a backend, no calls are simulated"""
+    return build_tree(VERINT_TREE)
@@ -0,0 +1,84 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from autovid.cache import ExportCache
+
+EVENT = datetime(2025, 1, 2, 3, 4, 5)
+FIVE = timedelta(seconds=5)
+
+
+def image(path, data: bytes = b"frame"):
+    path.write_bytes(b"\xff\xd8" + data)
+    return path
+
+
+@pytest.fixture()
+def cache(tmp_path, fake_clock):
+    fake_clock.now = 1000.0
+    cache = ExportCache(tmp_path / "cache", clock=fake_clock)
+    yield cache
+    cache.close()
+
+
+def test_hits_share_the_loaded_range(cache, tmp_path) -> None:
+    stored = cache.put("ATM2001", EVENT, FIVE, image(tmp_path / "a.jpg"))
+
+    # Same camera and minute range as typed into VERINT
+    assert cache.get(" atm2001 ", EVENT + timedelta(seconds=20), FIVE) == stored
+    assert cache.get("ATM2001", EVENT, timedelta(seconds=60)) is None
+    assert cache.get("ATM2001-B", EVENT, FIVE) is None
+
+    copy = cache.fetch("ATM2001", EVENT, FIVE, tmp_path / "OPS-1.jpg")
+    assert copy.read_bytes() == stored.read_bytes()
+    assert (cache.stats.hits, cache.stats.misses) == (2, 2)
+
+
+def test_corrupt_images_are_dropped(cache, tmp_path) -> None:
+    stored = cache.put("ATM2001", EVENT, FIVE, image(tmp_path / "a.jpg"))
+    cache.put("ATM1001", EVENT, FIVE, image(tmp_path / "b.jpg", b"other"))
+
+    stored.write_bytes(b"\xff\xd8frame!")
+    assert cache.get("ATM2001", EVENT, FIVE) is None
+    assert cache.stats.corrupt == 1
+    assert not stored.exists()
+
+    for path in cache.objects.rglob("*.jpg"):
+        path.unlink()
+    assert cache.verify() == ["ATM1001|2025-01-02T03:04|2025-01-02T03:04"]
+    assert len(cache) == 0
+
+    with pytest.raises(FileNotFoundError):
+        cache.put("ATM2001", EVENT, FIVE, tmp_path / "missing.jpg")
+
+
+def test_lru_and_age_eviction(tmp_path, fake_clock) -> None:
+    fake_clock.now = 1000.0
+    size = len(b"\xff\xd8frame0")
+    cache = ExportCache(
+        tmp_path / "cache", max_bytes=2 * size, max_age=100, clock=fake_clock
+    )
+
+    minutes = [EVENT + timedelta(minutes=i) for i in range(3)]
+    cache.put("ATM2001", minutes[0], FIVE, image(tmp_path / "0.jpg", b"frame0"))
+    cache.put("ATM2001", minutes[1], FIVE, image(tmp_path / "1.jpg", b"frame1"))
+    # Same image under another key is stored once
+    cache.put("ATM2001-B", minutes[1], FIVE, tmp_path / "1.jpg")
+    assert cache.size() == 2 * size
+
+    fake_clock.now += 1
+    assert cache.get("ATM2001", minutes[0], FIVE)
+    fake_clock.now += 1
+    cache.put("ATM2001", minutes[2], FIVE, image(tmp_path / "2.jpg", b"frame2"))
+
+    # frame1 was the least recently used image
+    assert cache.get("ATM2001", minutes[1], FIVE) is None
+    assert cache.get("ATM2001-B", minutes[1], FIVE) is None
+    assert cache.get("ATM2001", minutes[0], FIVE)
+    assert cache.size() == 2 * size
+    assert len(list(cache.objects.rglob("*.jpg"))) == 2
+
+    fake_clock.now += 101
+    assert cache.evict() == 2
+    assert len(cache) == 0
+    assert list(cache.objects.rglob("*.jpg")) == []
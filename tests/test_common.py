@@ -2,6 +2,8 @@ from pathlib import Path
 
 import pytest
 
+from autovid.common import Ambiguous, term2site
+
 
 @pytest.fixture(scope="module")
 def tmp_conf(tmp_path_factory) -> Path:
@@ -23,3 +25,160 @@ def _env() -> None:
 
 def test_config() -> None:
     pass
+
+
+def test_term2site_single(verint_db) -> None:
+    assert term2site("ATM1001", con=verint_db) == "SITE-NORTH"
+    assert term2site("ATM9999", con=verint_db) is None
+
+    with pytest.raises(ValueError):
+        term2site("ATM200", con=verint_db)
+
+
+def test_term2site_batch(verint_db) -> None:
+    output = term2site(["ATM1001", "ATM9999", "ATM200", "LOBBY_1"], con=verint_db)
+
+    assert output["ATM1001"] == "SITE-NORTH"
+    assert output["ATM9999"] is None
+    assert output["LOBBY_1"] == "SITE-EAST"  # "_" must not act as a wildcard
+    assert isinstance(output["ATM200"], Ambiguous)
+    assert set(output["ATM200"].cameras) == {"ATM2001", "ATM2001-B"}
+
+
+def test_term2site_prefers_exact(verint_db) -> None:
+    # ATM2001 is a substring of ATM2001-B
+    assert term2site("ATM2001", con=verint_db) == "SITE-SOUTH"
+
+
+def test_term2site_batch_chunks(verint_db, monkeypatch) -> None:
+    from sqlalchemy import event
+
+    import autovid.common
+
+    queries = []
+    event.listen(
+        verint_db, "before_cursor_execute", lambda *args: queries.append(args[2])
+    )
+    monkeypatch.setattr(autovid.common, "TERM_CHUNK_SIZE", 2)
+    terms = {"atm1001", "ATM2001-B", "LOBBYX1", "missing", "ATM2001"}
+    output = term2site(terms, con=verint_db)
+
+    assert len(queries) == 3
+
+    assert output == {
+        "ATM2001": "SITE-SOUTH",
+        "ATM2001-B": "SITE-SOUTH",
+        "LOBBYX1": "SITE-EAST",
+        "atm1001": "SITE-NORTH",
+        "missing": None,
+    }
+
+
+def test_get_engine_is_shared(monkeypatch, tmp_path) -> None:
+    from autovid.common import dispose_engine, get_engine
+
+    monkeypatch.setenv("AUTOVID_DB_CONN_STRING", f"sqlite:///{tmp_path / 'x.db'}")
+    monkeypatch.setenv("AUTOVID_DB_POOL_SIZE", "2")
+    dispose_engine()
+
+    try:
+        engine = get_engine()
+        assert engine is get_engine()
+        assert engine.pool.size() == 2
+    finally:
+        dispose_engine()
+
+
+def test_retry_backoff_and_stats(fake_clock) -> None:
+    from autovid.common import RetryPolicy, retry_stats
+
+    attempts = []
+
+    @RetryPolicy(max_retries=4, wait_time=1, jitter=0, clock=fake_clock)
+    def flaky() -> str:
+        attempts.append(fake_clock.now)
+        if len(attempts) < 4:
+            raise IndexError("element not loaded")
+        return "ok"
+
+    assert flaky() == "ok"
+    assert flaky.__name__ == "flaky"
+    assert fake_clock.sleeps == [1, 2, 4]
+
+    stats = retry_stats[flaky.__qualname__]
+    assert (stats.calls, stats.attempts, stats.retries, stats.slept) == (1, 4, 3, 7)
+
+
+def test_retry_fatal_and_exhausted(fake_clock) -> None:
+    from autovid.common import retry
+
+    calls = []
+
+    @retry(max_retries=3, wait_time=15, clock=fake_clock)
+    def missing_video() -> None:
+        calls.append(1)
+        raise FileNotFoundError("Video could not be found")
+
+    with pytest.raises(FileNotFoundError):
+        missing_video()
+    assert len(calls) == 1
+    assert fake_clock.sleeps == []
+
+    @retry(max_retries=2, wait_time=1, jitter=0, clock=fake_clock)
+    def broken() -> None:
+        raise ValueError("still broken")
+
+    with pytest.raises(ValueError, match="still broken"):
+        broken()
+    assert fake_clock.sleeps == [1]
+
+
+def test_retry_budgets(fake_clock) -> None:
+    from autovid.common import RetryPolicy, job_budget
+
+    def broken() -> None:
+        raise IndexError("nope")
+
+    policy = RetryPolicy(max_retries=10, wait_time=1, jitter=0, clock=fake_clock)
+
+    with pytest.raises(IndexError):
+        RetryPolicy(
+            max_retries=10, wait_time=1, jitter=0, budget=5, clock=fake_clock
+        ).call(broken)
+    assert fake_clock.sleeps == [1, 2]
+
+    fake_clock.sleeps.clear()
+    with job_budget(4, clock=fake_clock), pytest.raises(IndexError):
+        policy.call(broken)
+    assert fake_clock.sleeps == [1, 2]
+
+
+def test_retry_jitter_bounds(fake_clock) -> None:
+    from autovid.common import RetryPolicy
+
+    low = RetryPolicy(wait_time=4, jitter=0.25, rng=lambda: 0.0, clock=fake_clock)
+    high = RetryPolicy(wait_time=4, jitter=0.25, rng=lambda: 1.0, clock=fake_clock)
+
+    assert low.delay(1) == 3.0
+    assert high.delay(2) == 10.0
+
+
+def test_retry_stops_when_cancelled(fake_clock) -> None:
+    from autovid.common import RetryPolicy
+    from autovid.waits import Cancelled, CancelToken, cancel_scope
+
+    token = CancelToken()
+    calls = []
+
+    def flaky() -> None:
+        calls.append(1)
+        if len(calls) == 2:
+            token.cancel("Overlay closed")
+        raise IndexError("not yet")
+
+    policy = RetryPolicy(max_retries=10, wait_time=1, jitter=0, clock=fake_clock)
+    with cancel_scope(token), pytest.raises(Cancelled, match="Overlay closed"):
+        policy.call(flaky)
+
+    assert len(calls) == 2
+    assert fake_clock.sleeps == [1]
@@ -0,0 +1,163 @@
+import json
+import threading
+import urllib.request
+from datetime import datetime
+
+import pytest
+
+from autovid.daemon import Daemon, request_export
+from autovid.jobs import Job
+
+SITES = {"ATM1001": "1", "ATM2001": "2"}
+EVENT = datetime(2025, 1, 2, 3, 4, 5)
+
+
+class StubDriver:
+    """Writes a fake image per job and can drop its session on demand"""
+
+    def __init__(self, outdir, fail: set[str] = frozenset()) -> None:
+        self.outdir = outdir
+        self.fail = fail
+        self.logged_in = False
+        self.events: list[str] = []
+        self.calls: list[tuple[str, str]] = []
+        self.release = threading.Event()
+        self.release.set()
+        self.running = threading.Event()
+
+    def start(self) -> None:
+        self.events.append("start")
+        self.logged_in = True
+
+    def healthy(self) -> bool:
+        self.events.append("healthy")
+        return self.logged_in
+
+    def relogin(self) -> None:
+        self.events.append("relogin")
+        self.logged_in = True
+
+    def run_job(self, job: Job, site_id: str):
+        self.running.set()
+        self.release.wait(5)
+        self.calls.append((site_id, job.term_id))
+        if job.term_id in self.fail:
+            raise TimeoutError("videoview")
+
+        path = self.outdir / f"{job.fl_name}.jpg"
+        path.write_bytes(b"\xff\xd8")
+        return path
+
+    def recover(self) -> None:
+        self.events.append("recover")
+
+    def cleanup(self) -> None:
+        self.events.append("cleanup")
+
+    def close(self) -> None:
+        self.events.append("close")
+
+
+@pytest.fixture()
+def driver(tmp_path):
+    return StubDriver(tmp_path, fail={"ATM2001"})
+
+
+@pytest.fixture()
+def daemon(driver):
+    daemon = Daemon(driver, port=0, health_every=60, resolve=SITES.get)
+    daemon.start()
+    yield daemon
+    daemon.close()
+
+
+def call(daemon, path: str, body: dict | None = None) -> tuple[int, dict]:
+    request = urllib.request.Request(
+        f"http://127.0.0.1:{daemon.port}{path}",
+        data=None if body is None else json.dumps(body).encode(),
+        method="GET" if body is None else "POST",
+    )
+    try:
+        with urllib.request.urlopen(request, timeout=5) as response:
+            return response.status, json.load(response)
+    except urllib.error.HTTPError as err:
+        return err.code, json.load(err)
+
+
+def test_requests_run_in_order_on_one_session(daemon, driver, tmp_path) -> None:
+    driver.release.clear()
+    status, first = call(
+        daemon, "/requests", {"term_id": "ATM1001", "tran_dt": EVENT.isoformat()}
+    )
+    assert (status, first["state"]) == (202, "queued")
+
+    queued = daemon.submit(Job("ATM2001", EVENT))
+    missing = daemon.submit(Job("NOPE", EVENT))
+    driver.release.set()
+
+    output = request_export("ATM1001", EVENT, jira_id="OPS-1", port=daemon.port)
+    assert output == tmp_path / "OPS-1_ATM1001_20250102_030405.jpg"
+    assert output.exists()
+
+    assert queued.wait(5) and missing.wait(5)
+    assert driver.calls == [("1", "ATM1001"), ("2", "ATM2001"), ("1", "ATM1001")]
+    assert queued.error == "TimeoutError: videoview"
+    assert missing.error == "Could not return a valid site from: NOPE"
+
+    status, body = call(daemon, f"/requests/{first['id']}")
+    assert (status, body["state"], body["site_id"]) == (200, "done", "1")
+    assert driver.events.count("start") == 1
+    assert driver.events.count("recover") == 1
+
+    status, health = call(daemon, "/health")
+    assert (health["ok"], health["done"], health["failed"]) == (True, 2, 2)
+
+    with pytest.raises(RuntimeError, match="videoview"):
+        request_export("ATM2001", EVENT, port=daemon.port)
+
+
+def test_bad_requests(daemon) -> None:
+    assert call(daemon, "/requests", {"term_id": "ATM1001"})[0] == 400
+    assert (
+        call(daemon, "/requests", {"term_id": "ATM1001", "tran_dt": "later"})[0] == 400
+    )
+    assert call(daemon, "/requests/99")[0] == 404
+    assert call(daemon, "/nope")[0] == 404
+
+
+def test_health_check_logs_back_in(driver) -> None:
+    daemon = Daemon(driver, port=0, health_every=0.05, resolve=SITES.get)
+    daemon.start()
+    try:
+        driver.logged_in = False  # VERINT timed the session out while idle
+        for _ in range(100):
+            if daemon.relogins:
+                break
+            threading.Event().wait(0.05)
+        assert daemon.relogins == 1
+        assert driver.logged_in
+
+        # Forced from the API even when the session looks fine
+        daemon.health_every = 60
+        assert call(daemon, "/relogin", {})[0] == 202
+        assert daemon.submit(Job("ATM1001", EVENT)).wait(5)
+        assert daemon.relogins == 2
+        assert daemon.health()["ok"]
+    finally:
+        daemon.close()
+
+
+def test_close_fails_queued_requests(driver) -> None:
+    daemon = Daemon(driver, port=0, resolve=SITES.get)
+    daemon.start()
+    driver.release.clear()
+    running = daemon.submit(Job("ATM1001", EVENT))
+    queued = daemon.submit(Job("ATM1001", EVENT, jira_id="OPS-2"))
+    assert driver.running.wait(5)
+
+    threading.Timer(0.2, driver.release.set).start()
+    daemon.close()
+
+    assert running.state == "done"
+    assert (queued.state, queued.error) == ("failed", "Daemon stopped")
+    assert driver.events[-1] == "close"
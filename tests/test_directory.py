@@ -0,0 +1,57 @@
+import pytest
+from sqlalchemy import delete, insert, update
+
+from autovid.common import Ambiguous
+from autovid.directory import CameraDirectory
+from autovid.schema import dvr_cameras
+
+
+def test_directory_lookups(verint_db) -> None:
+    directory = CameraDirectory(con=verint_db)
+
+    assert directory.term2site("ATM1001") == "SITE-NORTH"
+    assert directory.term2site("atm2001-b") == "SITE-SOUTH"
+    assert directory.term2site("ATM2001") == "SITE-SOUTH"
+    assert isinstance(directory.term2site(["ATM200"])["ATM200"], Ambiguous)
+    assert directory.match("LOBY_1").best.name == "LOBBY_1"
+    assert directory.site_cameras("site-south") == ["ATM2001", "ATM2001-B"]
+    assert directory.camera_dvr("LOBBY_1") == 3
+
+    with pytest.raises(ValueError):
+        directory.term2site("ATM200")
+
+
+def test_directory_ttl_refresh(verint_db, fake_clock) -> None:
+    fake_clock.now = 1000.0
+    directory = CameraDirectory(con=verint_db, ttl=60, clock=fake_clock)
+    assert directory.refresh() == (5, 0)
+
+    with verint_db.begin() as conn:
+        conn.execute(
+            update(dvr_cameras).where(dvr_cameras.c.Name == "ATM1001").values(Dvr_ID=2)
+        )
+        conn.execute(delete(dvr_cameras).where(dvr_cameras.c.Name == "LOBBYX1"))
+
+    # Still fresh, served from the old snapshot
+    fake_clock.now += 30
+    assert directory.term2site("ATM1001") == "SITE-NORTH"
+
+    fake_clock.now += 30
+    assert directory.term2site("ATM1001") == "SITE-SOUTH"
+    assert directory.refreshed_at == fake_clock.now
+    assert directory.site_cameras("SITE-EAST") == ["LOBBY_1"]
+
+
+def test_directory_live_fallback(verint_db, tmp_path) -> None:
+    directory = CameraDirectory(con=verint_db, path=tmp_path / "dir.db", ttl=3600)
+    directory.refresh()
+
+    with verint_db.begin() as conn:
+        conn.execute(
+            insert(dvr_cameras),
+            [{"DvrCamera_ID": 20, "Dvr_ID": 1, "Name": "ATM3001", "InUse": True}],
+        )
+
+    assert directory.term2site("ATM3001") == "SITE-NORTH"
+    assert directory.site_cameras("SITE-NORTH") == ["ATM1001", "ATM3001"]
+    assert directory.term2site("ATM9999") is None
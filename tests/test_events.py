@@ -0,0 +1,78 @@
+import json
+import socket
+import time
+
+import pytest
+
+from autovid.events import (
+    EventBus,
+    Finished,
+    JsonlSink,
+    Progress,
+    SocketSink,
+    Status,
+    StepFinished,
+    StepStarted,
+)
+from autovid.spans import Tracer
+
+
+def test_subscriptions_are_bounded() -> None:
+    bus = EventBus()
+    slow = bus.subscribe(maxsize=3)
+    for i in range(5):
+        bus.publish(Status(f"step {i}"))
+
+    assert [x.message for x in slow.drain()] == ["step 2", "step 3", "step 4"]
+    assert slow.dropped == 2
+    assert slow.drain() == []
+
+    bus.unsubscribe(slow)
+    bus.publish(Status("not delivered"))
+    assert slow.drain() == []
+
+
+def test_tracer_publishes_steps_and_progress(fake_clock) -> None:
+    bus = EventBus()
+    events = bus.subscribe()
+    tracer = Tracer(clock=fake_clock, bus=bus)
+
+    with tracer.job("OPS-1_ATM1001", steps=2):
+        with tracer.span("select_site"):
+            fake_clock.sleep(1)
+        with pytest.raises(ValueError), tracer.span("select_camera"):
+            raise ValueError("no camera")
+
+    started, finished, progress, _, failed, done = events.drain()
+    assert started == StepStarted(
+        step="select_site", job="OPS-1_ATM1001", ts=started.ts
+    )
+    assert isinstance(finished, StepFinished) and finished.duration == 1
+    assert (progress.done, progress.total, progress.percent) == (1, 2, 50)
+    assert failed.error == "ValueError: no camera" and not failed.ok
+    assert isinstance(done, Progress) and done.percent == 100
+
+
+def test_sinks(tmp_path) -> None:
+    bus = EventBus()
+    sink = SocketSink()
+    client = socket.create_connection(("127.0.0.1", sink.port), timeout=5)
+    bus.attach(sink)
+    bus.attach(JsonlSink(tmp_path / "events.jsonl"))
+
+    # The client is accepted on the sink's own thread, wait until it's registered
+    for _ in range(500):
+        if sink._clients:
+            break
+        time.sleep(0.01)
+
+    bus.publish(Status("Starting VERINT"))
+    bus.publish(Finished(ok=True))
+    bus.close()
+
+    lines = (tmp_path / "events.jsonl").read_text().splitlines()
+    assert [json.loads(x)["kind"] for x in lines] == ["status", "finished"]
+
+    received = client.makefile().readline()
+    assert json.loads(received)["message"] == "Starting VERINT"
+    client.close()
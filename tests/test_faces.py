@@ -0,0 +1,85 @@
+from datetime import datetime
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from autovid.faces import (
+    FaceExtractor,
+    FaceIndex,
+    FaceStore,
+    Frame,
+    PixelEmbedder,
+)
+
+
+class SquareDetector:
+    """Boxes every bright 8x8 square on a dark background"""
+
+    def detect(self, image):
+        ys, xs = np.nonzero(image[::8, ::8] > 128)
+        return [(int(x) * 8, int(y) * 8, 8, 8) for y, x in zip(ys, xs)]
+
+
+def frame(seed: int, squares: list[tuple[int, int]]) -> np.ndarray:
+    image = np.zeros((32, 32), dtype=np.float32)
+    for x, y in squares:
+        patch = np.random.default_rng(seed + x + y).uniform(129, 255, (8, 8))
+        image[y : y + 8, x : x + 8] = patch
+    return image
+
+
+def test_extract_store_and_search(tmp_path) -> None:
+    taken = datetime(2025, 1, 2, 3, 4, 5)
+    np.save(tmp_path / "a.npy", frame(1, [(0, 0), (16, 8)]))
+    np.save(tmp_path / "b.npy", frame(1, [(0, 0)]))
+    (tmp_path / "broken.npy").write_bytes(b"")
+    frames = [
+        Frame(str(tmp_path / "a.npy"), camera="ATM1001", site_id="S1", taken=taken),
+        Frame(str(tmp_path / "b.npy"), camera="ATM2001", site_id="S2", taken=taken),
+        Frame(str(tmp_path / "broken.npy")),
+    ]
+
+    store = FaceStore(tmp_path / "faces.db")
+    extractor = FaceExtractor(
+        store,
+        detector=SquareDetector(),
+        embedder=PixelEmbedder(size=8),
+        batch_size=2,
+        processes=False,
+        reader=np.load,
+    )
+    assert extractor.run(frames) == 3
+    assert extractor.run(frames) == 0  # Already processed
+    assert store.count() == 3
+
+    index = FaceIndex.from_store(store)
+    first, _, third = store.get(index.ids)
+    assert (first.camera, first.site_id, first.taken) == ("ATM1001", "S1", taken)
+    assert first.box == (0, 0, 8, 8) and first.crop.shape == (8, 8)
+
+    # The same square in both frames is the best match, then itself
+    (best, score), *_ = index.search(third.embedding, k=2)
+    assert {best, index.search(third.embedding, k=2)[1][0]} == {first.id, third.id}
+    assert score == pytest.approx(1.0)
+
+    ids, _ = store.embeddings(camera="ATM2001")
+    assert ids.tolist() == [third.id]
+
+
+def test_index_search_and_save(tmp_path) -> None:
+    embeddings = np.random.default_rng(0).normal(size=(1000, 64)).astype(np.float32)
+    index = FaceIndex(np.arange(1000) + 1, embeddings)
+
+    results = index.search(embeddings[41] + 0.01, k=5)
+    assert len(results) == 5 and results[0][0] == 42
+    assert [x[1] for x in results] == sorted((x[1] for x in results), reverse=True)
+    assert index.search(embeddings[41], k=5, min_score=0.99) == [(42, pytest.approx(1))]
+    assert index.search(embeddings[41], k=0) == []
+    assert index.search(embeddings[41], k=-1) == []
+
+    index.save(tmp_path / "index.npz")
+    loaded = FaceIndex.load(tmp_path / "index.npz")
+    loaded.add(np.array([1001]), embeddings[:1] * 2)
+    assert len(loaded) == 1001
+    assert {x for x, _ in loaded.search(embeddings[0], k=2)} == {1, 1001}
@@ -0,0 +1,72 @@
+import json
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from autovid.frames import (
+    FramePipeline,
+    _popcount_bytes,
+    hamming,
+    phash,
+    phash_batch,
+)
+
+
+def scene(seed: int, size: int = 32) -> np.ndarray:
+    """Smooth random image made of low frequency cosines"""
+    rng = np.random.default_rng(seed)
+    y, x = np.mgrid[0:size, 0:size] / size
+    image = sum(
+        rng.uniform(-1, 1) * np.cos(np.pi * (a * x + b * y) + rng.uniform(0, 6))
+        for a in range(4)
+        for b in range(4)
+    )
+    return (128 + 40 * image).astype(np.float32)
+
+
+def test_phash_near_duplicates() -> None:
+    base = scene(1)
+    noisy = base + np.random.default_rng(2).normal(0, 2, base.shape)
+    brighter = base * 1.1 + 10
+
+    hashes = phash_batch(np.stack([base, noisy, brighter, scene(3)]))
+    assert hashes.dtype == np.uint64
+    assert int(hashes[0]) == phash(base)
+
+    distances = hamming(hashes, phash(base))
+    assert distances[0] == 0
+    assert distances[1] <= 6 and distances[2] <= 6
+    assert distances[3] > 16
+
+    # The NumPy < 2.0 fallback counts the same bits
+    values = hashes ^ np.uint64(phash(base))
+    assert _popcount_bytes(values).tolist() == [int(x).bit_count() for x in values]
+
+
+def test_pipeline_flags_and_drops(tmp_path) -> None:
+    frames = [scene(1), scene(1) + 2, scene(3)]
+    for i, frame in enumerate(frames):
+        np.save(tmp_path / f"frame{i}.npy", frame)
+    paths = sorted(tmp_path.glob("*.npy"))
+
+    with FramePipeline(tmp_path, thumbnails=False, drop=True, loader=np.load) as x:
+        for path in paths:
+            x.submit(path)
+            x.wait()  # Keep submission order for a stable "original"
+
+    original, duplicate, other = x.records
+    assert original.duplicate_of is None and other.duplicate_of is None
+    assert duplicate.duplicate_of == str(paths[0]) and duplicate.distance <= 6
+    assert not paths[1].exists()
+    assert (tmp_path / "duplicates" / "frame1.npy").exists()
+
+    lines = (tmp_path / "autovid_frames.jsonl").read_text().splitlines()
+    assert [json.loads(x)["path"] for x in lines] == [x.path for x in x.records]
+
+    # A rerun dedupes against the manifest and skips frames it already has
+    np.save(tmp_path / "frame3.npy", scene(3) - 1)
+    with FramePipeline(tmp_path, thumbnails=False, loader=np.load) as rerun:
+        assert rerun.scan(sorted(tmp_path.glob("*.npy"))) == 1
+
+    assert rerun.records[0].duplicate_of == str(paths[2])
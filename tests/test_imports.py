@@ -0,0 +1,42 @@
+import subprocess
+import sys
+
+import pytest
+
+from autovid.backends import get_backend
+from autovid.sim import SimBackend
+
+HEAVY = ("pandas", "sqlalchemy", "tkinter", "pywinauto")
+
+
+@pytest.mark.parametrize(
+    "module",
+    [
+        "autovid.cache",
+        "autovid.common",
+        "autovid.daemon",
+        "autovid.directory",
+        "autovid.jobqueue",
+        "autovid.scheduler",
+        "autovid.__main__",
+        "autovid.main",
+        "autovid.report",
+        "autovid.workers",
+    ],
+)
+def test_no_heavy_imports(module) -> None:
+    code = f"import sys, {module}; print([x for x in {HEAVY!r} if x in sys.modules])"
+    output = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True
+    )
+
+    assert output.stdout.strip() == "[]"
+
+
+def test_get_backend(monkeypatch) -> None:
+    monkeypatch.setenv("AUTOVID_BACKEND", "sim")
+    assert isinstance(get_backend(latency=0.5), SimBackend)
+    assert get_backend(latency=0.5).latency == 0.5
+
+    with pytest.raises(ValueError):
+        get_backend("cdp")
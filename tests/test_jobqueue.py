@@ -0,0 +1,108 @@
+from datetime import datetime
+
+import pytest
+
+from autovid.jobqueue import JobQueue, JobState
+from autovid.jobs import Job
+
+JOBS = [
+    Job("ATM1001", datetime(2025, 1, 2, 3, 4, 5), jira_id="OPS-1"),
+    Job("ATM2001", datetime(2025, 1, 2, 4)),
+    Job("LOBBY_1", datetime(2025, 1, 2, 5)),
+]
+
+
+@pytest.fixture()
+def queue(tmp_path, fake_clock):
+    fake_clock.now = 1000.0
+    queue = JobQueue(tmp_path / "queue.db", lease=60, max_retries=2, clock=fake_clock)
+    queue.enqueue(JOBS)
+    yield queue
+    queue.close()
+
+
+def test_enqueue_is_idempotent(queue) -> None:
+    assert queue.enqueue(JOBS) == 0
+    assert queue.counts() == {"pending": 3, "running": 0, "done": 0, "failed": 0}
+    assert [x.job for x in queue.jobs()] == JOBS
+
+
+def test_complete_requires_image_on_disk(queue, tmp_path) -> None:
+    (claimed,) = queue.claim(owner="w1")
+    image = tmp_path / f"{claimed.job.fl_name}.jpg"
+
+    with pytest.raises(FileNotFoundError):
+        queue.complete(claimed.id, image, owner="w1")
+
+    image.write_bytes(b"\xff\xd8")
+    queue.clock.now += 5
+    assert queue.complete(claimed.id, image, site_id="1", owner="w1")
+
+    done = queue.get(claimed.job)
+    assert done.state == JobState.DONE
+    assert done.output == image
+    assert done.site_id == "1"
+    assert (done.finished - done.started).total_seconds() == 5
+
+
+def test_complete_after_lease_stolen(queue, tmp_path) -> None:
+    (claimed,) = queue.claim(owner="w1")
+    queue.clock.now += 90
+    (stolen,) = queue.claim(owner="w2")
+    assert stolen.id == claimed.id
+
+    first = tmp_path / "w1.jpg"
+    first.write_bytes(b"\xff\xd8")
+    assert not queue.complete(claimed.id, first, owner="w1")
+
+    second = tmp_path / "w2.jpg"
+    second.write_bytes(b"\xff\xd8")
+    assert queue.complete(stolen.id, second, owner="w2")
+    assert queue.get(claimed.job).output == second
+    assert not queue.complete(claimed.id, first, owner="w1")
+    assert queue.get(claimed.job).output == second
+
+
+def test_fail_retries_then_fails(queue) -> None:
+    job = queue.start(JOBS[1], owner="w1")
+    assert queue.fail(job.id, "TimeoutError: datebox") == JobState.PENDING
+
+    job = queue.start(JOBS[1], owner="w1")
+    assert queue.fail(job.id, "TimeoutError: datebox") == JobState.FAILED
+    assert queue.get(JOBS[1]).retries == 2
+
+    job = queue.start(JOBS[2], owner="w1")
+    assert queue.fail(job.id, "no site", retryable=False) == JobState.FAILED
+
+
+def test_expired_lease_is_reclaimed(queue, tmp_path) -> None:
+    claimed = queue.claim(owner="crashed", limit=3)
+    assert len(claimed) == 3
+    assert queue.claim(owner="w2") == []
+    assert queue.resume() == 0
+
+    # The crashed worker never heartbeats, a live one keeps its lease
+    queue.clock.now += 30
+    assert queue.heartbeat(claimed[0].id, owner="crashed")
+    assert not queue.heartbeat(claimed[0].id, owner="w2")
+
+    queue.clock.now += 45
+    assert queue.resume() == 2
+    assert queue.counts()["pending"] == 2
+
+    # Reopening the file (a restarted batch) sees the same state
+    reopened = JobQueue(queue.path, lease=60, clock=queue.clock)
+    assert [x.job for x in reopened.claim(owner="w2", limit=5)] == JOBS[1:]
+    with pytest.raises(LookupError):
+        reopened.start(JOBS[0], owner="w2")
+    reopened.close()
+
+
+def test_release_keeps_retries(queue) -> None:
+    job = queue.start(JOBS[0], owner="w1")
+    assert queue.release(job.id)
+    assert not queue.release(job.id)
+
+    released = queue.get(JOBS[0])
+    assert released.state == JobState.PENDING
+    assert released.retries == 0
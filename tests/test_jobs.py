@@ -0,0 +1,61 @@
+import csv
+from datetime import datetime, timedelta
+
+import pandas as pd
+import pytest
+
+from autovid.jobs import Job, JobResult, ResultsCSV, load_jobs
+
+
+def test_load_jobs_csv(tmp_path) -> None:
+    path = tmp_path / "jobs.csv"
+    path.write_text(
+        "Terminal,Datetime,Buffer,Jira_ID\n"
+        "ATM1001,2025-01-02 03:04:05,10,OPS-1\n"
+        "ATM2001,2025-01-02 04:00:00,,\n"
+        ",,,\n"
+    )
+
+    jobs = load_jobs(path)
+
+    assert jobs == [
+        Job("ATM1001", datetime(2025, 1, 2, 3, 4, 5), timedelta(seconds=10), "OPS-1"),
+        Job("ATM2001", datetime(2025, 1, 2, 4), timedelta(seconds=5), None),
+    ]
+    assert jobs[0].fl_name == "OPS-1_ATM1001_20250102_030405"
+
+
+def test_load_jobs_excel(tmp_path) -> None:
+    path = tmp_path / "jobs.xlsx"
+    pd.DataFrame(
+        {"term_id": ["ATM/1001"], "tran_dt": [datetime(2025, 1, 2, 3, 4, 5)]}
+    ).to_excel(path, index=False)
+
+    (job,) = load_jobs(path)
+
+    assert job.tran_dt == datetime(2025, 1, 2, 3, 4, 5)
+    assert job.fl_name == "ATM-1001_20250102_030405"
+
+
+def test_load_jobs_missing_columns(tmp_path) -> None:
+    path = tmp_path / "jobs.csv"
+    path.write_text("site,when\nx,y\n")
+
+    with pytest.raises(ValueError):
+        load_jobs(path)
+
+
+def test_results_csv(tmp_path) -> None:
+    results = ResultsCSV(tmp_path / "results.csv")
+    job = Job("ATM1001", datetime(2025, 1, 2, 3, 4, 5))
+
+    results.append(
+        JobResult(job=job, ok=True, site_id="SITE", output=tmp_path / "a.jpg")
+    )
+    results.append(JobResult(job=job, ok=False, error="FileNotFoundError: no video"))
+
+    with results.path.open() as f:
+        rows = list(csv.DictReader(f))
+
+    assert [x["status"] for x in rows] == ["ok", "failed"]
+    assert rows[1]["error"] == "FileNotFoundError: no video"
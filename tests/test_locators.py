@@ -0,0 +1,106 @@
+import pytest
+
+from autovid.locators import LocatorCache, LocatorEngine, parse_path
+from autovid.sim import VERINT_TREE, SimBackend, build_tree
+from autovid.uimap import VERINT_LOCATORS
+
+
+def test_parse_path() -> None:
+    steps = parse_path("Expander{Recorded Video} > *[1] > ListBoxItem[*]")
+
+    assert [str(x) for x in steps] == [
+        "Expander{Recorded Video}[0]",
+        "*[1]",
+        "ListBoxItem[*]",
+    ]
+    assert steps[0].title == "Recorded Video"
+    assert steps[1].class_name is None
+
+    with pytest.raises(ValueError):
+        parse_path("ListBoxItem[*] > Button")
+
+
+def test_verint_spec_matches_tree(fake_tree) -> None:
+    engine = LocatorEngine(VERINT_LOCATORS, root=lambda: fake_tree)
+
+    assert engine.validate() == {}
+    assert len(engine.resolve("open_video_tabs")) == 2
+    assert engine.resolve("recorded_button").class_name == "Button"
+    assert engine.describe("searchbox") == "TabControl[0] > TabItem[0] > TextBox[0]"
+
+
+def test_cache_hits_and_staleness(fake_tree) -> None:
+    cache = LocatorCache()
+    engine = LocatorEngine(VERINT_LOCATORS, root=lambda: fake_tree, cache=cache)
+
+    searchbox = engine.resolve("searchbox")
+    for _ in range(3):
+        assert engine.resolve("searchbox") is searchbox
+
+    # tab_control, verint_tab and searchbox are resolved once
+    assert cache.stats == {"hits": 3, "misses": 3, "stale": 0}
+
+    searchbox.alive = False
+    engine.resolve("searchbox")
+    assert cache.stale == 1
+    # Only the last hop is walked again, verint_tab is still valid
+    assert cache.hits == 4
+
+    cache.invalidate()
+    engine.resolve("searchbox")
+    assert cache.misses == 7
+
+
+def test_shared_prefixes(fake_tree) -> None:
+    engine = LocatorEngine(
+        {
+            "a": (None, "TabControl > TabItem[1] > VideoTabControl > Expander"),
+            "b": (None, "TabControl > TabItem[1] > VideoTabControl > Grid"),
+        },
+        root=lambda: fake_tree,
+    )
+
+    engine.resolve("a")
+    tab_item = fake_tree.children()[0].children()[1]
+    calls = tab_item.calls
+
+    # The shared "TabControl > TabItem[1] > VideoTabControl" prefix is cached
+    engine.resolve("b")
+    assert tab_item.calls == calls
+
+
+def test_prefetch_serves_subtree_from_one_snapshot() -> None:
+    backend = SimBackend()
+    tree = build_tree(VERINT_TREE, backend=backend)
+    engine = LocatorEngine(
+        VERINT_LOCATORS, root=lambda: tree, snapshot=backend.snapshot
+    )
+
+    with engine.prefetch("video_tabcontainer"):
+        datebox = engine.resolve("datebox")
+        button = engine.resolve("recorded_button")
+        assert backend.calls["snapshot"] == 1
+
+        # Lookups and reads below the prefetched locator are served from memory
+        calls = backend.total_calls
+        assert engine.resolve("datebox") is datebox
+        assert engine.find(engine.resolve("recorded_video"), "Button[1]") is button
+        assert datebox.is_visible() and engine.resolve("camera_results") == []
+        assert backend.total_calls == calls
+
+        # Acting through the snapshot makes reads live and the next lookup re-fetch
+        button.click_input()
+        assert datebox.is_visible()
+        assert backend.calls["is_visible"] == 1
+        engine.resolve("datebox")
+        assert backend.calls["snapshot"] == 2
+
+        engine.refresh()
+        engine.resolve("datebox")
+        assert backend.calls["snapshot"] == 3
+
+    # Looked up elements stay cached after the step and read the live tree
+    datebox = engine.resolve("datebox")
+    assert backend.calls["snapshot"] == 3
+    assert datebox.is_visible()
+    assert backend.calls["is_visible"] == 2
@@ -0,0 +1,73 @@
+import csv
+import json
+from datetime import datetime, timedelta
+
+import pytest
+
+from autovid.jobs import Job, JobResult
+from autovid.report import ResultsWriter, read_manifest, rebuild_workbook
+
+EVENT = datetime(2025, 1, 2, 3, 4, 5)
+
+
+def result(i: int) -> JobResult:
+    return JobResult(
+        job=Job(f"ATM{1000 + i}", EVENT + timedelta(minutes=i), jira_id="OPS-1"),
+        ok=i % 3 != 0,
+        site_id="SITE-SOUTH",
+        error=None if i % 3 else "TimeoutError: videoview",
+        started=EVENT,
+        finished=EVENT + timedelta(seconds=30),
+        steps={"select_site": 1.5, "videoview": 20.25, "seek": 0.5},
+    )
+
+
+def sheet_rows(path) -> list[tuple]:
+    from openpyxl import load_workbook
+
+    book = load_workbook(path, read_only=True)
+    rows = list(book["Results"].iter_rows(values_only=True))
+    book.close()
+    return rows
+
+
+def test_partial_report_survives_a_crash(tmp_path) -> None:
+    writer = ResultsWriter(tmp_path / "report")
+    for i in range(5):
+        writer.append(result(i))
+
+    # The process dies here, before close() writes the workbook
+    assert not (tmp_path / "report.xlsx").exists()
+    with (tmp_path / "report.csv").open(newline="") as f:
+        rows = list(csv.DictReader(f))
+    assert len(rows) == 5
+    assert rows[1]["videoview_s"] == "20.250"
+    assert rows[1]["other_s"] == "0.500"
+
+    lines = (tmp_path / "report.jsonl").read_text().splitlines()
+    assert json.loads(lines[0])["error"] == "TimeoutError: videoview"
+
+    xlsx = rebuild_workbook(tmp_path / "report.jsonl")
+    header, *body = sheet_rows(xlsx)
+    assert len(body) == 5
+    assert body[1][header.index("tran_dt")] == EVENT + timedelta(minutes=1)
+    assert body[1][header.index("total_s")] == pytest.approx(22.25)
+    assert list(read_manifest(tmp_path / "report.csv")) == list(
+        read_manifest(tmp_path / "report.jsonl")
+    )
+    writer.close()  # Only so the streamed sheet isn't left open
+
+
+def test_reopened_report_keeps_earlier_rows(tmp_path) -> None:
+    with ResultsWriter(tmp_path / "report") as writer:
+        writer.append(result(1))
+
+    with ResultsWriter(tmp_path / "report", formats=("csv", "xlsx")) as writer:
+        writer.append(result(2))
+
+    header, *body = sheet_rows(tmp_path / "report.xlsx")
+    assert [x[header.index("term_id")] for x in body] == ["ATM1001", "ATM1002"]
+    assert (tmp_path / "report.csv").read_text().count("\n") == 3
+
+    with pytest.raises(ValueError, match="pdf"):
+        ResultsWriter(tmp_path / "other", formats=("csv", "pdf"))
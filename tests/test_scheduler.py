@@ -0,0 +1,63 @@
+from datetime import datetime, timedelta
+
+from autovid.common import Ambiguous
+from autovid.jobs import Job
+from autovid.scheduler import plan_jobs
+
+T0 = datetime(2025, 1, 2, 12)
+SITES = {
+    "ATM1": "SITE-A",
+    "ATM2": "SITE-A",
+    "ATM3": "SITE-B",
+    "ATM4": None,
+    "ATM5": Ambiguous("ATM5", ("ATM5", "ATM5-B"), ("SITE-A", "SITE-B")),
+}
+
+
+def job(term_id: str, minutes: float, lookback: int = 30) -> Job:
+    return Job(term_id, T0 + timedelta(minutes=minutes), timedelta(seconds=lookback))
+
+
+def test_plan_groups_and_merges() -> None:
+    jobs = [
+        job("ATM3", 0),
+        job("ATM1", 10),
+        job("ATM1", 0),
+        job("ATM1", 0.5),
+        job("ATM2", 0),
+        job("ATM4", 0),
+        job("ATM5", 0),
+    ]
+
+    plan = plan_jobs(jobs, SITES, sweep=True)
+
+    assert [(x.site_id, x.camera, len(x.jobs)) for x in plan.requests] == [
+        ("SITE-A", "ATM1", 2),
+        ("SITE-A", "ATM1", 1),
+        ("SITE-A", "ATM2", 1),
+        ("SITE-B", "ATM3", 1),
+    ]
+    merged = plan.requests[0]
+    assert merged.start == T0 - timedelta(seconds=30)
+    assert merged.end == T0 + timedelta(seconds=60)
+    assert merged.center - merged.span == merged.start
+
+    assert {x.term_id for x in plan.unresolved} == {"ATM4", "ATM5"}
+    # 5 resolved jobs * 8 steps vs 2 sites, 3 camera selections, 4 videos, 5 frames
+    assert plan.steps_before == 40
+    assert plan.steps_after == 2 * 2 + 3 + 4 * 3 + 5 * 2
+    assert 0 < plan.saving < 1
+
+    # Without sweep every job still loads its own video
+    unswept = plan_jobs(jobs, SITES)
+    assert unswept.requests == plan.requests
+    assert unswept.steps_after == 2 * 2 + 3 + 5 * 3 + 5 * 2
+
+
+def test_plan_max_span() -> None:
+    jobs = [job("ATM1", x, lookback=60) for x in range(0, 10, 1)]
+
+    plan = plan_jobs(jobs, SITES, max_span=timedelta(minutes=4))
+
+    assert [len(x.jobs) for x in plan.requests] == [3, 3, 3, 1]
+    assert all(x.end - x.start <= timedelta(minutes=4) for x in plan.requests)
@@ -0,0 +1,374 @@
+import threading
+import time
+from datetime import datetime, timedelta
+
+import pytest
+
+from autovid.batch import AutoVidBatch
+from autovid.jobs import Job
+from autovid.sim import SimBackend, _path
+from autovid.verint import PROBE_TIMEOUT, VERINT
+from autovid.waits import SYSTEM_CLOCK, Cancelled, Waiter
+
+SITES = {"SITE-SOUTH": ["ATM2001", "ATM2001-B"], "SITE-EAST": ["LOBBY_1"]}
+EVENT = datetime(2025, 1, 2, 3, 4, 5)
+
+
+@pytest.fixture()
+def verint_dir(tmp_path):
+    path = tmp_path / "verint"
+    path.mkdir()
+    (path / "Verint.VideoInvestigator.exe").touch()
+    return path
+
+
+def make(cls, tmp_path, verint_dir, clock, backend=None, **kwargs):
+    backend = backend or SimBackend(SITES, missing=["LOBBY_1"], clock=clock)
+    return cls(
+        outdir=tmp_path,
+        verint_path=verint_dir,
+        backend=backend,
+        waiter=Waiter(clock=clock),
+        **kwargs,
+    )
+
+
+def test_pull_frame_end_to_end(tmp_path, verint_dir, fake_clock) -> None:
+    backend = SimBackend(
+        SITES, clock=fake_clock, latency=0.01, launch_time=5, load_time=8
+    )
+    verint = make(VERINT, tmp_path, verint_dir, fake_clock, backend)
+
+    verint.init_app()
+    verint.login()
+    verint.reset_state()
+    output = verint.pull_frame(
+        "SITE-SOUTH", "ATM2001", EVENT, timedelta(seconds=5), fl_name="OPS-1"
+    )
+
+    assert output == tmp_path / "OPS-1.jpg"
+    assert output.read_bytes().startswith(b"\xff\xd8")
+    assert backend.camera == "ATM2001"
+    assert fake_clock.now >= 13  # launch and video load were waited out
+    assert backend.total_calls == sum(backend.calls.values()) > 50
+    assert verint.wait.summary()["videoview"]["timeouts"] == 0
+
+    # Saving over an existing image goes through the overwrite prompt
+    verint.export_frame(EVENT, timedelta(seconds=5), fl_name="OPS-1")
+    assert backend.saved == [output, output]
+    assert backend.popups == []
+
+
+def test_missing_video(tmp_path, verint_dir, fake_clock) -> None:
+    verint = make(VERINT, tmp_path, verint_dir, fake_clock)
+    verint.init_app()
+    verint.login()
+    verint.reset_state()
+
+    with pytest.raises(FileNotFoundError):
+        verint.pull_frame("SITE-EAST", "LOBBY_1", EVENT, timedelta(seconds=5))
+
+
+def test_injected_failures_are_absorbed(tmp_path, verint_dir, fake_clock) -> None:
+    backend = SimBackend(SITES, clock=fake_clock, failure_rate=0.3, fail_on=["exists"])
+    verint = make(VERINT, tmp_path, verint_dir, fake_clock, backend)
+
+    verint.init_app()
+    verint.login()
+    verint.reset_state()
+    verint.pull_frame("SITE-SOUTH", "ATM2001-B", EVENT, timedelta(seconds=5))
+
+    assert backend.failures > 0
+    assert backend.saved == [tmp_path / "ATM2001-B_snapshot.jpg"]
+
+
+def test_login_and_reset_tolerate_missing_ui(tmp_path, verint_dir, fake_clock) -> None:
+    verint = make(VERINT, tmp_path, verint_dir, fake_clock)
+    verint.init_app()
+    verint.login()
+
+    # Already logged in: a short probe instead of minutes of waits and retries
+    started = fake_clock.now
+    verint.login()
+    assert fake_clock.now - started <= PROBE_TIMEOUT
+
+    _path(verint.backend.root, "TabControl > TabItem[0] > TextBox").visible = False
+    verint.reset_state()
+    assert verint.backend.calls["type_keys"] == 2  # Only the cards menu and workspace
+
+
+def test_cancel_aborts_wait_and_verint_is_reusable(tmp_path, verint_dir) -> None:
+    backend = SimBackend(SITES, load_time=30)
+    verint = make(VERINT, tmp_path, verint_dir, SYSTEM_CLOCK, backend)
+    verint.init_app()
+    verint.login()
+    verint.reset_state()
+    verint.select_site("SITE-SOUTH")
+    verint.select_camera("ATM2001")
+
+    # Stuck waiting for the video to load when the cancel comes in
+    cancelled_at = []
+    timer = threading.Timer(
+        0.2, lambda: (cancelled_at.append(time.monotonic()), verint.cancel.cancel())
+    )
+    timer.start()
+    with pytest.raises(Cancelled):
+        verint.export_frame(EVENT, timedelta(seconds=5))
+    latency = time.monotonic() - cancelled_at[0]
+    timer.join()
+
+    assert latency < 0.1
+    assert verint.wait.records[-1].name == "videoview"
+
+    # Cleaned up and reset in place, without relaunching VERINT
+    verint.cleanup()
+    verint.cancel.reset()
+    backend.load_time = 0
+    verint.reset_state()
+    output = verint.pull_frame("SITE-SOUTH", "ATM2001", EVENT, timedelta(seconds=5))
+
+    assert output.exists()
+    assert backend.calls["start"] == 1
+
+
+def test_prefetch_cuts_reset_state_calls(tmp_path, verint_dir, fake_clock) -> None:
+    calls = {}
+    for prefetch in (False, True):
+        backend = SimBackend(SITES, clock=fake_clock)
+        verint = make(
+            VERINT, tmp_path, verint_dir, fake_clock, backend, prefetch=prefetch
+        )
+        verint.init_app()
+        verint.login()
+
+        before = backend.total_calls
+        with verint.trace.job("reset"), verint.trace.span("reset_state") as span:
+            verint.reset_state()
+
+        assert span.calls == backend.total_calls - before
+        calls[prefetch] = backend.calls
+
+        # Restored video tabs and workspaces are closed either way
+        tabs = verint.ui.resolve("video_tab_strip").children()
+        assert [x.class_name for x in tabs] == ["VideoRequest"]
+        assert verint.ui.resolve("open_workspaces") == []
+
+    # The tab strip, workspace tree and dashboard come from one snapshot each
+    assert calls[True]["snapshot"] == 3
+    assert calls[True]["children"] < calls[False]["children"] - 5
+    assert calls[True].total() < calls[False].total()
+
+
+def test_batch_run_job_reuses_site(tmp_path, verint_dir, fake_clock) -> None:
+    batch = make(AutoVidBatch, tmp_path, verint_dir, fake_clock, jobs=[])
+    batch.start()
+
+    for camera, minute in (("ATM2001", 0), ("ATM2001", 5), ("ATM2001-B", 0)):
+        job = Job(camera, EVENT + timedelta(minutes=minute))
+        assert batch.run_job(job, "SITE-SOUTH").exists()
+
+    names = [x.name for x in batch.wait.records]
+    assert names.count("site_results") == 1
+    assert names.count("camera_results") == 2
+    assert len(batch.backend.saved) == 3
+
+
+def test_batch_health_and_relogin(tmp_path, verint_dir, fake_clock) -> None:
+    batch = make(AutoVidBatch, tmp_path, verint_dir, fake_clock, jobs=[])
+    assert not batch.healthy()
+
+    batch.start()
+    assert batch.healthy()
+
+    # VERINT crashed between daemon requests, relogin brings it back
+    batch.backend.kill()
+    assert not batch.healthy()
+    batch.relogin()
+    assert batch.healthy()
+    assert batch.backend.calls["start"] == 2
+    assert batch.run_job(Job("ATM2001", EVENT), "SITE-SOUTH").exists()
+
+
+def test_jobs_run_under_a_retry_budget(tmp_path, verint_dir, fake_clock) -> None:
+    from autovid.common import _job_deadline
+
+    batch = make(AutoVidBatch, tmp_path, verint_dir, fake_clock, jobs=[])
+    batch.retry_budget = 120
+    seen = []
+
+    def export_frame(**kwargs):
+        seen.append(_job_deadline.get() - SYSTEM_CLOCK.monotonic())
+        raise FileNotFoundError("Video could not be found")
+
+    batch._select = lambda *args: None
+    batch.export_frame = export_frame
+    with pytest.raises(FileNotFoundError):
+        batch.run_job(Job("ATM2001", EVENT), "SITE-SOUTH")
+
+    assert 119 < seen[0] <= 120
+    assert _job_deadline.get() is None
+
+
+def test_cache_hits_skip_verint(tmp_path, verint_dir, fake_clock, monkeypatch) -> None:
+    from autovid.main import AutoVid
+
+    batch = make(
+        AutoVidBatch,
+        tmp_path,
+        verint_dir,
+        fake_clock,
+        jobs=[],
+        cache=tmp_path / "cache",
+    )
+    batch.start()
+    first = batch.run_job(Job("ATM2001", EVENT, jira_id="OPS-1"), "SITE-SOUTH")
+    second = batch.run_job(Job("ATM2001", EVENT, jira_id="OPS-2"), "SITE-SOUTH")
+
+    assert len(batch.backend.saved) == 1
+    assert second.name == "OPS-2_ATM2001_20250102_030405.jpg"
+    assert second.read_bytes() == first.read_bytes()
+
+    # A one-off pull never starts VERINT or looks the site up on a hit
+    backend = SimBackend(SITES, clock=fake_clock)
+    autovid = make(
+        AutoVid,
+        tmp_path,
+        verint_dir,
+        fake_clock,
+        backend,
+        term_id="ATM2001",
+        tran_dt=EVENT + timedelta(seconds=30),
+        cache=batch.cache,
+    )
+    autovid.pull_image()
+
+    assert backend.calls["start"] == backend.calls["windows"] == 0
+    assert (tmp_path / "ATM2001_20250102_030435.jpg").read_bytes() == first.read_bytes()
+
+    # A miss saves under the job's name too, so a repeat run writes the same file
+    monkeypatch.setattr("autovid.verint.term2site", lambda term: "SITE-SOUTH")
+    autovid.tran_dt = EVENT + timedelta(hours=1)
+    autovid.pull_image()
+
+    assert backend.calls["start"] == 1
+    output = tmp_path / "ATM2001_20250102_040405.jpg"
+    assert backend.saved == [output]
+    assert batch.cache.fetch("ATM2001", autovid.tran_dt, timedelta(seconds=5), output)
+
+
+def test_batch_report_has_step_timings(
+    tmp_path, verint_dir, fake_clock, verint_db
+) -> None:
+    from sqlalchemy import event
+
+    from autovid.directory import CameraDirectory
+    from autovid.report import read_manifest
+
+    queries = []
+    event.listen(verint_db, "before_cursor_execute", lambda *args: queries.append(1))
+    jobs = [Job("ATM2001", EVENT), Job("ATM2001", EVENT + timedelta(hours=1))]
+    batch = make(
+        AutoVidBatch,
+        tmp_path,
+        verint_dir,
+        fake_clock,
+        jobs=[*jobs, Job("NOPE", EVENT)],
+        report=True,
+        directory=CameraDirectory(con=verint_db),
+    )
+    batch.run()
+
+    # One snapshot read, plus a live lookup for the terminal it doesn't know
+    assert len(queries) == 2
+
+    rows = {x["term_id"]: x for x in read_manifest(tmp_path / "autovid_report.jsonl")}
+    assert rows["ATM2001"]["status"] == "ok"
+    assert rows["ATM2001"]["videoview_s"] is not None
+    assert rows["NOPE"]["total_s"] is None
+    assert (tmp_path / "autovid_report.xlsx").exists()
+
+
+def test_batch_close_without_verint(tmp_path, verint_dir, fake_clock, verint_db):
+    from autovid.directory import CameraDirectory
+
+    backend = SimBackend(SITES, clock=fake_clock)
+    batch = make(
+        AutoVidBatch,
+        tmp_path,
+        verint_dir,
+        fake_clock,
+        backend,
+        jobs=[Job("NOPE", EVENT)],
+        directory=CameraDirectory(con=verint_db),
+    )
+
+    batch.run()
+    batch.close()
+
+    assert batch.app is None
+    assert backend.calls["start"] == 0
+
+
+def test_survey_selects_site_once(tmp_path, verint_dir, fake_clock, verint_db) -> None:
+    from autovid.directory import CameraDirectory
+    from autovid.survey import SiteSurvey
+
+    site_survey = make(
+        SiteSurvey,
+        tmp_path,
+        verint_dir,
+        fake_clock,
+        directory=CameraDirectory(con=verint_db),
+    )
+    start = EVENT - timedelta(minutes=1)
+    with pytest.raises(ValueError):
+        site_survey.survey("SITE-SOUTH", r"^atm2001", (start, EVENT))
+
+    results = site_survey.survey("SITE-SOUTH", r"^ATM2001", (start, EVENT))
+    assert [(x.job.term_id, x.ok) for x in results] == [
+        ("ATM2001", True),
+        ("ATM2001-B", True),
+    ]
+    assert results[0].job.lookback == timedelta(seconds=30)
+    assert results[0].output == tmp_path / "ATM2001_20250102_030335.jpg"
+
+    names = [x.name for x in site_survey.wait.records]
+    assert names.count("site_results") == 1
+    assert names.count("camera_results") == 2
+    assert names.count("verint_tab") == 1  # Only the reset at start
+    assert len(site_survey.backend.saved) == 2
+
+
+def test_sweep_loads_video_once(tmp_path, verint_dir, fake_clock) -> None:
+    verint = make(VERINT, tmp_path, verint_dir, fake_clock)
+    verint.init_app()
+    verint.login()
+    verint.reset_state()
+    verint.select_site("SITE-SOUTH")
+    verint.select_camera("ATM2001")
+
+    start = EVENT.replace(second=0)
+    outputs = verint.sweep(start, start + timedelta(seconds=30), 10, prefix="ATM2001")
+
+    assert [x.name for x in outputs] == [
+        f"ATM2001_20250102_0304{x:02d}.jpg" for x in (0, 10, 20, 30)
+    ]
+    assert verint.backend.saved == outputs
+    # The range is widened to 03:04-03:05, so every 10s is 1/6 of the slider
+    assert verint.backend.positions == pytest.approx([0, 1 / 6, 2 / 6, 3 / 6])
+    assert [x.name for x in verint.wait.records].count("videoview") == 1
+
+
+def test_batch_sweeps_merged_requests(tmp_path, verint_dir, fake_clock) -> None:
+    from autovid.scheduler import plan_jobs
+
+    jobs = [Job("ATM2001", EVENT + timedelta(seconds=x)) for x in (6, 0, 3)]
+    (request,) = plan_jobs(jobs, {"ATM2001": "SITE-SOUTH"}).requests
+    batch = make(AutoVidBatch, tmp_path, verint_dir, fake_clock, jobs=jobs, sweep=True)
+    batch.start()
+
+    outputs = []
+    assert batch._sweep(request, outputs) == []
+    assert [x.job.tran_dt.second for x in outputs] == [5, 8, 11]
+    assert all(x.ok and x.output.exists() for x in outputs)
+    assert [x.name for x in batch.wait.records].count("videoview") == 1
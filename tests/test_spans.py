@@ -0,0 +1,95 @@
+import json
+import threading
+
+import pytest
+
+from autovid.__main__ import main
+from autovid.common import retry
+from autovid.spans import Tracer, load_traces, percentile, summarize
+from autovid.waits import Waiter
+
+
+def test_spans_record_retries_and_waits(tmp_path, fake_clock) -> None:
+    path = tmp_path / "spans.jsonl"
+    waiter = Waiter(clock=fake_clock, interval=0.5, backoff=1)
+    tracer = Tracer(waiter=waiter, path=path, clock=fake_clock)
+    calls = []
+
+    @retry(max_retries=3, wait_time=1, jitter=0, clock=fake_clock)
+    def flaky() -> str:
+        calls.append(1)
+        if len(calls) < 3:
+            raise TimeoutError("not yet")
+        return "ok"
+
+    with tracer.job("OPS-1_ATM1001"):
+        with tracer.span("select_site"):
+            waiter.until(lambda: fake_clock.now >= 1.0, name="searchbox")
+        with tracer.span("videoview"):
+            flaky()
+
+    with (
+        pytest.raises(ValueError),
+        tracer.job("OPS-2_ATM2001"),
+        tracer.span("select_site"),
+    ):
+        raise ValueError("no site")
+
+    first, second = load_traces([path])
+    site, video = first["spans"]
+    assert first["job"] == "OPS-1_ATM1001" and first["ok"]
+    assert (site["name"], site["waits"], site["retries"]) == ("select_site", 1, 0)
+    assert site["duration"] == pytest.approx(1.0)
+    assert site["waited"] == pytest.approx(1.0)
+    assert (video["name"], video["retries"], video["waits"]) == ("videoview", 2, 0)
+    assert video["duration"] == pytest.approx(3.0)
+
+    assert not second["ok"]
+    assert second["spans"][0]["error"] == "ValueError: no site"
+
+
+def test_spans_ignore_retries_on_other_threads(fake_clock) -> None:
+    tracer = Tracer(clock=fake_clock)
+    calls = []
+
+    @retry(max_retries=3, wait_time=1, jitter=0, clock=fake_clock)
+    def flaky() -> None:
+        calls.append(1)
+        if len(calls) % 2:
+            raise TimeoutError("not yet")
+
+    with tracer.span("outer") as outer:
+        worker = threading.Thread(target=flaky)
+        worker.start()
+        worker.join()
+        with tracer.span("inner") as inner:
+            flaky()
+
+    assert len(calls) == 4
+    assert (outer.retries, inner.retries) == (1, 1)
+
+
+def test_report(tmp_path, capsys) -> None:
+    path = tmp_path / "spans.jsonl"
+    with path.open("w") as f:
+        for i in range(1, 21):
+            spans = [
+                {"name": "reset_state", "duration": 1.0, "retries": 0, "waited": 0.5},
+                {"name": "videoview", "duration": float(i), "retries": 1, "waited": 0},
+            ]
+            f.write(json.dumps({"job": str(i), "duration": i + 1.0, "spans": spans}))
+            f.write("\n")
+
+    summary = summarize(load_traces([path]))
+    assert summary["videoview"]["p50"] == 10
+    assert summary["videoview"]["p95"] == 19
+    assert summary["videoview"]["max"] == 20
+    assert summary["videoview"]["retries"] == 20
+    assert summary["reset_state"]["waited"] == pytest.approx(10)
+    assert summary["job"]["count"] == 20
+    assert percentile([], 50) != percentile([], 50)  # nan
+
+    main(["report", str(path)])
+    lines = capsys.readouterr().out.splitlines()
+    assert lines[0].split()[:4] == ["step", "count", "p50", "p95"]
+    assert [x.split()[0] for x in lines[2:]] == ["job", "videoview", "reset_state"]
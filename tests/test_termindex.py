@@ -0,0 +1,48 @@
+from autovid.termindex import MatchKind, TermIndex
+
+NAMES = ["ATM2001", "ATM2001-B", "ATM20011", "XATM2001", "LOBBY_1", "ATM1001"]
+
+
+def test_match_ranking() -> None:
+    output = TermIndex(NAMES).match("atm2001")
+
+    assert output.best.name == "ATM2001"
+    assert output.best.kind == MatchKind.EXACT
+    assert output.resolved == "ATM2001"
+    assert [x.kind for x in output.alternatives] == [
+        MatchKind.PREFIX,
+        MatchKind.PREFIX,
+        MatchKind.SUBSTRING,
+    ]
+    # Closer length ranks first within a kind
+    assert output.alternatives[0].name == "ATM20011"
+
+
+def test_match_ambiguous_and_fuzzy() -> None:
+    index = TermIndex(NAMES)
+
+    assert index.match("ATM200").resolved is None
+    assert index.match("LOBB").resolved == "LOBBY_1"
+    assert index.match("nothing").best is None
+
+    typo = index.match("LOBY_1")
+    assert typo.best.kind == MatchKind.FUZZY
+    assert typo.best.name == "LOBBY_1"
+
+
+def test_match_visits_only_the_limit() -> None:
+    index = TermIndex([f"ATM{x:06}" for x in range(100_000)])
+
+    for x in range(0, 100_000, 1000):
+        index.visited = 0
+        assert index.match(f"ATM{x:06}").resolved == f"ATM{x:06}"
+        # Only the names sharing the term's rarest trigram are checked
+        assert index.visited <= len(index) // 50
+
+    # Short prefixes match every name, only the first ten are looked at
+    for term in ("ATM0", "AT", "TM00"):
+        index.visited = 0
+        output = index.match(term)
+        assert len(output.candidates) == 10
+        assert index.visited == 10
+    assert output.best.name == "ATM000000"
@@ -0,0 +1,77 @@
+import pytest
+
+from autovid.waits import Waiter, WaitTimeoutError
+
+
+class FakeButton:
+    def __init__(self, clock, ready_at: float) -> None:
+        self.clock = clock
+        self.ready_at = ready_at
+
+    def is_visible(self) -> bool:
+        return True
+
+    def is_enabled(self) -> bool:
+        return self.clock.now >= self.ready_at
+
+
+def test_until_backs_off_and_records(fake_clock) -> None:
+    clock = fake_clock
+    waiter = Waiter(clock=clock, interval=0.1, backoff=2, max_interval=0.5)
+    button = FakeButton(clock, ready_at=1.0)
+
+    assert waiter.enabled(lambda: button, name="button") is button
+    assert clock.sleeps[:4] == [0.1, 0.2, 0.4, 0.5]
+    assert waiter.records[0].name == "button"
+    assert waiter.records[0].duration == pytest.approx(1.2)
+
+
+def test_until_timeout_and_deadline(fake_clock) -> None:
+    clock = fake_clock
+    waiter = Waiter(clock=clock)
+
+    def missing():
+        raise IndexError("not in the tree yet")
+
+    with pytest.raises(WaitTimeoutError, match="not in the tree yet"):
+        waiter.exists(missing, timeout=2, name="missing")
+    assert clock.now == pytest.approx(2)
+
+    # The overall deadline caps the per-wait timeout
+    waiter.deadline = clock.now + 0.5
+    assert waiter.until(lambda: False, timeout=30, required=False) is None
+    assert clock.now == pytest.approx(2.5)
+
+    assert waiter.summary()["missing"]["timeouts"] == 1
+
+
+def test_gone_and_text_changed(fake_clock) -> None:
+    clock = fake_clock
+    waiter = Waiter(clock=clock)
+
+    class Dialog:
+        def is_visible(self):
+            if clock.now > 0.3:
+                raise RuntimeError("UIA_E_ELEMENTNOTAVAILABLE")
+            return True
+
+        def texts(self):
+            return ["old"] if clock.now < 0.2 else ["new"]
+
+    dialog = Dialog()
+    assert waiter.text_changed(lambda: dialog, ["old"]) == ["new"]
+    assert waiter.gone(dialog) is True
+
+
+def test_records_are_bounded(fake_clock) -> None:
+    waiter = Waiter(clock=fake_clock, history=3)
+    for i in range(10):
+        waiter.until(lambda: True, name=f"wait{i % 2}")
+    waiter.until(lambda: False, timeout=1, name="wait0", required=False)
+
+    assert [x.name for x in waiter.records] == ["wait0", "wait1", "wait0"]
+    assert waiter.count == 11
+    assert waiter.waited == pytest.approx(1)
+    # The summary still covers every wait
+    assert waiter.summary()["wait0"]["count"] == 6
+    assert waiter.summary()["wait0"]["timeouts"] == 1
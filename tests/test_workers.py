@@ -0,0 +1,171 @@
+import threading
+from datetime import datetime, timedelta
+from itertools import pairwise
+
+from autovid.jobqueue import JobQueue
+from autovid.jobs import Job
+from autovid.workers import Coordinator, Worker
+
+SITES = {"ATM1001": "1", "ATM2001": "2", "ATM2001-B": "2", "NOPE": None}
+
+
+def make_jobs(n: int = 4) -> list[Job]:
+    start = datetime(2025, 1, 2, 3)
+    return [
+        Job(term, start + timedelta(minutes=i))
+        for term in ("ATM1001", "ATM2001", "ATM2001-B")
+        for i in range(n)
+    ]
+
+
+class SimDriver:
+    """Writes a fake image per job instead of driving VERINT"""
+
+    def __init__(self, outdir, fail: set[str] = frozenset(), delay: float = 0.0):
+        self.outdir = outdir
+        self.fail = fail
+        self.delay = delay
+        self.calls: list[tuple[str, str]] = []
+        self.events: list[str] = []
+
+    def start(self) -> None:
+        self.events.append("start")
+
+    def run_job(self, job: Job, site_id: str):
+        self.calls.append((site_id, job.term_id))
+        threading.Event().wait(self.delay)
+        if job.term_id in self.fail:
+            raise TimeoutError("videoview")
+
+        path = self.outdir / f"{job.fl_name}.jpg"
+        path.write_bytes(b"\xff\xd8")
+        return path
+
+    def recover(self) -> None:
+        self.events.append("recover")
+
+    def cleanup(self) -> None:
+        self.events.append("cleanup")
+
+    def close(self) -> None:
+        self.events.append("close")
+
+
+def test_workers_drain_queue(tmp_path) -> None:
+    queue = JobQueue(tmp_path / "queue.db")
+    coordinator = Coordinator(queue)
+    jobs = make_jobs()
+    assert coordinator.submit(jobs + [Job("NOPE", datetime(2025, 1, 2))], SITES) == 13
+
+    drivers = [SimDriver(tmp_path, delay=0.01) for _ in range(3)]
+    workers = [
+        Worker(JobQueue(queue.path), x, owner=f"w{i}", poll=0.01)
+        for i, x in enumerate(drivers)
+    ]
+    threads = [threading.Thread(target=x.run) for x in workers]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout=10)
+
+    assert coordinator.wait(poll=0.01, timeout=1) == {
+        "pending": 0,
+        "running": 0,
+        "done": 12,
+        "failed": 1,
+    }
+    # Every job ran exactly once across the workers
+    assert sum(len(x.calls) for x in drivers) == 12
+    assert sum(x.stats.done for x in workers) == 12
+    assert {x.owner: x.done for x in queue.workers()} == {
+        x.owner: x.stats.done for x in workers
+    }
+
+    results = coordinator.results(tmp_path / "results.csv")
+    assert [x.ok for x in results].count(False) == 1
+    assert (tmp_path / "results.csv").read_text().count("\n") == 14
+
+
+def test_worker_keeps_site_and_camera(tmp_path) -> None:
+    queue = JobQueue(tmp_path / "queue.db")
+    Coordinator(queue).submit(make_jobs(), SITES)
+    driver = SimDriver(tmp_path)
+
+    Worker(queue, driver, poll=0.01).run()
+
+    # Jobs are claimed grouped by site then camera, so each is only switched once
+    sites = [x[0] for x in driver.calls]
+    cameras = [x[1] for x in driver.calls]
+    assert sum(a != b for a, b in pairwise(sites)) == 1
+    assert sum(a != b for a, b in pairwise(cameras)) == 2
+    assert driver.events == ["start", "close"]
+
+
+def test_dead_worker_job_is_stolen(tmp_path) -> None:
+    queue = JobQueue(tmp_path / "queue.db", lease=timedelta(milliseconds=200))
+    Coordinator(queue).submit(make_jobs(1), SITES)
+
+    # A worker claims a job and dies without ever heartbeating
+    (orphan,) = queue.claim(owner="dead")
+
+    driver = SimDriver(tmp_path)
+    stats = Worker(queue, driver, owner="alive", poll=0.05).run()
+
+    assert stats.done == 3
+    assert (orphan.site_id, orphan.job.term_id) in driver.calls
+    assert queue.get(orphan.job).lease_owner is None
+    assert queue.counts()["done"] == 3
+
+
+def test_worker_retries_then_fails(tmp_path) -> None:
+    queue = JobQueue(tmp_path / "queue.db", max_retries=2)
+    Coordinator(queue).submit(make_jobs(1), SITES)
+    driver = SimDriver(tmp_path, fail={"ATM2001"})
+
+    stats = Worker(queue, driver, poll=0.01).run()
+
+    assert (stats.done, stats.failed) == (2, 2)
+    assert driver.events.count("recover") == 2
+    failed = [x for x in queue.jobs() if x.state == "failed"]
+    assert [(x.job.term_id, x.retries) for x in failed] == [("ATM2001", 2)]
+    assert failed[0].error == "TimeoutError: videoview"
+
+
+class FlakyExportDriver(SimDriver):
+    """Loses the first export of every job"""
+
+    def run_job(self, job: Job, site_id: str):
+        path = super().run_job(job, site_id)
+        if self.calls.count((site_id, job.term_id)) == 1:
+            path.unlink()
+        return path
+
+
+def test_missing_export_is_retried(tmp_path, fake_clock) -> None:
+    fake_clock.now = 1_700_000_000.0
+    queue = JobQueue(tmp_path / "queue.db", clock=fake_clock)
+    coordinator = Coordinator(queue)
+    coordinator.submit(make_jobs(1), SITES)
+    driver = FlakyExportDriver(tmp_path)
+
+    stats = Worker(queue, driver, poll=0.01).run()
+
+    assert (stats.done, stats.failed) == (3, 3)
+    assert [x.retries for x in queue.jobs()] == [1, 1, 1]
+    finished = datetime.fromtimestamp(1_700_000_000.0)
+    results = coordinator.results()
+    assert [(x.started, x.finished) for x in results] == [(finished, finished)] * 3
+
+
+def test_coordinator_resolves_from_directory(tmp_path, verint_db) -> None:
+    from autovid.directory import CameraDirectory
+
+    queue = JobQueue(tmp_path / "queue.db")
+    coordinator = Coordinator(queue, directory=CameraDirectory(con=verint_db))
+
+    assert coordinator.submit(make_jobs(2)) == 6
+    assert {x.job.term_id: x.site_id for x in queue.jobs()} == {
+        "ATM1001": "SITE-NORTH",
+        "ATM2001": "SITE-SOUTH",
+        "ATM2001-B": "SITE-SOUTH",
+    }